@@ -1,7 +1,25 @@
-from flask import request, jsonify
+from flask import request, jsonify, Response, stream_with_context
+import queue
 from datetime import datetime
 from werkzeug.exceptions import BadRequest
 from models import db, Todo
+from id_layout import client_todo_id
+from pagination import paginate_keyset, parse_limit, parse_list_params, apply_list_filters
+from sync import get_changes, SyncTokenExpired
+from caching import data_version, todo_json_etag, not_modified, with_etag
+from bulk import create_todos_batch, bulk_condition, update_todos_bulk, delete_todos_bulk
+from maintenance import archive_completed
+from stats import read_stats
+from search import search_todos, parse_offset
+from projection import parse_fields, load_fields
+from streaming import parse_stream_format, stream_response
+from transfer import export_ndjson, import_ndjson
+from writes import run_write
+from mutations import insert_todo, update_todo_fields, toggle_todo_status, delete_todo_by_id
+from events import broker, format_sse, publish_todo_event, publish_todo_events, DEFAULT_CLIENT_BUFFER, SSE_HANDOFF_ENVIRON_KEY
+from idempotency import (idempotency_key, request_fingerprint, claim_key, lookup_response, insert_todo_once,
+                         remember_response, replay_response, IdempotencyKeyInFlight)
+from todo_cache import cached_todo, cache_stats
 
 def validate_todo_data(data):
     """Helper function สำหรับตรวจสอบข้อมูล"""
@@ -13,6 +31,19 @@ def validate_todo_data(data):
     
     return True
 
+def created_response(todo):
+    """status และ body ของ POST /api/todos (todo เป็น None เมื่อ id ซ้ำ)"""
+    if todo is None:
+        return 400, {
+            'success': False,
+            'message': 'ID นี้มีอยู่แล้ว'
+        }
+    return 201, {
+        'success': True,
+        'data': todo,
+        'message': 'เพิ่มงานสำเร็จ'
+    }
+
 def register_api_routes(app):
     """ลงทะเบียน API Routes ทั้งหมด"""
     
@@ -25,49 +56,254 @@ def register_api_routes(app):
             'web_interface': request.url_root,
             'api_docs': request.url_root + 'api-docs',
             'endpoints': {
-                'GET /api/todos': 'ดึงรายการ Todo ทั้งหมด',
-                'GET /api/todos/<id>': 'ดึง Todo ตาม ID',
+                'GET /api/todos': 'ดึงรายการ Todo แบบแบ่งหน้า (?limit=&cursor=, ?all=true, ?is_completed=, ?created_after=, ?sort=&order=, ?fields=, ?stream=json|ndjson)',
+                'GET /api/todos/<id>': 'ดึง Todo ตาม ID (?fields=)',
                 'POST /api/todos': 'เพิ่ม Todo ใหม่',
+                'POST /api/todos/batch': 'เพิ่ม Todo หลายรายการใน transaction เดียว',
                 'PUT /api/todos/<id>': 'แก้ไข Todo',
                 'PATCH /api/todos/<id>/toggle': 'เปลี่ยนสถานะ Todo',
                 'DELETE /api/todos/<id>': 'ลบ Todo',
+                'PATCH /api/todos/bulk': 'เปลี่ยนสถานะหลายรายการตาม ids หรือ filter',
+                'DELETE /api/todos/bulk': 'ลบหลายรายการตาม ids หรือ filter',
                 'GET /api/todos/stats': 'ดึงสถิติ Todo',
-                'DELETE /api/todos/completed': 'ลบงานที่เสร็จแล้วทั้งหมด'
+                'GET /api/todos/cache/stats': 'ดึงสถิติแคชของ Todo รายการเดียว',
+                'DELETE /api/todos/completed': 'ลบงานที่เสร็จแล้วทั้งหมด',
+                'GET /api/todos/search': 'ค้นหา Todo จากชื่อและรายละเอียด (?q=&limit=&offset=&fields=)',
+                'GET /api/todos/export': 'ส่งออกทุกรายการเป็น NDJSON (?summary=true ต่อท้ายด้วยจำนวนแถวและ rows/s)',
+                'POST /api/todos/import': 'นำเข้า NDJSON (upsert ตาม id ทีละ batch)',
+                'GET /api/todos/changes': 'ดึงเฉพาะรายการที่เปลี่ยนแปลง (?since=<sync token>&limit=)',
+                'GET /api/todos/stream': 'รับการเปลี่ยนแปลงแบบ real-time (Server-Sent Events)'
             }
         })
 
     @app.route('/api/todos', methods=['GET'])
     def get_todos():
-        """ดึงรายการ Todo ทั้งหมด"""
+        """ดึงรายการ Todo แบบแบ่งหน้า พร้อมกรองและเรียงลำดับ (?all=true เพื่อดึงทั้งหมด)"""
         try:
-            todos = Todo.query.order_by(Todo.created_at.desc()).all()
-            return jsonify({
+            # ถ้าข้อมูลไม่เปลี่ยนตั้งแต่ client ดึงครั้งก่อน ตอบ 304 โดยไม่ต้อง query รายการ
+            etag = data_version()
+            cached = not_modified(etag)
+            if cached:
+                return cached
+
+            params = parse_list_params(request.args)
+            fields = parse_fields(request.args.get('fields'))
+            stream_format = parse_stream_format(request.args.get('stream'))
+            list_all = stream_format or request.args.get('all', '').lower() == 'true'
+            cursor = None if list_all else request.args.get('cursor')
+            # SELECT เฉพาะคอลัมน์ที่ขอ (รวมคอลัมน์ที่ใช้เรียงเพื่อสร้าง cursor)
+            query = apply_list_filters(Todo.query, Todo, params, cursor).options(
+                *load_fields(Todo, fields, params['sort'])
+            )
+
+            if list_all:
+                column = getattr(Todo, params['sort'])
+                if params['direction'] == 'desc':
+                    query = query.order_by(column.desc(), Todo.id.desc())
+                else:
+                    query = query.order_by(column.asc(), Todo.id.asc())
+
+                # ?stream= ส่งทุกรายการแบบ chunked โดยไม่โหลดทั้งหมดไว้ในหน่วยความจำ
+                if stream_format:
+                    return with_etag(stream_response(query, Todo, stream_format, fields, 'ดึงข้อมูลสำเร็จ'), etag)
+
+                todos = query.all()
+                return with_etag(jsonify({
+                    'success': True,
+                    'data': [todo.to_json(fields) for todo in todos],
+                    'next_cursor': None,
+                    'message': 'ดึงข้อมูลสำเร็จ'
+                }), etag), 200
+
+            limit = parse_limit(request.args.get('limit'))
+            todos, next_cursor = paginate_keyset(
+                query, Todo, limit, cursor, params['sort'], params['direction']
+            )
+            return with_etag(jsonify({
                 'success': True,
-                'data': [todo.to_dict() for todo in todos],
+                'data': [todo.to_json(fields) for todo in todos],
+                'next_cursor': next_cursor,
                 'message': 'ดึงข้อมูลสำเร็จ'
+            }), etag), 200
+        except BadRequest as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'message': f'เกิดข้อผิดพลาด: {str(e)}'
+            }), 500
+
+    @app.route('/api/todos/search', methods=['GET'])
+    def search_todos_route():
+        """ค้นหา Todo จาก title และ description (full-text search)"""
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            offset = parse_offset(request.args.get('offset'))
+            fields = parse_fields(request.args.get('fields'))
+            todos, next_offset = search_todos(request.args.get('q'), limit, offset, fields)
+            return jsonify({
+                'success': True,
+                'data': [todo.to_json(fields) for todo in todos],
+                'next_offset': next_offset,
+                'message': f'พบ {len(todos)} รายการ'
             }), 200
+        except BadRequest as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'message': f'เกิดข้อผิดพลาด: {str(e)}'
+            }), 500
+
+    @app.route('/api/todos/export', methods=['GET'])
+    def export_todos():
+        """ส่งออกทุกรายการเป็น NDJSON (หนึ่งบรรทัดต่อหนึ่งรายการ) แบบ stream (?summary=true ต่อท้ายด้วยสถิติ)"""
+        try:
+            summary = request.args.get('summary', '').lower() == 'true'
+            return Response(stream_with_context(export_ndjson(summary)), headers={
+                'Content-Type': 'application/x-ndjson; charset=utf-8',
+                'Content-Disposition': 'attachment; filename=todos.ndjson'
+            })
         except Exception as e:
             return jsonify({
                 'success': False,
                 'message': f'เกิดข้อผิดพลาด: {str(e)}'
             }), 500
 
+    @app.route('/api/todos/import', methods=['POST'])
+    def import_todos():
+        """นำเข้า NDJSON (upsert ตาม id) โดยอ่าน request body แบบ stream และบันทึกทีละ batch"""
+        try:
+            result = import_ndjson(request.stream, validate_todo_data)
+            if result['imported']:
+                # จำนวนรายการอาจมากเกินกว่าจะส่ง event ทีละรายการ ให้ client ดึงข้อมูลใหม่แทน
+                publish_todo_event('resync', {})
+
+            if not result['imported'] and result['failed']:
+                status = 400
+            elif result['failed']:
+                status = 207
+            else:
+                status = 200
+
+            return jsonify({
+                'success': result['failed'] == 0,
+                'data': result,
+                'message': f"นำเข้าสำเร็จ {result['imported']} รายการ ({result['rows_per_second']} rows/s)"
+                           + (f", ไม่สำเร็จ {result['failed']} รายการ" if result['failed'] else '')
+            }), status
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': f'เกิดข้อผิดพลาด: {str(e)}'
+            }), 500
+
+    @app.route('/api/todos/changes', methods=['GET'])
+    def get_todo_changes():
+        """ดึงเฉพาะ Todo ที่ถูกสร้าง/แก้ไข/ลบ ตั้งแต่ sync token ที่ระบุ (delta sync)"""
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            changes = get_changes(request.args.get('since'), limit)
+            return jsonify({
+                'success': True,
+                'data': changes,
+                'message': 'ดึงข้อมูลการเปลี่ยนแปลงสำเร็จ'
+            }), 200
+        except SyncTokenExpired:
+            return jsonify({
+                'success': False,
+                'resync_required': True,
+                'message': 'sync token หมดอายุ กรุณาดึงข้อมูลใหม่ทั้งหมด'
+            }), 410
+        except BadRequest as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'message': f'เกิดข้อผิดพลาด: {str(e)}'
+            }), 500
+
+    @app.route('/api/todos/stream', methods=['GET'])
+    def stream_todos():
+        """ส่ง event created/updated/deleted แบบ real-time ผ่าน Server-Sent Events"""
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        heartbeat = app.config.get('SSE_HEARTBEAT_SECONDS', 15)
+        buffer_size = app.config.get('SSE_CLIENT_BUFFER', DEFAULT_CLIENT_BUFFER)
+        headers = {
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+
+        handoff = request.environ.get(SSE_HANDOFF_ENVIRON_KEY)
+        if handoff is not None:
+            # async_server.py: ส่งเฉพาะส่วนต้น แล้วให้ event loop ส่ง event ต่อโดยไม่จอง thread
+            handoff.subscription = broker.subscribe(last_event_id, buffer_size, notify=handoff.notify)
+            handoff.heartbeat = heartbeat
+            return Response('retry: 3000\n\n', mimetype='text/event-stream', headers=headers)
+
+        subscription = broker.subscribe(last_event_id, buffer_size)
+
+        def generate():
+            try:
+                yield 'retry: 3000\n\n'
+                while True:
+                    try:
+                        event = subscription.get(timeout=heartbeat)
+                    except queue.Empty:
+                        if subscription.overflowed:
+                            break
+                        yield ': keep-alive\n\n'
+                        continue
+
+                    yield format_sse(event)
+
+                    # client อ่านไม่ทัน: ส่งที่ค้างอยู่ให้หมดแล้วตัดการเชื่อมต่อ
+                    # client จะเชื่อมต่อใหม่พร้อม Last-Event-ID และรับส่วนที่เหลือจาก history
+                    if subscription.overflowed and subscription.queue.empty():
+                        break
+            finally:
+                broker.unsubscribe(subscription)
+
+        return Response(generate(), mimetype='text/event-stream', headers=headers)
+
     @app.route('/api/todos/<string:todo_id>', methods=['GET'])
     def get_todo(todo_id):
         """ดึงข้อมูล Todo ตาม ID"""
         try:
-            todo = Todo.query.get(todo_id)
-            if not todo:
+            fields = parse_fields(request.args.get('fields'))
+            # อ่านจากแคชในหน่วยความจำก่อน (ถูกล้างทุกครั้งที่มีการแก้ไข todo นี้)
+            todo = cached_todo(todo_id)
+            if todo is None:
                 return jsonify({
                     'success': False,
                     'message': 'ไม่พบงานที่ระบุ'
                 }), 404
+
+            etag = todo_json_etag(todo)
+            cached = not_modified(etag)
+            if cached:
+                return cached
             
-            return jsonify({
+            return with_etag(jsonify({
                 'success': True,
-                'data': todo.to_dict(),
+                'data': todo if fields is None else {field: todo[field] for field in fields},
                 'message': 'ดึงข้อมูลสำเร็จ'
-            }), 200
+            }), etag), 200
+        except BadRequest as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         except Exception as e:
             return jsonify({
                 'success': False,
@@ -76,35 +312,155 @@ def register_api_routes(app):
 
     @app.route('/api/todos', methods=['POST'])
     def create_todo():
-        """เพิ่ม Todo ใหม่"""
-        try:
+        """เพิ่ม Todo ใหม่ (ส่ง header Idempotency-Key เพื่อให้การส่งซ้ำได้ response เดิมโดยไม่สร้างรายการซ้ำ)"""
+        def new_todo_values():
             data = request.get_json()
             validate_todo_data(data)
-            
-            # ตรวจสอบว่า ID ซ้ำหรือไม่
-            if 'id' in data and Todo.query.get(data['id']):
-                return jsonify({
-                    'success': False,
-                    'message': 'ID นี้มีอยู่แล้ว'
-                }), 400
-            
-            # สร้าง Todo ใหม่
-            todo = Todo(
-                id=data.get('id', str(int(datetime.now().timestamp() * 1000))),
-                title=data['title'].strip(),
-                description=data.get('description', '').strip(),
-                is_completed=data.get('is_completed', False)
-            )
-            
-            db.session.add(todo)
-            db.session.commit()
-            
+            return {
+                'id': client_todo_id(data.get('id')),
+                'title': data['title'].strip(),
+                'description': data.get('description', '').strip(),
+                'is_completed': data.get('is_completed', False)
+            }
+
+        try:
+            key = idempotency_key()
+            if key is None:
+                # INSERT ... ON CONFLICT DO NOTHING: ตรวจ ID ซ้ำและบันทึกในคำสั่งเดียว
+                todo = run_write(insert_todo, new_todo_values())
+                if todo is not None:
+                    publish_todo_event('created', todo)
+                status, body = created_response(todo)
+                return jsonify(body), status
+
+            fingerprint = request_fingerprint()
+            with claim_key(key):
+                # ส่งซ้ำ: lookup เดียว ไม่เข้าเส้นทางการเขียน
+                record = lookup_response(key)
+                if record is not None:
+                    return replay_response(record, fingerprint)
+
+                todo, record, replayed = run_write(insert_todo_once, new_todo_values(), key, fingerprint, created_response)
+                remember_response(key, record)
+                if todo is not None:
+                    publish_todo_event('created', todo)
+                return replay_response(record, fingerprint, replayed)
+
+        except IdempotencyKeyInFlight:
+            return jsonify({
+                'success': False,
+                'message': 'request ที่ใช้ Idempotency-Key นี้ยังทำงานไม่เสร็จ'
+            }), 409
+        except BadRequest as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': f'เกิดข้อผิดพลาด: {str(e)}'
+            }), 500
+
+    @app.route('/api/todos/batch', methods=['POST'])
+    def create_todos_batch_route():
+        """เพิ่ม Todo หลายรายการใน transaction เดียว (mode: atomic หรือ partial)"""
+        try:
+            data = request.get_json()
+            if isinstance(data, list):
+                items, mode = data, 'atomic'
+            elif isinstance(data, dict):
+                items, mode = data.get('todos'), data.get('mode', 'atomic')
+            else:
+                raise BadRequest("ไม่มีข้อมูลที่ส่งมา")
+
+            results, rows = create_todos_batch(items, mode, validate_todo_data)
+            publish_todo_events('created', (Todo(**row).to_dict() for row in rows))
+
+            failed = sum(1 for result in results if not result['success'])
+            if not rows:
+                status = 400
+            elif failed:
+                status = 207
+            else:
+                status = 201
+
+            return jsonify({
+                'success': failed == 0,
+                'data': {
+                    'created': len(rows),
+                    'failed': failed,
+                    'results': results
+                },
+                'message': f'เพิ่มงานสำเร็จ {len(rows)} รายการ' + (f', ไม่สำเร็จ {failed} รายการ' if failed else '')
+            }), status
+
+        except BadRequest as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': f'เกิดข้อผิดพลาด: {str(e)}'
+            }), 500
+
+    @app.route('/api/todos/bulk', methods=['PATCH'])
+    def update_todos_bulk_route():
+        """เปลี่ยนสถานะหลาย Todo ด้วยคำสั่ง UPDATE เดียว (ระบุ ids หรือ filter)"""
+        try:
+            data = request.get_json()
+            if not isinstance(data, dict):
+                raise BadRequest("ไม่มีข้อมูลที่ส่งมา")
+
+            condition = bulk_condition(data)
+            rows = update_todos_bulk(condition, data.get('action', 'set'), data.get('set'))
+            publish_todo_events('updated', (Todo(**row).to_dict() for row in rows))
+
             return jsonify({
                 'success': True,
-                'data': todo.to_dict(),
-                'message': 'เพิ่มงานสำเร็จ'
-            }), 201
-            
+                'data': {
+                    'affected': len(rows),
+                    'ids': [row['id'] for row in rows]
+                },
+                'message': f'แก้ไขงานสำเร็จ {len(rows)} รายการ'
+            }), 200
+
+        except BadRequest as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': f'เกิดข้อผิดพลาด: {str(e)}'
+            }), 500
+
+    @app.route('/api/todos/bulk', methods=['DELETE'])
+    def delete_todos_bulk_route():
+        """ลบหลาย Todo ด้วยคำสั่ง DELETE เดียว (ระบุ ids หรือ filter)"""
+        try:
+            data = request.get_json()
+            if not isinstance(data, dict):
+                raise BadRequest("ไม่มีข้อมูลที่ส่งมา")
+
+            ids = delete_todos_bulk(bulk_condition(data))
+            publish_todo_events('deleted', ({'id': deleted_id} for deleted_id in ids))
+
+            return jsonify({
+                'success': True,
+                'data': {
+                    'affected': len(ids),
+                    'ids': ids
+                },
+                'message': f'ลบงานสำเร็จ {len(ids)} รายการ'
+            }), 200
+
         except BadRequest as e:
             return jsonify({
                 'success': False,
@@ -121,8 +477,7 @@ def register_api_routes(app):
     def update_todo(todo_id):
         """แก้ไข Todo"""
         try:
-            todo = Todo.query.get(todo_id)
-            if not todo:
+            if cached_todo(todo_id) is None:
                 return jsonify({
                     'success': False,
                     'message': 'ไม่พบงานที่ระบุ'
@@ -132,16 +487,23 @@ def register_api_routes(app):
             validate_todo_data(data)
             
             # อัปเดตข้อมูล
-            todo.title = data['title'].strip()
-            todo.description = data.get('description', '').strip()
-            todo.is_completed = data.get('is_completed', todo.is_completed)
-            todo.updated_at = datetime.utcnow()
-            
-            db.session.commit()
+            values = {
+                'title': data['title'].strip(),
+                'description': data.get('description', '').strip()
+            }
+            if 'is_completed' in data:
+                values['is_completed'] = data['is_completed']
+            todo = run_write(update_todo_fields, todo_id, values)
+            if todo is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'ไม่พบงานที่ระบุ'
+                }), 404
+            publish_todo_event('updated', todo)
             
             return jsonify({
                 'success': True,
-                'data': todo.to_dict(),
+                'data': todo,
                 'message': 'แก้ไขงานสำเร็จ'
             }), 200
             
@@ -161,24 +523,20 @@ def register_api_routes(app):
     def toggle_todo(todo_id):
         """เปลี่ยนสถานะงาน (เสร็จ/ไม่เสร็จ)"""
         try:
-            todo = Todo.query.get(todo_id)
-            if not todo:
+            # เปลี่ยนสถานะ
+            todo = run_write(toggle_todo_status, todo_id)
+            if todo is None:
                 return jsonify({
                     'success': False,
                     'message': 'ไม่พบงานที่ระบุ'
                 }), 404
+            publish_todo_event('updated', todo)
             
-            # เปลี่ยนสถานะ
-            todo.is_completed = not todo.is_completed
-            todo.updated_at = datetime.utcnow()
-            
-            db.session.commit()
-            
-            status_text = 'เสร็จแล้ว' if todo.is_completed else 'ยังไม่เสร็จ'
+            status_text = 'เสร็จแล้ว' if todo['is_completed'] else 'ยังไม่เสร็จ'
             
             return jsonify({
                 'success': True,
-                'data': todo.to_dict(),
+                'data': todo,
                 'message': f'เปลี่ยนสถานะเป็น "{status_text}" สำเร็จ'
             }), 200
             
@@ -193,15 +551,13 @@ def register_api_routes(app):
     def delete_todo(todo_id):
         """ลบ Todo"""
         try:
-            todo = Todo.query.get(todo_id)
-            if not todo:
+            if run_write(delete_todo_by_id, todo_id) is None:
                 return jsonify({
                     'success': False,
                     'message': 'ไม่พบงานที่ระบุ'
                 }), 404
             
-            db.session.delete(todo)
-            db.session.commit()
+            publish_todo_event('deleted', {'id': todo_id})
             
             return jsonify({
                 'success': True,
@@ -219,20 +575,16 @@ def register_api_routes(app):
     def get_stats():
         """ดึงสถิติ Todo"""
         try:
-            total = Todo.query.count()
-            completed = Todo.query.filter_by(is_completed=True).count()
-            pending = total - completed
-            
-            return jsonify({
+            etag = data_version()
+            cached = not_modified(etag)
+            if cached:
+                return cached
+
+            return with_etag(jsonify({
                 'success': True,
-                'data': {
-                    'total': total,
-                    'completed': completed,
-                    'pending': pending,
-                    'completion_rate': round((completed / total * 100) if total > 0 else 0, 2)
-                },
+                'data': read_stats(),
                 'message': 'ดึงสถิติสำเร็จ'
-            }), 200
+            }), etag), 200
             
         except Exception as e:
             return jsonify({
@@ -240,12 +592,21 @@ def register_api_routes(app):
                 'message': f'เกิดข้อผิดพลาด: {str(e)}'
             }), 500
 
+    @app.route('/api/todos/cache/stats', methods=['GET'])
+    def get_todo_cache_stats():
+        """สถิติของแคช todo รายการเดียว (hit / miss / eviction) ของ worker process ที่ตอบ request นี้"""
+        return jsonify({
+            'success': True,
+            'data': cache_stats(),
+            'message': 'ดึงสถิติแคชสำเร็จ'
+        }), 200
+
     @app.route('/api/todos/completed', methods=['DELETE'])
     def delete_completed_todos():
-        """ลบงานที่เสร็จแล้วทั้งหมด"""
+        """ลบงานที่เสร็จแล้วทั้งหมด (ย้ายไปเก็บถาวรใน archived_todo)"""
         try:
-            completed_todos = Todo.query.filter_by(is_completed=True).all()
-            count = len(completed_todos)
+            deleted_ids = archive_completed()
+            count = len(deleted_ids)
             
             if count == 0:
                 return jsonify({
@@ -253,10 +614,7 @@ def register_api_routes(app):
                     'message': 'ไม่มีงานที่เสร็จแล้วให้ลบ'
                 }), 200
             
-            for todo in completed_todos:
-                db.session.delete(todo)
-            
-            db.session.commit()
+            publish_todo_events('deleted', ({'id': deleted_id} for deleted_id in deleted_ids))
             
             return jsonify({
                 'success': True,
@@ -0,0 +1,374 @@
+# เซิร์ฟเวอร์ HTTP แบบ asyncio สำหรับ API: การเชื่อมต่อที่รอเฉย ๆ (keep-alive, SSE) ไม่จอง thread
+# ส่วนแอป Flask ทำงานใน thread pool ขนาดจำกัด รันด้วย: python async_server.py [host] [port]
+import asyncio
+import contextvars
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+from werkzeug.exceptions import ClientDisconnected, RequestEntityTooLarge
+from events import broker, format_sse, SSE_HANDOFF_ENVIRON_KEY
+
+DEFAULT_WORKER_THREADS = 16
+DEFAULT_KEEPALIVE_SECONDS = 75
+DEFAULT_MAX_BODY_SIZE = 64 * 1024 * 1024
+# เวลารอสูงสุดของการอ่าน body แต่ละครั้ง (ไม่ใช่ทั้ง body)
+DEFAULT_BODY_TIMEOUT_SECONDS = 30
+MAX_HEADER_SIZE = 64 * 1024
+READ_BUFFER_SIZE = 64 * 1024
+
+REASONS = {
+    400: 'Bad Request', 408: 'Request Timeout', 411: 'Length Required',
+    413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+}
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+class RequestBody(io.RawIOBase):
+    """wsgi.input ที่อ่าน body จาก socket ทีละส่วนเมื่อแอปอ่าน (แต่ละครั้งส่งไปทำใน event loop)"""
+
+    def __init__(self, loop, reader, length, chunked, max_size, body_timeout):
+        self.loop = loop
+        self.reader = reader
+        self.remaining = length
+        self.chunked = chunked
+        self.max_size = max_size
+        self.body_timeout = body_timeout
+        self.received = 0
+        self.finished = not chunked and not length
+        # จำนวน byte ที่เหลือของ chunk ปัจจุบัน (chunked)
+        self._chunk_left = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.finished:
+            return 0
+        future = asyncio.run_coroutine_threadsafe(self._read(len(buffer)), self.loop)
+        data = future.result()
+        buffer[:len(data)] = data
+        return len(data)
+
+    async def _read(self, size):
+        try:
+            return await asyncio.wait_for(self._read_chunk(size) if self.chunked else self._read_fixed(size),
+                                          self.body_timeout)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            raise ClientDisconnected()
+
+    async def _read_fixed(self, size):
+        data = await self.reader.read(min(size, self.remaining))
+        if not data:
+            raise ConnectionResetError()
+        self.remaining -= len(data)
+        self.finished = self.remaining == 0
+        return data
+
+    async def _read_chunk(self, size):
+        if self._chunk_left == 0:
+            size_line = await self.reader.readuntil(b'\r\n')
+            try:
+                self._chunk_left = int(size_line.split(b';', 1)[0], 16)
+            except ValueError:
+                raise ClientDisconnected()
+            if self._chunk_left == 0:
+                # ข้าม trailer จนถึงบรรทัดว่าง
+                while (await self.reader.readuntil(b'\r\n')) != b'\r\n':
+                    pass
+                self.finished = True
+                return b''
+            if self.received + self._chunk_left > self.max_size:
+                raise RequestEntityTooLarge()
+        data = await self.reader.read(min(size, self._chunk_left))
+        if not data:
+            raise ConnectionResetError()
+        self._chunk_left -= len(data)
+        self.received += len(data)
+        if self._chunk_left == 0:
+            await self.reader.readexactly(2)
+        return data
+
+class EventHandoff:
+    """route /api/todos/stream เก็บ subscription ไว้ที่นี่ แล้ว event loop รอ event แทนการจอง thread"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.wakeup = asyncio.Event()
+        self.subscription = None
+        self.heartbeat = None
+
+    def notify(self):
+        self.loop.call_soon_threadsafe(self.wakeup.set)
+
+class AsyncServer:
+    """รับการเชื่อมต่อด้วย asyncio แล้วส่งแต่ละ request ให้แอป WSGI ใน thread pool"""
+
+    def __init__(self, app, worker_threads=None, keepalive=None, max_body_size=None, body_timeout=None):
+        self.app = app
+        self.worker_threads = worker_threads or app.config.get('ASYNC_WORKER_THREADS', DEFAULT_WORKER_THREADS)
+        self.keepalive = keepalive or app.config.get('ASYNC_KEEPALIVE_SECONDS', DEFAULT_KEEPALIVE_SECONDS)
+        self.max_body_size = max_body_size or app.config.get('MAX_CONTENT_LENGTH') or DEFAULT_MAX_BODY_SIZE
+        self.body_timeout = body_timeout or app.config.get('ASYNC_BODY_TIMEOUT_SECONDS', DEFAULT_BODY_TIMEOUT_SECONDS)
+        self.executor = ThreadPoolExecutor(self.worker_threads, thread_name_prefix='api-worker')
+        self.host = None
+        self.port = None
+
+    async def serve(self, host='127.0.0.1', port=5000, ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_SIZE)
+        self.host, self.port = server.sockets[0].getsockname()[:2]
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+    def run(self, host='127.0.0.1', port=5000):
+        try:
+            asyncio.run(self.serve(host, port))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _in_thread(self, context, func, *args):
+        # ทุกขั้นของ request เดียวกันใช้ context เดียวกัน แม้จะทำงานต่างกัน thread
+        # (stream_with_context และ session ของ SQLAlchemy อ้างอิง context ของ request)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, context.run, func, *args)
+
+    async def handle_connection(self, reader, writer):
+        peer = writer.get_extra_info('peername') or ('', 0)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                # keepalive จำกัดเวลารอ request ถัดไป (header) เท่านั้น body มีเวลารอของตัวเองใน RequestBody
+                try:
+                    request = await asyncio.wait_for(self._read_head(reader, writer), self.keepalive)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except HTTPError as e:
+                    writer.write(f'HTTP/1.1 {e.status} {REASONS[e.status]}\r\n'
+                                 'Content-Length: 0\r\nConnection: close\r\n\r\n'.encode('latin-1'))
+                    break
+                if request is None:
+                    break
+
+                method, target, version, headers, length, chunked = request
+                keep_alive = self._keep_alive(version, headers)
+                body = RequestBody(loop, reader, length, chunked, self.max_body_size, self.body_timeout)
+                handoff = EventHandoff(loop)
+                environ = self._environ(method, target, version, headers, length, body, peer)
+                environ[SSE_HANDOFF_ENVIRON_KEY] = handoff
+                keep_alive = await self._serve_wsgi(environ, method, version, keep_alive, writer, handoff)
+                # body ที่แอปอ่านไม่หมดยังค้างอยู่ใน socket: ใช้การเชื่อมต่อนี้ต่อไม่ได้
+                if not keep_alive or not body.finished:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_head(self, reader, writer):
+        """อ่าน request line และ header คืน (method, target, version, headers, content length, chunked)"""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431)
+        except asyncio.IncompleteReadError as e:
+            if not e.partial:
+                return None
+            raise
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ', 2)
+        except ValueError:
+            raise HTTPError(400)
+        headers = []
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, sep, value = line.partition(':')
+            if not sep:
+                raise HTTPError(400)
+            headers.append((name.strip().lower(), value.strip()))
+
+        lengths = {value for name, value in headers if name == 'content-length'}
+        encodings = [value.lower() for name, value in headers if name == 'transfer-encoding']
+        # มีทั้ง Content-Length และ Transfer-Encoding (หรือ Content-Length หลายค่า): ตีความได้หลายแบบ ปฏิเสธไว้ก่อน
+        if encodings and lengths or len(lengths) > 1:
+            raise HTTPError(400)
+        chunked = False
+        length = 0
+        if encodings:
+            codings = [coding.strip() for value in encodings for coding in value.split(',')]
+            if codings != ['chunked']:
+                raise HTTPError(400)
+            chunked = True
+        elif lengths:
+            value = lengths.pop()
+            if not value.isascii() or not value.isdigit():
+                raise HTTPError(400)
+            length = int(value)
+            if length > self.max_body_size:
+                raise HTTPError(413)
+
+        if dict(headers).get('expect', '').lower() == '100-continue':
+            writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+        return method, target, version, headers, length, chunked
+
+    def _keep_alive(self, version, headers):
+        connection = dict(headers).get('connection', '').lower()
+        if version == 'HTTP/1.1':
+            return connection != 'close'
+        return connection == 'keep-alive'
+
+    def _environ(self, method, target, version, headers, length, body, peer):
+        path, _, query = target.partition('?')
+        host = dict(headers).get('host', f'{self.host}:{self.port}')
+        server_name, _, server_port = host.partition(':')
+        environ = {
+            'REQUEST_METHOD': method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': unquote(path, 'latin-1'),
+            'QUERY_STRING': query,
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': server_port or str(self.port),
+            'SERVER_PROTOCOL': version,
+            'REMOTE_ADDR': peer[0],
+            'REMOTE_PORT': str(peer[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BufferedReader(body, READ_BUFFER_SIZE),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        if body.chunked:
+            # ไม่รู้ความยาวล่วงหน้า: werkzeug อ่านจนกว่า wsgi.input จะหมด
+            environ['wsgi.input_terminated'] = True
+        else:
+            environ['CONTENT_LENGTH'] = str(length)
+        for name, value in headers:
+            if name == 'content-type':
+                environ['CONTENT_TYPE'] = value
+            elif name not in ('content-length', 'transfer-encoding'):
+                key = 'HTTP_' + name.upper().replace('-', '_')
+                environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+
+    def _start_wsgi(self, environ):
+        # เรียกแอปและอ่าน chunk แรก (generator บางตัวเรียก start_response เมื่อเริ่มวนเท่านั้น)
+        state = {}
+        written = []
+
+        def start_response(status, response_headers, exc_info=None):
+            state['status'] = status
+            state['headers'] = response_headers
+            return written.append
+
+        result = self.app(environ, start_response)
+        iterator = iter(result)
+        first = next(iterator, None)
+        return state['status'], state['headers'], written, result, iterator, first
+
+    async def _serve_wsgi(self, environ, method, version, keep_alive, writer, handoff):
+        context = contextvars.Context()
+        status, headers, written, result, iterator, first = await self._in_thread(context, self._start_wsgi, environ)
+        try:
+            if handoff.subscription is not None:
+                headers = [(name, value) for name, value in headers if name.lower() != 'content-length']
+                keep_alive = False
+                chunked = False
+            else:
+                names = {name.lower() for name, _ in headers}
+                chunked = 'content-length' not in names and version == 'HTTP/1.1'
+                if 'content-length' not in names and not chunked:
+                    keep_alive = False
+
+            head = [f'HTTP/1.1 {status}']
+            head += [f'{name}: {value}' for name, value in headers]
+            if chunked and method != 'HEAD':
+                head.append('Transfer-Encoding: chunked')
+            head.append('Connection: ' + ('keep-alive' if keep_alive else 'close'))
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+            if method == 'HEAD':
+                return keep_alive
+
+            chunk = b''.join(written) + (first or b'')
+            while True:
+                if chunk:
+                    writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk) if chunked else chunk)
+                    # รอให้ client รับข้อมูล (backpressure) ก่อนสร้าง chunk ถัดไป
+                    await writer.drain()
+                if first is None:
+                    break
+                chunk = await self._in_thread(context, next, iterator, None)
+                if chunk is None:
+                    break
+            if chunked:
+                writer.write(b'0\r\n\r\n')
+            await writer.drain()
+        finally:
+            close = getattr(result, 'close', None)
+            if close is not None:
+                await self._in_thread(context, close)
+
+        if handoff.subscription is not None:
+            await self._serve_events(handoff, writer)
+        return keep_alive
+
+    async def _serve_events(self, handoff, writer):
+        """ส่ง event ของ subscription ที่ route /api/todos/stream สมัครไว้ โดยรอ event ใน event loop"""
+        subscription = handoff.subscription
+        try:
+            while True:
+                events = []
+                while not subscription.queue.empty():
+                    events.append(subscription.queue.get_nowait())
+                if events:
+                    writer.write(''.join(format_sse(event) for event in events).encode('utf-8'))
+                    await writer.drain()
+                    # client อ่านไม่ทัน: ส่งที่ค้างอยู่ให้หมดแล้วตัดการเชื่อมต่อ (เหมือน route เดิม)
+                    if subscription.overflowed and subscription.queue.empty():
+                        break
+                    continue
+
+                handoff.wakeup.clear()
+                if not subscription.queue.empty():
+                    continue
+                try:
+                    await asyncio.wait_for(handoff.wakeup.wait(), handoff.heartbeat)
+                except asyncio.TimeoutError:
+                    if subscription.overflowed:
+                        break
+                    writer.write(b': keep-alive\n\n')
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            broker.unsubscribe(subscription)
+
+if __name__ == '__main__':
+    from factory import create_app, prepare_database
+    from maintenance import BackgroundPurger
+
+    # profile อ่านจาก APP_PROFILE (ค่าเริ่มต้น full)
+    app = create_app()
+    # สร้างตารางในฐานข้อมูลและเพิ่มข้อมูลตัวอย่างถ้ายังไม่มี
+    prepare_database(app)
+    # ลบ tombstone, งานที่เก็บถาวร และ Idempotency-Key ที่หมดอายุเป็นระยะ
+    BackgroundPurger(app).start()
+
+    host = sys.argv[1] if len(sys.argv) > 1 else '127.0.0.1'
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    print(f"🚀 เริ่มต้น Todo API Server (asyncio) ที่ http://{host}:{port}")
+    AsyncServer(app).run(host, port)
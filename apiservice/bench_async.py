@@ -0,0 +1,102 @@
+"""เปรียบเทียบ async_server.py กับเซิร์ฟเวอร์ WSGI แบบ thread ต่อการเชื่อมต่อ (werkzeug, แบบเดียวกับ app.run)
+
+เปิดการเชื่อมต่อ SSE ค้างไว้จำนวนหนึ่ง แล้ววัด latency ของ GET /api/todos จาก client พร้อมกันหลายราย
+รันด้วย: python bench_async.py [จำนวน SSE ที่เปิดค้าง] [จำนวน client] [request ต่อ client]
+ใช้ไฟล์ฐานข้อมูลชั่วคราว (ไม่แตะ todos.db)
+"""
+import asyncio
+import http.client
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+
+from werkzeug.serving import make_server
+from app import app
+from models import init_db
+from bulk import create_todos_batch
+from async_server import AsyncServer
+
+def seed(count=500):
+    with app.app_context():
+        init_db()
+        create_todos_batch([{'title': f'งาน {i}'} for i in range(count)], 'atomic', lambda item: True)
+
+def start_wsgi():
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_port
+
+def start_async():
+    server = AsyncServer(app)
+    ready = threading.Event()
+    threading.Thread(target=lambda: asyncio.run(server.serve('127.0.0.1', 0, ready)), daemon=True).start()
+    ready.wait()
+    return server, server.port
+
+def open_idle_streams(port, count):
+    sockets = []
+    for _ in range(count):
+        sock = socket.create_connection(('127.0.0.1', port))
+        sock.sendall(b'GET /api/todos/stream HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        sock.recv(4096)
+        sockets.append(sock)
+    return sockets
+
+def client(port, requests, latencies, errors):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    for _ in range(requests):
+        start = time.perf_counter()
+        try:
+            connection.request('GET', '/api/todos?limit=20')
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+def measure(label, port, idle, clients, requests):
+    before = threading.active_count()
+    streams = open_idle_streams(port, idle)
+    threads = threading.active_count() - before
+    latencies, errors = [], []
+    workers = [threading.Thread(target=client, args=(port, requests, latencies, errors)) for _ in range(clients)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f'{label:<22} {len(latencies) / elapsed:8.0f} req/s  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms'
+          f'  errors {len(errors):4d}  thread ที่ SSE ใช้ {threads}')
+    for sock in streams:
+        sock.close()
+    time.sleep(0.5)
+
+def main(idle, clients, requests):
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    seed()
+    print(f'SSE ค้าง {idle} การเชื่อมต่อ, {clients} client x {requests} request')
+    wsgi, wsgi_port = start_wsgi()
+    measure('WSGI (thread/conn)', wsgi_port, idle, clients, requests)
+    wsgi.shutdown()
+    _, async_port = start_async()
+    measure('asyncio + thread pool', async_port, idle, clients, requests)
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [200, 32, 50][len(args):]))
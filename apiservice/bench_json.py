@@ -0,0 +1,57 @@
+"""วัดเวลาแปลงรายการ Todo เป็น JSON เทียบกับรูปแบบเดิม (to_dict + jsonify)
+
+รันด้วย: python bench_json.py [จำนวนรายการ ...]   (ค่าเริ่มต้น 10000 และ 100000)
+ความเข้ากันได้ของผลลัพธ์กับรูปแบบเดิมตรวจใน test_json_provider.py
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from flask.json.provider import DefaultJSONProvider
+from app import app
+from models import Todo
+import json_provider
+from json_provider import FastJSONProvider
+
+def make_todos(count):
+    base = datetime(2024, 1, 1)
+    return [Todo(id=str(1700000000000 + i), title=f'งานที่ {i}', description='รายละเอียด ' * 5,
+                 is_completed=i % 3 == 0, created_at=base + timedelta(seconds=i, microseconds=i),
+                 updated_at=base + timedelta(seconds=i)) for i in range(count)]
+
+def legacy_body(provider, todos, fields=None):
+    """รูปแบบเดิม: to_dict (isoformat ทีละแถว) แล้วแปลงด้วย provider มาตรฐานของ Flask"""
+    return provider.dumps({'data': [todo.to_dict(fields) for todo in todos]}, separators=(',', ':'))
+
+def fast_body(provider, todos, fields=None):
+    return provider.dumps_bytes({'data': [todo.to_json(fields) for todo in todos]})
+
+def measure(label, func, count):
+    func()
+    start = time.perf_counter()
+    body = func()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<46} {elapsed * 1000:9.1f} ms  {len(body) / 1024:9.0f} KiB  {count / elapsed:12,.0f} todos/s')
+
+def main(counts):
+    legacy = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+    orjson = json_provider.orjson
+    json_provider.orjson = None
+    fallback = FastJSONProvider(app)
+    try:
+        for count in counts:
+            todos = make_todos(count)
+            print(f'--- {count:,} todos ---')
+            measure('เดิม: to_dict + json ของ Flask', lambda: legacy_body(legacy, todos), count)
+            measure('ใหม่: to_json + json (ไม่มี orjson)', lambda: fast_body(fallback, todos), count)
+            if orjson is not None:
+                json_provider.orjson = orjson
+                measure('ใหม่: to_json + orjson', lambda: fast_body(fast, todos), count)
+                measure('ใหม่: to_json + orjson (fields=id,title,...)',
+                        lambda: fast_body(fast, todos, ('id', 'title', 'is_completed')), count)
+                json_provider.orjson = None
+    finally:
+        json_provider.orjson = orjson
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000])
@@ -0,0 +1,84 @@
+"""วัด throughput ของการอ่าน/เขียนพร้อมกันบน SQLite ในแต่ละ storage profile
+
+รันด้วย: python bench_sqlite.py [วินาทีต่อ profile] [จำนวน writer] [จำนวน reader]
+แต่ละ profile ใช้ไฟล์ฐานข้อมูลใหม่ในโฟลเดอร์ชั่วคราว (ไม่แตะ todos.db)
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+from models import db, Todo, init_db
+from ids import new_todo_id
+from pagination import paginate_keyset
+from stats import read_stats
+from storage import init_storage, STORAGE_PROFILES
+
+SEED_ROWS = 2000
+
+def make_app(path, profile):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if profile == 'default':
+        # ค่าเดิมก่อนมี storage profile (rollback journal, ไม่ตั้ง PRAGMA)
+        db.init_app(app)
+    else:
+        app.config['SQLITE_PROFILE'] = profile
+        init_storage(app, db)
+    with app.app_context():
+        init_db()
+        db.session.bulk_save_objects([Todo(id=new_todo_id(), title=f'seed {i}') for i in range(SEED_ROWS)])
+        db.session.commit()
+    return app
+
+def worker(app, action, stop, counters, key):
+    with app.app_context():
+        while not stop.is_set():
+            try:
+                action()
+                counters[key] += 1
+            except OperationalError:
+                db.session.rollback()
+                counters['errors'] += 1
+            finally:
+                db.session.remove()
+
+def write_one():
+    db.session.add(Todo(id=new_todo_id(), title='bench', description='x' * 100))
+    db.session.commit()
+
+def read_one():
+    paginate_keyset(Todo.query, Todo, 50)
+    read_stats()
+
+def run(profile, seconds, writers, readers):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'), profile)
+        counters = {'writes': 0, 'reads': 0, 'errors': 0}
+        stop = threading.Event()
+        threads = [threading.Thread(target=worker, args=(app, write_one, stop, counters, 'writes'))
+                   for _ in range(writers)]
+        threads += [threading.Thread(target=worker, args=(app, read_one, stop, counters, 'reads'))
+                    for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        with app.app_context():
+            db.engine.dispose()
+        print(f"{profile:<8} {counters['writes'] / seconds:10.0f} writes/s {counters['reads'] / seconds:10.0f} reads/s"
+              f" {counters['errors']:6d} locked errors")
+
+def main(seconds, writers, readers):
+    print(f'{writers} writer, {readers} reader, {seconds}s ต่อ profile')
+    for profile in ['default', *STORAGE_PROFILES]:
+        run(profile, seconds, writers, readers)
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [5, 4, 8][len(args):]))
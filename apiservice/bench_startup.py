@@ -0,0 +1,62 @@
+"""วัดเวลาเริ่มต้น (cold start) และหน่วยความจำของ worker หนึ่งตัวแยกตาม profile ของ factory.create_app
+
+แต่ละรอบเริ่ม Python process ใหม่ที่ import factory สร้าง app และตอบ request แรกหนึ่งครั้ง
+แล้ววัดเวลาและ RSS ของ process นั้น
+รันด้วย: python bench_startup.py [จำนวนรอบต่อ profile]
+ใช้ไฟล์ฐานข้อมูลชั่วคราว (ไม่แตะ todos.db)
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from factory import create_app
+app = create_app(sys.argv[1])
+created = time.perf_counter()
+app.test_client().get('/api/todos?limit=20').close()
+first = time.perf_counter()
+rss = 0
+with open('/proc/self/status') as status:
+    for line in status:
+        if line.startswith('VmRSS:'):
+            rss = int(line.split()[1])
+print(json.dumps({
+    'create_ms': (created - start) * 1000,
+    'first_ms': (first - start) * 1000,
+    'rss_mib': rss / 1024,
+    'modules': len(sys.modules),
+    'web_loaded': 'web_routes' in sys.modules or 'templates' in sys.modules,
+}))
+"""
+
+def seed():
+    from factory import create_app, prepare_database
+    prepare_database(create_app('api'))
+
+def probe(profile):
+    here = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run([sys.executable, '-c', PROBE, profile], cwd=here,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(rounds):
+    seed()
+    print(f'{rounds} รอบต่อ profile (ค่า median)')
+    for profile in ('api', 'full'):
+        samples = [probe(profile) for _ in range(rounds)]
+        median = {key: statistics.median(sample[key] for sample in samples)
+                  for key in ('create_ms', 'first_ms', 'rss_mib', 'modules')}
+        print(f"{profile:<5} create_app {median['create_ms']:7.1f} ms  request แรก {median['first_ms']:7.1f} ms"
+              f"  RSS {median['rss_mib']:6.1f} MiB  modules {median['modules']:5.0f}"
+              f"  โหลดหน้าเว็บ {'ใช่' if samples[0]['web_loaded'] else 'ไม่'}")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
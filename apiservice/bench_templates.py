@@ -0,0 +1,39 @@
+"""วัดเวลา render template ต่อ request ก่อนและหลังใช้ template ที่ compile ไว้แล้ว
+
+รันด้วย: python bench_templates.py [จำนวนรอบ]
+"""
+import sys
+import time
+from flask import render_template_string, render_template
+from app import app
+from templates import HOME_TEMPLATE, API_INFO_TEMPLATE
+
+def measure(label, func, rounds):
+    func()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<45} {elapsed / rounds * 1e6:10.1f} µs/request')
+
+def main(rounds):
+    stats = {'total': 0, 'completed': 0, 'pending': 0, 'completion_rate': 0}
+    client = app.test_client()
+
+    with app.test_request_context('/'):
+        print('--- HOME_TEMPLATE (ไม่มีแถวข้อมูล วัดเฉพาะต้นทุนของ template) ---')
+        measure('render_template_string (compile ทุกครั้ง)',
+                lambda: render_template_string(HOME_TEMPLATE, page=None, stats=stats), rounds)
+        measure('render_template (compile ครั้งเดียว)',
+                lambda: render_template('home.html', page=None, stats=stats), rounds)
+
+        print('--- API_INFO_TEMPLATE ---')
+        measure('render_template_string (compile ทุกครั้ง)',
+                lambda: render_template_string(API_INFO_TEMPLATE), rounds)
+        measure('render_template (compile ครั้งเดียว)',
+                lambda: render_template('api_info.html'), rounds)
+
+    measure('GET /api-docs (เก็บผลตาม host)', lambda: client.get('/api-docs'), rounds)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
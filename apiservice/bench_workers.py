@@ -0,0 +1,99 @@
+"""วัด throughput ของ serve.py เมื่อเพิ่มจำนวน worker process
+
+เริ่ม serve.py เป็น process แยกด้วยจำนวน worker ต่าง ๆ แล้วยิง GET /api/todos จาก client หลาย process
+พร้อมกันเป็นเวลาที่กำหนด (client เป็น process แยกเพื่อไม่ให้ติด GIL ฝั่งผู้วัด)
+รันด้วย: python bench_workers.py [วินาทีต่อรอบ] [จำนวน client] [จำนวน worker ...]
+ใช้ไฟล์ฐานข้อมูลชั่วคราว (ไม่แตะ todos.db) ผลจะขยายตามจำนวน worker ได้ไม่เกินจำนวน CPU ของเครื่อง
+"""
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+
+PORT = 5099
+PATH = '/api/todos?limit=20'
+
+def seed(count=500):
+    from app import app
+    from models import init_db
+    from bulk import create_todos_batch
+
+    with app.app_context():
+        init_db()
+        create_todos_batch([{'title': f'งาน {i}'} for i in range(count)], 'atomic', lambda item: True)
+
+def start_server(workers):
+    here = os.path.dirname(os.path.abspath(__file__))
+    server = subprocess.Popen(
+        [sys.executable, 'serve.py', '--workers', str(workers), '--bind', f'127.0.0.1:{PORT}', '--max-requests', '0'],
+        cwd=here, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', PORT), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError('serve.py ไม่เริ่มทำงาน')
+
+def client(duration, results):
+    connection = http.client.HTTPConnection('127.0.0.1', PORT, timeout=30)
+    done = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            connection.request('GET', PATH)
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                done += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', PORT, timeout=30)
+    connection.close()
+    results.put((done, errors))
+
+def measure(workers, duration, clients):
+    server = start_server(workers)
+    try:
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=client, args=(duration, results)) for _ in range(clients)]
+        for process in processes:
+            process.start()
+        totals = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(60)
+    done = sum(count for count, _ in totals)
+    errors = sum(count for _, count in totals)
+    return done / duration, errors
+
+def main(duration, clients, worker_counts):
+    seed()
+    print(f'CPU {os.cpu_count()}, {clients} client, {duration} วินาทีต่อรอบ, GET {PATH}')
+    baseline = None
+    for workers in worker_counts:
+        rate, errors = measure(workers, duration, clients)
+        baseline = baseline or rate
+        print(f'{workers:3d} workers  {rate:8.0f} req/s  x{rate / baseline:4.2f}  errors {errors}')
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    duration = args[0] if len(args) > 0 else 5
+    clients = args[1] if len(args) > 1 else 8
+    main(duration, clients, args[2:] or [1, 2, 4])
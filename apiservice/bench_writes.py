@@ -0,0 +1,62 @@
+"""วัด throughput ของการเขียนพร้อมกัน เทียบ commit ทีละ request กับ group commit ขนาด batch ต่าง ๆ
+
+รันด้วย: python bench_writes.py [จำนวน thread] [จำนวนงานต่อ thread] [storage profile]
+ใช้ไฟล์ฐานข้อมูลใหม่ในโฟลเดอร์ชั่วคราว (ไม่แตะ todos.db)
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from flask import Flask
+from models import db, init_db
+from ids import new_todo_id
+from mutations import insert_todo
+from storage import init_storage
+from writes import init_writes, run_write
+
+def make_app(path, profile, batch_size):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLITE_PROFILE'] = profile
+    app.config['WRITE_COORDINATOR'] = batch_size is not None
+    app.config['WRITE_BATCH_MAX_SIZE'] = batch_size or 1
+    init_storage(app, db)
+    init_writes(app)
+    with app.app_context():
+        init_db()
+    return app
+
+def run(label, profile, batch_size, threads, per_thread):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'), profile, batch_size)
+
+        def worker():
+            with app.app_context():
+                for _ in range(per_thread):
+                    run_write(insert_todo, {'id': new_todo_id(), 'title': 'bench', 'description': 'x' * 100})
+                db.session.remove()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        with app.app_context():
+            db.engine.dispose()
+        print(f'{label:<28} {threads * per_thread / elapsed:10.0f} writes/s')
+
+def main(threads, per_thread, profile):
+    print(f'{threads} thread x {per_thread} งาน, profile={profile}')
+    run('commit ทีละ request', profile, None, threads, per_thread)
+    for batch_size in (1, 8, 32, 64):
+        run(f'group commit batch<={batch_size}', profile, batch_size, threads, per_thread)
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 32,
+         int(args[1]) if len(args) > 1 else 50,
+         args[2] if len(args) > 2 else 'durable')
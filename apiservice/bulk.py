@@ -0,0 +1,161 @@
+from datetime import datetime
+from sqlalchemy import insert
+from werkzeug.exceptions import BadRequest
+from models import db, Todo
+from id_layout import client_todo_id
+
+# จำนวนรายการสูงสุดต่อหนึ่ง batch และขนาดกลุ่มของ id ต่อหนึ่งคำสั่ง IN (...)
+MAX_BATCH_SIZE = 5000
+ID_CHUNK_SIZE = 500
+
+BATCH_MODES = ('atomic', 'partial')
+
+def existing_ids(ids):
+    """ตรวจว่า id ใดมีอยู่ในฐานข้อมูลแล้ว (query แบบ set ครั้งละหลาย id)"""
+    found = set()
+    ids = list(ids)
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        chunk = ids[start:start + ID_CHUNK_SIZE]
+        found.update(db.session.execute(
+            db.select(Todo.id).where(Todo.id.in_(chunk))
+        ).scalars())
+    return found
+
+def create_todos_batch(items, mode, validate):
+    """เพิ่ม Todo หลายรายการใน transaction เดียว
+
+    mode = 'atomic'  ถ้ามีรายการใดไม่ผ่าน จะไม่บันทึกเลย
+    mode = 'partial' บันทึกเฉพาะรายการที่ผ่าน และรายงานผลแยกรายการ
+    คืนค่า (results, rows ที่บันทึกแล้ว)
+    """
+    if mode not in BATCH_MODES:
+        raise BadRequest(f"mode ต้องเป็น {' หรือ '.join(BATCH_MODES)}")
+    if not isinstance(items, list) or not items:
+        raise BadRequest("ต้องส่งรายการ todos เป็น array ที่ไม่ว่าง")
+    if len(items) > MAX_BATCH_SIZE:
+        raise BadRequest(f"เพิ่มได้สูงสุด {MAX_BATCH_SIZE} รายการต่อครั้ง")
+
+    now = datetime.utcnow()
+    results = []
+    rows = []
+    seen = set()
+
+    # ตรวจสอบข้อมูลทีละรายการ (ยังไม่แตะฐานข้อมูล)
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise BadRequest("รายการต้องเป็น object")
+            if not isinstance(item.get('title', ''), str):
+                raise BadRequest("ชื่องานต้องเป็นข้อความ")
+            validate(item)
+            if not isinstance(item.get('description') or '', str):
+                raise BadRequest("รายละเอียดต้องเป็นข้อความ")
+            # bool("false") เป็น True: รับเฉพาะ boolean ของ JSON
+            if not isinstance(item.get('is_completed', False), bool):
+                raise BadRequest("is_completed ต้องเป็น true หรือ false")
+            todo_id = client_todo_id(item.get('id'))
+            if todo_id in seen:
+                raise BadRequest("ID ซ้ำกันภายใน batch")
+            seen.add(todo_id)
+        except BadRequest as e:
+            results.append({'index': index, 'id': item.get('id') if isinstance(item, dict) else None,
+                            'success': False, 'message': e.description})
+            continue
+
+        rows.append({
+            'id': todo_id,
+            'title': item['title'].strip(),
+            'description': (item.get('description') or '').strip(),
+            'is_completed': item.get('is_completed', False),
+            'created_at': now,
+            'updated_at': now
+        })
+        results.append({'index': index, 'id': todo_id, 'success': True, 'message': 'เพิ่มงานสำเร็จ'})
+
+    # ตรวจ id ที่มีอยู่แล้วด้วย query เดียว (แบ่งเป็นกลุ่มถ้ามีจำนวนมาก)
+    duplicates = existing_ids(row['id'] for row in rows)
+    if duplicates:
+        rows = [row for row in rows if row['id'] not in duplicates]
+        for result in results:
+            if result['success'] and result['id'] in duplicates:
+                result['success'] = False
+                result['message'] = 'ID นี้มีอยู่แล้ว'
+
+    failed = any(not result['success'] for result in results)
+    if mode == 'atomic' and failed:
+        for result in results:
+            if result['success']:
+                result['success'] = False
+                result['message'] = 'ไม่ได้บันทึกเพราะมีรายการอื่นไม่ผ่าน (atomic)'
+        return results, []
+
+    # บันทึกทั้งหมดด้วย executemany และ commit ครั้งเดียว
+    if rows:
+        db.session.execute(insert(Todo), rows)
+        db.session.commit()
+    return results, rows
+
+def bulk_condition(data):
+    """สร้างเงื่อนไข WHERE จาก {"ids": [...]} และ/หรือ {"filter": {"is_completed": bool}}
+
+    ต้องระบุอย่างน้อยหนึ่งอย่างเสมอ เพื่อป้องกันการแก้ไขทั้งตารางโดยไม่ตั้งใจ
+    """
+    table = Todo.__table__
+    conditions = []
+
+    ids = data.get('ids')
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            raise BadRequest("ids ต้องเป็น array ที่ไม่ว่าง")
+        if len(ids) > MAX_BATCH_SIZE:
+            raise BadRequest(f"ระบุ ids ได้สูงสุด {MAX_BATCH_SIZE} รายการต่อครั้ง")
+        conditions.append(table.c.id.in_([str(todo_id) for todo_id in ids]))
+
+    filters = data.get('filter')
+    if filters is not None:
+        if not isinstance(filters, dict) or not filters:
+            raise BadRequest("filter ต้องเป็น object ที่ไม่ว่าง")
+        unknown = set(filters) - {'is_completed'}
+        if unknown:
+            raise BadRequest(f"ไม่รองรับ filter: {', '.join(sorted(unknown))}")
+        if not isinstance(filters['is_completed'], bool):
+            raise BadRequest("filter.is_completed ต้องเป็น true หรือ false")
+        conditions.append(table.c.is_completed == filters['is_completed'])
+
+    if not conditions:
+        raise BadRequest("ต้องระบุ ids หรือ filter")
+    return db.and_(*conditions)
+
+def update_todos_bulk(condition, action, values=None):
+    """แก้ไขหลายรายการด้วย UPDATE คำสั่งเดียวใน transaction เดียว
+
+    action = 'toggle' สลับสถานะ is_completed
+    action = 'set'    กำหนด is_completed ตาม values
+    คืนค่ารายการแถวที่ถูกแก้ไข (ได้จาก RETURNING ไม่ต้อง SELECT ซ้ำ)
+    """
+    table = Todo.__table__
+    if action == 'toggle':
+        new_values = {'is_completed': ~db.func.coalesce(table.c.is_completed, False)}
+    elif action == 'set':
+        if not isinstance(values, dict) or set(values) != {'is_completed'} \
+                or not isinstance(values['is_completed'], bool):
+            raise BadRequest('set ต้องอยู่ในรูป {"is_completed": true | false}')
+        new_values = {'is_completed': values['is_completed']}
+    else:
+        raise BadRequest("action ต้องเป็น toggle หรือ set")
+
+    new_values['updated_at'] = datetime.utcnow()
+    rows = db.session.execute(
+        table.update().where(condition).values(**new_values).returning(*table.c)
+    ).mappings().all()
+    db.session.commit()
+    return rows
+
+def delete_todos_bulk(condition):
+    """ลบหลายรายการด้วย DELETE คำสั่งเดียวใน transaction เดียว คืนค่า id ที่ถูกลบ"""
+    table = Todo.__table__
+    ids = db.session.execute(
+        table.delete().where(condition).returning(table.c.id)
+    ).scalars().all()
+    db.session.commit()
+    return ids
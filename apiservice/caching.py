@@ -0,0 +1,46 @@
+from flask import request, make_response
+from models import db, Todo, DataVersion
+
+def data_version():
+    """อ่านเวอร์ชันของข้อมูลทั้งตาราง todo (อ่านแถวเดียวด้วย primary key)"""
+    row = db.session.execute(
+        db.select(DataVersion.epoch, DataVersion.generation).where(DataVersion.id == 1)
+    ).first()
+    if row is None:
+        return None
+    return f'{row.epoch}-{row.generation}'
+
+def todo_version(todo_id):
+    """อ่านเวอร์ชันของ todo หนึ่งรายการจาก updated_at (คืน None ถ้าไม่พบ)"""
+    row = db.session.execute(
+        db.select(Todo.updated_at).where(Todo.id == todo_id)
+    ).first()
+    if row is None:
+        return None
+    return _updated_at_etag(row.updated_at)
+
+def todo_etag(todo):
+    """สร้าง ETag จาก todo ที่โหลดมาแล้ว (ค่าเดียวกับ todo_version)"""
+    return _updated_at_etag(todo.updated_at)
+
+def todo_json_etag(todo):
+    """ETag จาก dict ของ todo (Todo.to_json เช่นที่เก็บใน todo_cache)"""
+    return _updated_at_etag(todo['updated_at'])
+
+def _updated_at_etag(updated_at):
+    # ETag ผูกกับ URL ของ todo อยู่แล้ว จึงใช้เพียงเวลาที่แก้ไขล่าสุด
+    return updated_at.strftime('%Y%m%d%H%M%S%f') if updated_at else '0'
+
+def not_modified(etag):
+    """ถ้า If-None-Match ของ client ตรงกับ ETag คืน response 304 ทันที ไม่เช่นนั้นคืน None"""
+    if etag is not None and request.if_none_match.contains(etag):
+        response = make_response('', 304)
+        return with_etag(response, etag)
+    return None
+
+def with_etag(response, etag):
+    """ใส่ ETag และบังคับให้ client ตรวจสอบกับ server ก่อนใช้ข้อมูลที่เก็บไว้"""
+    if etag is not None:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,77 @@
+import click
+from models import db, init_db, rebuild_search_index
+from sync import compact_tombstones
+from stats import check_counters
+from query_plans import run_plan_checks
+from id_layout import migrate_todo_ids
+from maintenance import purge_archived, DEFAULT_ARCHIVE_RETENTION_DAYS, DEFAULT_PURGE_CHUNK_SIZE
+
+def register_commands(app):
+    """ลงทะเบียนคำสั่ง CLI (เรียกใช้ผ่าน flask --app app <command>)"""
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """สร้างตาราง index และ trigger ที่ยังไม่มี"""
+        init_db()
+        click.echo('✅ เตรียมฐานข้อมูลเรียบร้อย')
+
+    @app.cli.command('compact-tombstones')
+    @click.option('--retention-days', type=int, default=None,
+                  help='ลบ tombstone ที่เก่ากว่าจำนวนวันนี้ (ค่าเริ่มต้นตาม TOMBSTONE_RETENTION_DAYS)')
+    def compact_tombstones_command(retention_days):
+        """บีบอัดตาราง tombstone ของ delta sync"""
+        result = compact_tombstones(retention_days)
+        click.echo(f"🧹 ลบ tombstone หมดอายุ {result['expired']} รายการ, "
+                   f"id ที่ถูกสร้างใหม่ {result['recreated']} รายการ, "
+                   f"รายการซ้ำ {result['duplicates']} รายการ")
+
+    @app.cli.command('purge-archive')
+    @click.option('--retention-days', type=int, default=None,
+                  help='ลบงานที่เก็บถาวรเก่ากว่าจำนวนวันนี้ (ค่าเริ่มต้นตาม ARCHIVE_RETENTION_DAYS)')
+    def purge_archive_command(retention_days):
+        """ลบงานที่เก็บถาวรเกินระยะเวลาที่กำหนด (ทีละกลุ่ม)"""
+        if retention_days is None:
+            retention_days = app.config.get('ARCHIVE_RETENTION_DAYS', DEFAULT_ARCHIVE_RETENTION_DAYS)
+        purged = purge_archived(retention_days, app.config.get('ARCHIVE_PURGE_CHUNK_SIZE', DEFAULT_PURGE_CHUNK_SIZE))
+        click.echo(f'🧹 ลบงานที่เก็บถาวร {purged} รายการ')
+
+    @app.cli.command('check-stats')
+    @click.option('--repair', is_flag=True, help='สร้างตัวนับใหม่จากข้อมูลจริงถ้าไม่ตรงกัน')
+    def check_stats_command(repair):
+        """ตรวจความถูกต้องของตัวนับสถิติเทียบกับข้อมูลจริง"""
+        result = check_counters(repair)
+        if result['consistent']:
+            click.echo(f"✅ ตัวนับถูกต้อง: {result['actual']}")
+            return
+        click.echo(f"⚠️ ตัวนับไม่ตรง: เก็บไว้ {result['stored']} แต่ข้อมูลจริง {result['actual']}")
+        if repair:
+            click.echo('🔧 สร้างตัวนับใหม่เรียบร้อย')
+        else:
+            raise SystemExit(1)
+
+    @app.cli.command('rebuild-search')
+    def rebuild_search_command():
+        """สร้าง index การค้นหา (todo_fts) ใหม่จากข้อมูลทั้งหมด"""
+        rebuild_search_index()
+        db.session.commit()
+        click.echo('🔎 สร้าง index การค้นหาใหม่เรียบร้อย')
+
+    @app.cli.command('check-query-plans')
+    def check_query_plans_command():
+        """ตรวจ EXPLAIN QUERY PLAN ของ GET /api/todos ว่าใช้ index โดยไม่ต้องเรียงลำดับเพิ่ม"""
+        # สร้าง index ที่ยังขาดก่อน เพื่อให้ผลตรงกับ schema ที่แอปใช้จริง
+        init_db()
+        failed = run_plan_checks(click.echo)
+        if failed:
+            click.echo(f'⚠️ มี {failed} query ที่ไม่ได้ใช้ index ตามที่ควร')
+            raise SystemExit(1)
+
+    @app.cli.command('migrate-todo-ids')
+    def migrate_todo_ids_command():
+        """ย้ายตาราง todo ไปเก็บ id แบบ INTEGER PRIMARY KEY (id เดิมที่ไม่ใช่ตัวเลขยังใช้ผ่าน alias ได้)"""
+        result = migrate_todo_ids()
+        if not result['migrated']:
+            click.echo(f"✅ ตาราง todo เก็บ id แบบ INTEGER อยู่แล้ว ({result['rows']} รายการ)")
+            return
+        click.echo(f"✅ ย้าย {result['rows']} รายการ, id ที่ไม่ใช่ตัวเลขได้ id ใหม่ {result['aliased']} รายการ "
+                   f"(รีสตาร์ตเซิร์ฟเวอร์ที่รันอยู่เพื่อใช้ layout ใหม่)")
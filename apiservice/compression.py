@@ -0,0 +1,256 @@
+import threading
+import zlib
+from collections import OrderedDict
+from flask import request
+from werkzeug.http import parse_etags, quote_etag
+
+# brotli และ zstandard เป็น dependency เสริม ถ้าไม่ได้ติดตั้งจะใช้เฉพาะ gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ค่าเริ่มต้นของการบีบอัด
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_CACHE_SIZE = 128
+# ระหว่าง stream จะ flush ข้อมูลที่บีบอัดแล้วออกไปทุกครั้งที่รับข้อมูลครบเท่านี้
+DEFAULT_STREAM_FLUSH_SIZE = 16 * 1024
+
+# ETag ของ body ที่บีบอัดแล้วคือ ETag เดิมต่อท้ายด้วย encoding ('"<tag>-gzip"') เพราะเป็นคนละ representation
+ENCODING_NAMES = ('gzip', 'br', 'zstd')
+# ETag แบบมี encoding ที่ client ส่งมาใน If-None-Match (ตาม ETag เดิม) ใช้ตอบกลับใน 304
+ENCODED_ETAGS_ENVIRON_KEY = 'compression.encoded_etags'
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/x-ndjson', 'text/html', 'text/plain',
+    'text/css', 'text/javascript', 'application/javascript',
+}
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compressor(self):
+        return _ZlibCompressor(zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS))
+
+class _ZlibCompressor:
+    def __init__(self, compressobj):
+        self._compressobj = compressobj
+
+    def compress(self, data):
+        return self._compressobj.compress(data)
+
+    def flush(self):
+        return self._compressobj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressobj.flush(zlib.Z_FINISH)
+
+class BrotliEncoder:
+    name = 'br'
+
+    def compressor(self):
+        return _BrotliCompressor(brotli.Compressor(quality=5))
+
+class _BrotliCompressor:
+    def __init__(self, compressor):
+        self._compressor = compressor
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+class ZstdEncoder:
+    name = 'zstd'
+
+    def compressor(self):
+        return _ZstdCompressor(zstandard.ZstdCompressor(level=3).compressobj())
+
+class _ZstdCompressor:
+    def __init__(self, compressobj):
+        self._compressobj = compressobj
+
+    def compress(self, data):
+        return self._compressobj.compress(data)
+
+    def flush(self):
+        return self._compressobj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressobj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+def available_encoders(gzip_level=DEFAULT_GZIP_LEVEL):
+    """encoder ที่ใช้ได้ เรียงตามลำดับที่ server ต้องการเมื่อ client ให้น้ำหนักเท่ากัน"""
+    encoders = []
+    if zstandard is not None:
+        encoders.append(ZstdEncoder())
+    if brotli is not None:
+        encoders.append(BrotliEncoder())
+    encoders.append(GzipEncoder(gzip_level))
+    return encoders
+
+def compress_bytes(encoder, data):
+    compressor = encoder.compressor()
+    return compressor.compress(data) + compressor.finish()
+
+def compress_stream(encoder, chunks, flush_size):
+    """บีบอัดทีละ chunk: flush chunk แรก (ให้ browser เริ่ม render ได้ทันที) และทุก ๆ flush_size bytes"""
+    compressor = encoder.compressor()
+    pending = None
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            output = compressor.compress(chunk)
+            pending = len(chunk) if pending is None else pending + len(chunk)
+            if pending >= flush_size or pending == len(chunk):
+                output += compressor.flush()
+                pending = 0
+            if output:
+                yield output
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+def split_encoding_etag(tag):
+    """แยก ETag ที่ต่อท้ายด้วย encoding คืน (ETag เดิม, encoding หรือ None)"""
+    base, _, name = tag.rpartition('-')
+    if base and name in ENCODING_NAMES:
+        return base, name
+    return tag, None
+
+def strip_if_none_match_encodings(environ, encoding):
+    """เตรียม If-None-Match ก่อน route เทียบกับ ETag ของข้อมูล (caching.not_modified)
+
+    If-None-Match เทียบแบบ weak: ตัด W/ ออกจากทุก tag แล้วตัด suffix ออกเฉพาะ encoding ที่ response นี้จะใช้
+    (client ที่ไม่รับ gzip ไม่ได้ 304 จาก ETag ของ body แบบ gzip ที่ตัวเองไม่มี)
+    """
+    header = environ.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return
+    etags = parse_etags(header)
+    if etags.star_tag:
+        return
+    encoded = {}
+    tags = []
+    for tag in etags.as_set(include_weak=True):
+        base, name = split_encoding_etag(tag)
+        if name is not None and name == encoding:
+            encoded[base] = tag
+            tag = base
+        tags.append(tag)
+    environ['HTTP_IF_NONE_MATCH'] = ', '.join(quote_etag(tag) for tag in tags)
+    if encoded:
+        environ[ENCODED_ETAGS_ENVIRON_KEY] = encoded
+
+def tag_encoding(response, name):
+    # ETag แบบ weak ใช้ร่วมกันระหว่าง encoding ได้ เปลี่ยนเฉพาะแบบ strong
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f'{etag}-{name}')
+
+class CompressedCache:
+    """เก็บ body ที่บีบอัดแล้วของ response ที่มี ETag แยกตาม (URL, ETag, encoding) แบบ LRU"""
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            body = self._items.get(key)
+            if body is not None:
+                self._items.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            self._items[key] = body
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+def init_compression(app):
+    """บีบอัด response ตาม Accept-Encoding ของ client (zstd / br / gzip)
+
+    - response ที่เล็กกว่า COMPRESS_MIN_SIZE ไม่ถูกบีบอัด (ไม่คุ้มกับ CPU และ header ที่เพิ่มขึ้น)
+    - response แบบ stream ถูกบีบอัดทีละ chunk โดยไม่ต้องรอให้ครบ
+    - response ที่มี ETag จะเก็บ body ที่บีบอัดแล้วไว้ใช้ซ้ำ ตราบใดที่ ETag ยังไม่เปลี่ยน
+    - body ที่บีบอัดแล้วได้ ETag ของตัวเอง ("<tag>-gzip") If-None-Match แบบนี้เทียบกับ ETag เดิมได้ตามปกติ
+      เมื่อ request นี้ได้ encoding เดียวกัน
+    - Server-Sent Events ไม่ถูกบีบอัด เพราะต้องส่งแต่ละ event ออกไปทันที
+    """
+    min_size = app.config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE)
+    flush_size = app.config.get('COMPRESS_STREAM_FLUSH_SIZE', DEFAULT_STREAM_FLUSH_SIZE)
+    encoders = {encoder.name: encoder
+                for encoder in available_encoders(app.config.get('COMPRESS_GZIP_LEVEL', DEFAULT_GZIP_LEVEL))}
+    cache = CompressedCache(app.config.get('COMPRESS_CACHE_SIZE', DEFAULT_CACHE_SIZE))
+    app.extensions['compression'] = cache
+
+    @app.before_request
+    def strip_etag_encodings():
+        strip_if_none_match_encodings(request.environ, request.accept_encodings.best_match(list(encoders)))
+
+    @app.after_request
+    def compress_response(response):
+        if response.status_code == 304:
+            # ตอบด้วย ETag ของ representation ที่ client มีอยู่ (ฉบับที่บีบอัดแล้ว ถ้าส่งมาแบบนั้น)
+            etag, weak = response.get_etag()
+            encoded = request.environ.get(ENCODED_ETAGS_ENVIRON_KEY)
+            if encoded and etag in encoded and not weak:
+                response.set_etag(encoded[etag])
+            return response
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+
+        name = request.accept_encodings.best_match(list(encoders))
+        if name is None:
+            return response
+        encoder = encoders[name]
+
+        if response.is_streamed:
+            response.response = compress_stream(encoder, response.response, flush_size)
+            response.headers.pop('Content-Length', None)
+            response.headers['Content-Encoding'] = name
+            tag_encoding(response, name)
+            return response
+
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+
+        etag, _ = response.get_etag()
+        key = (request.full_path, etag, name) if etag else None
+        compressed = cache.get(key) if key else None
+        if compressed is None:
+            compressed = compress_bytes(encoder, body)
+            if key:
+                cache.put(key, compressed)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = name
+        tag_encoding(response, name)
+        return response
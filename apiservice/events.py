@@ -0,0 +1,216 @@
+import json
+import queue
+import secrets
+import threading
+from collections import deque
+
+# จำนวน event ล่าสุดที่เก็บไว้ให้ client ต่อจาก Last-Event-ID และขนาด buffer ต่อ client
+DEFAULT_HISTORY_SIZE = 1000
+DEFAULT_CLIENT_BUFFER = 100
+# คีย์ใน environ ที่ async_server.py ใส่ไว้: route SSE ส่ง subscription ให้ event loop รอ event แทน thread
+SSE_HANDOFF_ENVIRON_KEY = 'todo.sse_handoff'
+# การเปลี่ยนแปลงครั้งเดียวที่กระทบมากกว่านี้ส่งเป็น resync เดียว (ต้องน้อยกว่า buffer ต่อ client)
+MAX_EVENTS_PER_CHANGE = 50
+
+class Subscription:
+    """ผู้รับ event หนึ่งราย (หนึ่งการเชื่อมต่อ SSE) พร้อม buffer ขนาดจำกัด"""
+
+    def __init__(self, buffer_size, notify=None):
+        self.queue = queue.Queue(maxsize=buffer_size)
+        # ถูกตั้งเป็น True เมื่อ client อ่านไม่ทันจน buffer เต็ม
+        self.overflowed = False
+        # เรียกทุกครั้งที่มี event ใหม่หรือ buffer เต็ม (ใช้ปลุกผู้รับที่ไม่ได้รอด้วย thread เช่น asyncio)
+        self.notify = notify
+
+    def offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.overflowed = True
+            return False
+        finally:
+            if self.notify is not None:
+                self.notify()
+
+    def get(self, timeout):
+        return self.queue.get(timeout=timeout)
+
+class EventBroker:
+    """กระจาย event การเปลี่ยนแปลงของ todo ไปยัง client ที่เชื่อมต่ออยู่ภายใน process"""
+
+    def __init__(self, history_size=DEFAULT_HISTORY_SIZE):
+        self._lock = threading.Lock()
+        # ค่าสุ่มประจำ process ใช้ตรวจว่า Last-Event-ID มาจาก process นี้หรือไม่
+        self._boot = secrets.token_hex(4)
+        self._next_seq = 1
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+        self._listeners = []
+        self._relay = None
+
+    def add_listener(self, listener):
+        """เรียก listener(event_type, data) ทุกครั้งที่ publish ก่อนส่งให้ผู้รับ (เช่นล้างแคชของ todo)"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def publish(self, event_type, data):
+        """ส่ง event ไปยังผู้รับทุกราย ผู้รับที่ buffer เต็มจะถูกตัดการเชื่อมต่อ
+
+        ถ้าต่อกับ process แม่ของ serve.py ไว้ (attach_relay) event จะได้ id จาก process แม่
+        และถูกส่งถึงผู้รับของทุก worker (รวม worker นี้) ผ่าน relay
+        """
+        with self._lock:
+            listeners = list(self._listeners)
+            relay = self._relay
+        for listener in listeners:
+            listener(event_type, data)
+
+        if relay is None or not relay.send(event_type, data):
+            self.assign(event_type, data)
+
+    def assign(self, event_type, data):
+        """กำหนด id ถัดไปของ process นี้ให้ event แล้วส่งให้ผู้รับ คืน event ที่ได้"""
+        with self._lock:
+            event = (f'{self._boot}-{self._next_seq}', event_type, data)
+            self._deliver(event)
+        return event
+
+    def deliver(self, event):
+        """ส่ง event ที่มี id แล้ว (จาก relay) ให้ผู้รับ event ที่เคยได้รับแล้วจะถูกข้าม"""
+        with self._lock:
+            self._deliver(event)
+
+    def _deliver(self, event):
+        seq = int(event[0].partition('-')[2])
+        if seq < self._next_seq:
+            return
+        self._next_seq = seq + 1
+        self._history.append(event)
+        # ส่งต่อภายใต้ lock เดียวกับที่กำหนด id: publisher หลายตัวพร้อมกัน ผู้รับก็ยังได้ event ตามลำดับ id
+        # (offer ไม่ block: buffer เต็มก็ตัดผู้รับนั้นทันที)
+        for subscription in list(self._subscribers):
+            if not subscription.offer(event):
+                self._subscribers.discard(subscription)
+
+    def attach_relay(self, sock):
+        """ส่ง event ผ่าน process แม่ของ serve.py ทาง sock (ดู EventRelay)"""
+        relay = EventRelay(self, sock)
+        with self._lock:
+            self._relay = relay
+        relay.start()
+        return relay
+
+    def detach_relay(self, relay):
+        with self._lock:
+            if self._relay is relay:
+                self._relay = None
+                # id ต่อจากนี้กำหนดเองใน process นี้: เปลี่ยน boot เพื่อไม่ให้ซ้ำกับ id ที่ process แม่กำหนด
+                self._boot = secrets.token_hex(4)
+
+    def subscribe(self, last_event_id=None, buffer_size=DEFAULT_CLIENT_BUFFER, notify=None):
+        """สมัครรับ event ใหม่ ถ้ามี Last-Event-ID จะส่ง event ที่พลาดไปให้ก่อน
+
+        ถ้า event ที่พลาดไปไม่อยู่ใน history แล้ว (หรือมาจาก process อื่น)
+        client จะได้รับ event "resync" เพื่อให้ดึงข้อมูลใหม่ผ่าน /api/todos/changes
+        """
+        subscription = Subscription(buffer_size, notify)
+        with self._lock:
+            if last_event_id:
+                missed = self._events_after(last_event_id)
+                if missed is None or len(missed) >= buffer_size:
+                    subscription.offer((f'{self._boot}-{self._next_seq - 1}', 'resync', {}))
+                else:
+                    for event in missed:
+                        subscription.offer(event)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def _events_after(self, last_event_id):
+        # คืน None ถ้าไม่สามารถต่อจาก last_event_id ได้
+        boot, _, seq = last_event_id.partition('-')
+        if boot != self._boot or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq >= self._next_seq:
+            return None
+        if self._history:
+            oldest = int(self._history[0][0].partition('-')[2])
+            if seq < oldest - 1:
+                return None
+        elif seq < self._next_seq - 1:
+            return None
+        return [event for event in self._history if int(event[0].partition('-')[2]) > seq]
+
+class EventRelay:
+    """ช่องทางระหว่าง broker ของ worker กับ process แม่ของ serve.py (หนึ่งบรรทัด JSON ต่อ event)
+
+    worker ส่ง [event_type, data] process แม่กำหนด id ตามลำดับเดียวสำหรับทุก worker
+    แล้วส่ง [id, event_type, data] กลับไปให้ทุก worker ผู้รับ SSE ของทุก worker จึงได้ event ครบ
+    และต่อจาก Last-Event-ID ได้ไม่ว่าการเชื่อมต่อใหม่จะไปตก worker ใด
+    """
+
+    def __init__(self, broker, sock):
+        self._broker = broker
+        self._sock = sock
+        self._send_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._receive, name='event-relay', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def send(self, event_type, data):
+        """ส่ง event ให้ process แม่ คืน False ถ้าส่งไม่ได้ (ผู้เรียกส่งเองภายใน process แทน)"""
+        line = json.dumps([event_type, data], ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+        try:
+            with self._send_lock:
+                self._sock.sendall(line)
+            return True
+        except OSError:
+            self._broker.detach_relay(self)
+            return False
+
+    def _receive(self):
+        try:
+            with self._sock.makefile('rb') as stream:
+                for line in stream:
+                    event_id, event_type, data = json.loads(line)
+                    self._broker.deliver((event_id, event_type, data))
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._broker.detach_relay(self)
+
+def format_sse(event):
+    """แปลง event เป็นข้อความตามรูปแบบ Server-Sent Events"""
+    event_id, event_type, data = event
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return f'id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n'
+
+# broker ของ process นี้ (ใช้ร่วมกันระหว่าง api_routes และ web_routes)
+broker = EventBroker()
+
+def publish_todo_event(event_type, data):
+    """แจ้ง event created / updated / deleted หลังจาก commit สำเร็จแล้ว"""
+    broker.publish(event_type, data)
+
+def publish_todo_events(event_type, items):
+    """แจ้ง event ของหลายรายการที่เปลี่ยนใน commit เดียว
+
+    ถ้ามากกว่า MAX_EVENTS_PER_CHANGE แจ้ง resync เดียวแทน (client ดึงข้อมูลใหม่ผ่าน /api/todos/changes)
+    ไม่เช่นนั้น buffer ของ client จะเต็มและถูกตัดการเชื่อมต่อทุกครั้งที่มีการแก้ไขจำนวนมาก
+    """
+    items = list(items)
+    if len(items) > MAX_EVENTS_PER_CHANGE:
+        broker.publish('resync', {})
+        return
+    for data in items:
+        broker.publish(event_type, data)
@@ -0,0 +1,181 @@
+# สร้าง Flask app ตาม profile: full (API + หน้าเว็บ) หรือ api (เฉพาะ API ไม่โหลดหน้าเว็บและ template)
+# การสร้าง app ไม่แตะฐานข้อมูล ใช้ prepare_database() หรือ flask init-db
+from flask import Flask, jsonify
+from flask_cors import CORS
+import os
+from models import db, Todo, init_db
+from json_provider import FastJSONProvider
+from storage import init_storage
+from writes import init_writes
+from compression import init_compression
+from id_layout import init_id_aliases
+from idempotency import init_idempotency
+from todo_cache import init_todo_cache
+
+PROFILES = ('full', 'api')
+DEFAULT_PROFILE = 'full'
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+SAMPLE_TODOS = [
+    {'id': '1', 'title': 'ซื้อของใช้ในบ้าน', 'description': 'ซื้อข้าว น้ำมัน และผักผลไม้', 'is_completed': False},
+    {'id': '2', 'title': 'ทำงานบ้าน', 'description': 'เก็บห้องนอนและล้างจาน', 'is_completed': True},
+    {'id': '3', 'title': 'ออกกำลังกาย', 'description': 'วิ่งเก็บสเต็ป 30 นาที', 'is_completed': False},
+    {'id': '4', 'title': 'อ่านหนังสือ', 'description': 'อ่านหนังสือเกี่ยวกับการพัฒนาตนเอง', 'is_completed': True},
+    {'id': '5', 'title': 'เรียนออนไลน์', 'description': 'เรียน Flutter และ Python API Development', 'is_completed': False},
+]
+
+def configure_app(app, profile):
+    """กำหนดค่าของแอป (ค่าที่ใช้เฉพาะหน้าเว็บตั้งเฉพาะ profile full)"""
+    # กำหนดค่าฐานข้อมูล SQLite
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', f'sqlite:///{os.path.join(basedir, "todos.db")}')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # profile ของ SQLite: durable (ค่าเริ่มต้น) หรือ fast ดูรายละเอียดใน storage.py
+    app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE', 'durable')
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = 5000
+    app.config['SQLITE_POOL_SIZE'] = 10
+
+    # รวมการเขียนจากหลาย request เป็น batch เดียว (group commit) ขนาดสูงสุดและเวลารอสูงสุดต่อ batch
+    # ตั้ง WRITE_COORDINATOR=0 เพื่อให้แต่ละ request commit เองเหมือนเดิม
+    app.config['WRITE_COORDINATOR'] = os.environ.get('WRITE_COORDINATOR', '1') == '1'
+    app.config['WRITE_BATCH_MAX_SIZE'] = 64
+    app.config['WRITE_BATCH_MAX_WAIT_MS'] = 2
+    # request ที่รอผลการเขียนนานกว่านี้ (วินาที) ได้ 500 แทนการรอไม่สิ้นสุด
+    app.config['WRITE_TIMEOUT_SECONDS'] = 30
+
+    # จำนวน thread ที่ใช้รัน request ของแอปเมื่อรันด้วย async_server.py (การเชื่อมต่อที่รออยู่ไม่ใช้ thread)
+    app.config['ASYNC_WORKER_THREADS'] = 16
+    # เวลารอสูงสุด (วินาที) ของการอ่าน body แต่ละครั้ง แยกจาก keep-alive ที่จำกัดเวลารอ request ถัดไป
+    app.config['ASYNC_BODY_TIMEOUT_SECONDS'] = 30
+
+    # ระยะเวลาเก็บ tombstone สำหรับ delta sync (client ที่ไม่ได้ sync นานกว่านี้ต้องดึงข้อมูลใหม่ทั้งหมด)
+    app.config['TOMBSTONE_RETENTION_DAYS'] = 30
+
+    # จำนวนแถวที่อ่านจากฐานข้อมูลและเขียนออกต่อหนึ่ง chunk เมื่อดึงรายการแบบ ?stream=
+    app.config['STREAM_BATCH_SIZE'] = 500
+
+    # ขนาด batch ของการส่งออก / นำเข้า NDJSON (นำเข้า: หนึ่ง transaction ต่อหนึ่ง batch)
+    app.config['EXPORT_BATCH_SIZE'] = 1000
+    app.config['IMPORT_BATCH_SIZE'] = 1000
+
+    # งานที่เสร็จแล้วที่ถูกลบจะถูกเก็บถาวรไว้ตามจำนวนวันนี้ก่อนถูกลบทิ้งจริงโดย thread เบื้องหลัง
+    app.config['ARCHIVE_RETENTION_DAYS'] = 30
+    app.config['ARCHIVE_PURGE_INTERVAL_SECONDS'] = 3600
+    app.config['ARCHIVE_PURGE_CHUNK_SIZE'] = 1000
+
+    # response ของ POST ที่ส่งพร้อม Idempotency-Key เก็บไว้นานเท่านี้ (วินาที) และจำนวนที่เก็บในหน่วยความจำต่อ process
+    app.config['IDEMPOTENCY_TTL_SECONDS'] = 24 * 3600
+    app.config['IDEMPOTENCY_CACHE_SIZE'] = 10000
+
+    # จำนวน todo ที่เก็บในแคชของ GET /api/todos/<id> ต่อ process (0 = ไม่ใช้แคช)
+    app.config['TODO_CACHE_SIZE'] = int(os.environ.get('TODO_CACHE_SIZE', 10000))
+
+    # บีบอัด response (gzip และ zstd / brotli ถ้าติดตั้งไว้) เฉพาะที่ใหญ่กว่าขนาดนี้ (bytes)
+    app.config['COMPRESS_MIN_SIZE'] = 1024
+    app.config['COMPRESS_GZIP_LEVEL'] = 6
+    # จำนวน body ที่บีบอัดแล้วที่เก็บไว้ใช้ซ้ำ (เฉพาะ response ที่มี ETag)
+    app.config['COMPRESS_CACHE_SIZE'] = 128
+
+    if profile == 'full':
+        # กำหนดค่า Secret Key สำหรับ Flash Messages
+        app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-here-change-in-production')
+
+        # จำนวนงานต่อหน้าของหน้าเว็บ
+        app.config['WEB_PAGE_SIZE'] = 50
+
+        # โฟลเดอร์เก็บ bytecode ของ template ที่ compile แล้ว (None = เก็บไว้ในหน่วยความจำเท่านั้น)
+        app.config['TEMPLATE_BYTECODE_CACHE_DIR'] = os.environ.get('TEMPLATE_BYTECODE_CACHE_DIR')
+
+def register_api_index(app):
+    """หน้าแรกของ profile api: แสดงรายการ endpoint เป็น JSON"""
+
+    @app.route('/', methods=['GET'])
+    def home():
+        """หน้าแรกแสดงข้อมูล API"""
+        return jsonify({
+            'message': 'Todo List API',
+            'version': '1.0.0',
+            'endpoints': {
+                'GET /api/todos': 'ดึงรายการ Todo แบบแบ่งหน้า (?limit=&cursor=, ?all=true)',
+                'GET /api/todos/<id>': 'ดึง Todo ตาม ID',
+                'POST /api/todos': 'เพิ่ม Todo ใหม่',
+                'PUT /api/todos/<id>': 'แก้ไข Todo',
+                'PATCH /api/todos/<id>/toggle': 'เปลี่ยนสถานะ Todo',
+                'DELETE /api/todos/<id>': 'ลบ Todo',
+                'GET /api/todos/stats': 'ดึงสถิติ Todo',
+                'GET /api/todos/cache/stats': 'ดึงสถิติแคชของ Todo รายการเดียว',
+                'DELETE /api/todos/completed': 'ลบงานที่เสร็จแล้วทั้งหมด'
+            }
+        })
+
+def register_error_handlers(app):
+    @app.errorhandler(404)
+    def not_found(error):
+        return jsonify({
+            'success': False,
+            'message': 'ไม่พบ endpoint ที่ระบุ'
+        }), 404
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': 'เกิดข้อผิดพลาดภายในเซิร์ฟเวอร์'
+        }), 500
+
+def create_app(profile=None):
+    """สร้าง Flask app ตาม profile ('full' หรือ 'api' ค่าเริ่มต้นอ่านจาก APP_PROFILE)"""
+    profile = profile or os.environ.get('APP_PROFILE', DEFAULT_PROFILE)
+    if profile not in PROFILES:
+        raise ValueError(f'ไม่รู้จัก profile: {profile} (เลือกได้: {", ".join(PROFILES)})')
+
+    app = Flask(__name__)
+    app.config['APP_PROFILE'] = profile
+
+    # แปลง response เป็น JSON ด้วย orjson เมื่อติดตั้งไว้ (ไม่เช่นนั้นใช้ json ของ Python)
+    app.json = FastJSONProvider(app)
+
+    # กำหนดค่า CORS เพื่อให้ Flutter เชื่อมต่อได้
+    CORS(app)
+
+    configure_app(app, profile)
+
+    # เริ่มต้น SQLAlchemy พร้อม profile ของ SQLite
+    init_storage(app, db)
+    init_writes(app)
+    init_idempotency(app)
+    init_todo_cache(app)
+
+    # ลงทะเบียน routes (import เมื่อใช้เท่านั้น: profile api ไม่โหลดหน้าเว็บและ template)
+    from api_routes import register_api_routes
+    from commands import register_commands
+
+    if profile == 'full':
+        from web_routes import register_web_routes
+        register_web_routes(app)
+    else:
+        register_api_index(app)
+    register_api_routes(app)
+    register_commands(app)
+
+    # route ที่มี <todo_id> รับ id เดิมที่ถูกแทนตอนย้ายไปเก็บ id แบบ INTEGER
+    init_id_aliases(app)
+
+    # บีบอัด response ตาม Accept-Encoding
+    init_compression(app)
+
+    register_error_handlers(app)
+    return app
+
+def prepare_database(app, samples=SAMPLE_TODOS):
+    """สร้างตารางในฐานข้อมูลและเพิ่มข้อมูลตัวอย่างถ้ายังไม่มีงานเลย"""
+    with app.app_context():
+        init_db()
+
+        if samples and Todo.query.count() == 0:
+            for values in samples:
+                db.session.add(Todo(**values))
+            db.session.commit()
+            print("✅ เพิ่มข้อมูลตัวอย่างแล้ว")
@@ -0,0 +1,139 @@
+# layout ของ todo.id: string (VARCHAR เดิม) หรือ integer (INTEGER PRIMARY KEY ใช้ id เป็น rowid)
+# ย้ายด้วย flask migrate-todo-ids id เดิมที่ไม่ใช่ตัวเลขถูกบันทึกไว้ใน todo_id_alias
+import secrets
+from datetime import datetime
+from sqlalchemy import select
+from werkzeug.exceptions import BadRequest
+from models import db, Todo, TodoIdAlias, TodoTombstone, init_db
+from ids import new_todo_id, is_compact_id, MAX_COMPACT_ID
+
+# layout ของแต่ละฐานข้อมูล (ตรวจครั้งเดียวต่อ process)
+_layouts = {}
+
+# ตาราง todo แบบ id เป็น rowid (คอลัมน์อื่นเหมือนกับที่ create_all สร้างจากโมเดล)
+TODO_INTEGER_TABLE_DDL = """
+    CREATE TABLE todo_migrating (
+        id INTEGER PRIMARY KEY,
+        title VARCHAR(200) NOT NULL,
+        description TEXT,
+        is_completed BOOLEAN,
+        created_at DATETIME,
+        updated_at DATETIME
+    )
+"""
+
+def todo_id_layout():
+    """'integer' ถ้าตาราง todo เก็บ id เป็น INTEGER PRIMARY KEY ไม่เช่นนั้น 'string'"""
+    key = str(db.engine.url)
+    layout = _layouts.get(key)
+    if layout is None:
+        column_type = db.session.execute(
+            db.text("SELECT type FROM pragma_table_info('todo') WHERE name = 'id'")
+        ).scalar()
+        layout = 'integer' if (column_type or '').upper() == 'INTEGER' else 'string'
+        _layouts[key] = layout
+    return layout
+
+def client_todo_id(value):
+    """ID ที่ client ส่งมา (หรือสร้างใหม่ถ้าไม่ส่ง) ตรวจว่าเก็บได้ตาม layout ของฐานข้อมูล"""
+    if value is None:
+        return new_todo_id()
+    if todo_id_layout() == 'integer' and not is_compact_id(value):
+        raise BadRequest("ID ต้องเป็นตัวเลข")
+    return str(value)
+
+def canonical_todo_id(todo_id):
+    """id ในรูปที่ฐานข้อมูลแบบ integer เก็บจริง
+
+    คอลัมน์ INTEGER ของ SQLite แปลงข้อความที่เป็นตัวเลข ('01', '+1', '1.0') เป็นจำนวนเต็มเดียวกัน
+    id เหล่านี้จึงหมายถึงแถวเดียวกัน ใช้ค่านี้เป็นคีย์ของแคชและ event แทนข้อความที่ client ส่งมา
+    """
+    if is_compact_id(todo_id) or todo_id_layout() != 'integer':
+        return todo_id
+    text = str(todo_id).strip()
+    if not text.isascii() or '_' in text:
+        return todo_id
+    try:
+        number = int(text)
+    except ValueError:
+        try:
+            number = float(text)
+        except ValueError:
+            return todo_id
+        if not number.is_integer():
+            return todo_id
+        number = int(number)
+    if not -MAX_COMPACT_ID - 1 <= number <= MAX_COMPACT_ID:
+        return todo_id
+    return str(number)
+
+def resolve_todo_id(todo_id):
+    """แปลง id เดิมที่ถูกแทนที่ตอน migrate เป็น id ปัจจุบัน (id อื่นคืนค่าเดิม)"""
+    if is_compact_id(todo_id) or todo_id_layout() != 'integer':
+        return todo_id
+    canonical = canonical_todo_id(todo_id)
+    if canonical != todo_id:
+        return canonical
+    alias = db.session.get(TodoIdAlias, todo_id)
+    return alias.todo_id if alias else todo_id
+
+def init_id_aliases(app):
+    """ให้ทุก route ที่มี <todo_id> รับ id เดิมก่อน migrate ได้"""
+
+    @app.url_value_preprocessor
+    def resolve_legacy_todo_id(endpoint, values):
+        if values and 'todo_id' in values:
+            values['todo_id'] = resolve_todo_id(values['todo_id'])
+
+def migrate_todo_ids():
+    """ย้ายตาราง todo ไปเก็บ id แบบ INTEGER PRIMARY KEY ใน transaction เดียว
+
+    คืน dict: migrated (False ถ้าย้ายไปแล้ว), rows, aliased
+    """
+    init_db()
+    if todo_id_layout() == 'integer':
+        return {'migrated': False, 'rows': Todo.query.count(), 'aliased': 0}
+
+    # จอง write lock ตั้งแต่ต้น: DDL ทั้งหมดอยู่ใน transaction เดียวกัน และไม่มีการเขียนแทรกระหว่างย้าย
+    db.session.connection().exec_driver_sql('BEGIN IMMEDIATE')
+    now = datetime.utcnow()
+    table = Todo.__table__
+    legacy_ids = [todo_id for todo_id in db.session.execute(select(table.c.id)).scalars() if not is_compact_id(todo_id)]
+    aliases = [{'legacy_id': legacy_id, 'todo_id': new_todo_id()} for legacy_id in legacy_ids]
+
+    if aliases:
+        db.session.execute(TodoIdAlias.__table__.insert(), aliases)
+        # client ที่ใช้ delta sync: ลบ id เดิมออก แล้วรับรายการเดิมด้วย id ใหม่ (updated_at ใหม่)
+        db.session.execute(TodoTombstone.__table__.insert(), [
+            {'todo_id': alias['legacy_id'], 'deleted_at': now} for alias in aliases
+        ])
+
+    db.session.execute(db.text(TODO_INTEGER_TABLE_DDL))
+    db.session.execute(db.text(
+        "INSERT INTO todo_migrating (id, title, description, is_completed, created_at, updated_at) "
+        "SELECT COALESCE(a.todo_id, t.id), t.title, t.description, t.is_completed, t.created_at, "
+        "CASE WHEN a.todo_id IS NULL THEN t.updated_at ELSE :now END "
+        "FROM todo t LEFT JOIN todo_id_alias a ON a.legacy_id = t.id"
+    ), {'now': now})
+    rows = db.session.execute(db.text("SELECT COUNT(*) FROM todo_migrating")).scalar()
+
+    # trigger, FTS และ index ผูกกับตารางเดิม: ลบทิ้งแล้ว init_db สร้างใหม่ให้ตารางใหม่
+    triggers = db.session.execute(
+        db.text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'todo'")
+    ).scalars().all()
+    for name in triggers:
+        db.session.execute(db.text(f'DROP TRIGGER "{name}"'))
+    db.session.execute(db.text("DROP TABLE IF EXISTS todo_fts"))
+    db.session.execute(db.text("DROP TABLE todo"))
+    db.session.execute(db.text("ALTER TABLE todo_migrating RENAME TO todo"))
+    # ETag ที่ client เก็บไว้ใช้ไม่ได้อีก (id ของบางรายการเปลี่ยน)
+    db.session.execute(
+        db.text("UPDATE data_version SET epoch = :epoch, generation = generation + 1 WHERE id = 1"),
+        {'epoch': secrets.token_hex(8)}
+    )
+    db.session.commit()
+
+    _layouts.pop(str(db.engine.url), None)
+    # สร้าง index, trigger และ index การค้นหา (FTS) ใหม่บนตารางที่ย้ายแล้ว
+    init_db()
+    return {'migrated': True, 'rows': rows, 'aliased': len(aliases)}
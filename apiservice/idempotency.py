@@ -0,0 +1,176 @@
+# Idempotency-Key ของ POST /api/todos: ส่งซ้ำด้วยคีย์เดิมได้ response เดิม (Idempotent-Replayed: true) ไม่เขียนซ้ำ
+# คีย์บันทึกใน transaction เดียวกับ todo จึงถูกต้องข้าม worker คีย์เดิมแต่ body ต่างกันได้ 422
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import current_app, request
+from sqlalchemy.dialects.sqlite import insert
+from werkzeug.exceptions import BadRequest
+from models import db, IdempotencyKey
+from mutations import insert_todo
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_WAIT_SECONDS = 30
+MAX_KEY_LENGTH = 255
+
+class IdempotencyKeyInFlight(Exception):
+    """request อื่นที่ใช้คีย์เดียวกันยังทำงานไม่เสร็จภายในเวลาที่รอ"""
+    pass
+
+class IdempotencyStore:
+    """response ล่าสุดตามคีย์ (LRU จำกัดจำนวน + หมดอายุตาม TTL) และ lock ของคีย์ที่กำลังทำงาน"""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, ttl=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry['expires_at'] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, record):
+        # created_at เป็นเวลา UTC แบบไม่มี timezone: นับอายุเทียบกับ utcnow แล้วแปลงเป็นเวลาของ time.time()
+        age = (datetime.utcnow() - record['created_at']).total_seconds()
+        entry = dict(record, expires_at=time.time() + self.ttl - age)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @contextmanager
+    def claim(self, key, timeout=DEFAULT_WAIT_SECONDS):
+        """ให้ request ที่ใช้คีย์เดียวกันทำงานทีละตัวภายใน process"""
+        with self._lock:
+            slot = self._in_flight.setdefault(key, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            if not slot[0].acquire(timeout=timeout):
+                raise IdempotencyKeyInFlight()
+            try:
+                yield
+            finally:
+                slot[0].release()
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del self._in_flight[key]
+
+def _store():
+    return current_app.extensions['idempotency']
+
+def idempotency_key():
+    """คีย์จาก header Idempotency-Key (None ถ้าไม่ได้ส่งมา)"""
+    key = request.headers.get('Idempotency-Key')
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise BadRequest(f"Idempotency-Key ต้องยาว 1-{MAX_KEY_LENGTH} ตัวอักษร")
+    return key
+
+def request_fingerprint():
+    """ตัวแทนของ request (method, path และ body) ใช้ตรวจว่าคีย์เดิมถูกใช้กับข้อมูลเดิม"""
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode('utf-8'))
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+def _record(row):
+    return {'fingerprint': row.fingerprint, 'status': row.status, 'body': row.body, 'created_at': row.created_at}
+
+def lookup_response(key):
+    """response ที่บันทึกไว้ของคีย์ (หน่วยความจำก่อน แล้วจึงฐานข้อมูล) หรือ None"""
+    store = _store()
+    record = store.get(key)
+    if record is not None:
+        return record
+    cutoff = datetime.utcnow() - timedelta(seconds=store.ttl)
+    row = db.session.execute(
+        db.select(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.created_at >= cutoff)
+    ).scalar()
+    if row is None or row.status is None:
+        return None
+    record = _record(row)
+    store.put(key, record)
+    return record
+
+def insert_todo_once(values, key, fingerprint, respond):
+    """insert_todo ครั้งเดียวต่อคีย์ (ใช้กับ writes.run_write)
+
+    จองคีย์ด้วย INSERT ... ON CONFLICT แล้วบันทึก response ที่ได้จาก respond(todo)
+    ใน transaction เดียวกับการเพิ่ม todo ถ้าคีย์ถูกใช้แล้ว (เช่นโดย worker process อื่น) คืน response เดิม
+    คืน (todo ที่เพิ่มใหม่ หรือ None, record ของ response, True ถ้าเป็น response เดิม)
+    """
+    table = IdempotencyKey.__table__
+    now = datetime.utcnow()
+    statement = insert(table).values(key=key, fingerprint=fingerprint, created_at=now)
+    # คีย์ที่หมดอายุแล้วแต่ยังไม่ถูกลบ นำกลับมาใช้ใหม่ได้
+    claimed = db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={'fingerprint': fingerprint, 'status': None, 'body': None, 'created_at': now},
+            where=table.c.created_at < now - timedelta(seconds=_store().ttl)
+        ).returning(table.c.key)
+    ).first()
+    if claimed is None:
+        existing = db.session.execute(db.select(table).where(table.c.key == key)).first()
+        return None, _record(existing), True
+
+    todo = insert_todo(values)
+    status, payload = respond(todo)
+    body = current_app.json.dumps(payload)
+    db.session.execute(table.update().where(table.c.key == key).values(status=status, body=body))
+    return todo, {'fingerprint': fingerprint, 'status': status, 'body': body, 'created_at': now}, False
+
+def remember_response(key, record):
+    _store().put(key, record)
+
+def claim_key(key):
+    return _store().claim(key)
+
+def replay_response(record, fingerprint, replayed=True):
+    """สร้าง response จาก record ที่บันทึกไว้ (422 ถ้าคีย์เดิมถูกใช้กับ request ที่ต่างกัน)"""
+    if record['fingerprint'] != fingerprint:
+        body = current_app.json.dumps({
+            'success': False,
+            'message': 'Idempotency-Key นี้ถูกใช้กับข้อมูลอื่นแล้ว'
+        })
+        return current_app.response_class(body + '\n', status=422, mimetype=current_app.json.mimetype)
+    response = current_app.response_class(record['body'] + '\n', status=record['status'], mimetype=current_app.json.mimetype)
+    if replayed:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def purge_idempotency_keys(ttl_seconds=DEFAULT_TTL_SECONDS, chunk_size=1000):
+    """ลบคีย์ที่หมดอายุทีละกลุ่ม คืนจำนวนที่ลบ"""
+    table = IdempotencyKey.__table__
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    total = 0
+    while True:
+        chunk = db.select(table.c.key).where(table.c.created_at < cutoff).limit(chunk_size)
+        deleted = db.session.execute(table.delete().where(table.c.key.in_(chunk))).rowcount
+        db.session.commit()
+        total += deleted
+        if deleted < chunk_size:
+            return total
+
+def init_idempotency(app):
+    app.extensions['idempotency'] = IdempotencyStore(
+        app.config.get('IDEMPOTENCY_CACHE_SIZE', DEFAULT_CACHE_SIZE),
+        app.config.get('IDEMPOTENCY_TTL_SECONDS', DEFAULT_TTL_SECONDS)
+    )
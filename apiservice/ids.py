@@ -0,0 +1,140 @@
+# ID ของ Todo แบบ Snowflake (63 bit: เวลา 41 bit, worker id 10 bit, ลำดับ 12 bit) เรียงตามเวลาและไม่ซ้ำข้าม process
+# worker id มาจาก WORKER_ID (serve.py) หรือจองค่า 512-1023 ที่ว่างด้วย file lock ใน WORKER_ID_LOCK_DIR
+import os
+import tempfile
+import threading
+import time
+from sqlalchemy.types import TypeDecorator, String
+
+# 2024-01-01T00:00:00Z
+ID_EPOCH_MS = 1704067200000
+
+WORKER_ID_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_ID_BITS) - 1
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+# worker id ที่กำหนดเองได้ (ส่วนที่เหลือใช้สำหรับค่าที่ได้จาก pid)
+ASSIGNED_WORKER_IDS = 512
+
+MAX_COMPACT_ID = (1 << 63) - 1
+
+# fcntl มีเฉพาะบน Unix ระบบอื่นต้องกำหนด WORKER_ID เอง
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+def worker_id_lock_dir():
+    return os.environ.get('WORKER_ID_LOCK_DIR') or os.path.join(tempfile.gettempdir(), 'todo-worker-ids')
+
+def claim_worker_id(lock_dir=None):
+    """จอง worker id ที่ยังไม่มี process อื่นถือไว้ (ASSIGNED_WORKER_IDS ถึง MAX_WORKER_ID)
+
+    คืน (worker_id, fd ของไฟล์ lock) ต้องเปิด fd ไว้ตลอดอายุ process (ปิดเมื่อไม่ใช้ worker id นี้แล้ว)
+    """
+    if fcntl is None:
+        raise RuntimeError('ต้องกำหนด WORKER_ID (ระบบนี้จอง worker id อัตโนมัติไม่ได้)')
+    lock_dir = lock_dir or worker_id_lock_dir()
+    os.makedirs(lock_dir, exist_ok=True)
+    # เริ่มจากตำแหน่งตาม pid: process ที่เริ่มพร้อมกันไม่ต้องแย่งไฟล์เดียวกัน
+    count = MAX_WORKER_ID + 1 - ASSIGNED_WORKER_IDS
+    start = os.getpid() % count
+    for offset in range(count):
+        worker_id = ASSIGNED_WORKER_IDS + (start + offset) % count
+        fd = os.open(os.path.join(lock_dir, f'{worker_id}.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            continue
+        return worker_id, fd
+    raise RuntimeError(f'worker id ใน {lock_dir} ถูกใช้ครบ {count} ค่าแล้ว กำหนด WORKER_ID เอง')
+
+def default_worker_id():
+    """คืน (worker_id, fd ของ lock หรือ None ถ้ากำหนดผ่าน WORKER_ID)"""
+    value = os.environ.get('WORKER_ID')
+    if value is not None:
+        worker_id = int(value)
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f'WORKER_ID ต้องอยู่ระหว่าง 0 ถึง {MAX_WORKER_ID}')
+        return worker_id, None
+    return claim_worker_id()
+
+class SnowflakeGenerator:
+    """สร้าง ID ที่เพิ่มขึ้นเสมอ (thread-safe) และอ่าน worker id ใหม่หลัง fork"""
+
+    def __init__(self, worker_id=None, epoch_ms=ID_EPOCH_MS):
+        self._worker_id = worker_id
+        self.epoch_ms = epoch_ms
+        self._lease_fd = None
+        self.reset()
+
+    def reset(self):
+        # lock ใหม่: lock เดิมอาจถูกถือไว้โดย thread ของ process แม่ตอน fork
+        self._lock = threading.Lock()
+        # หลัง fork: worker id ที่จองไว้เป็นของ process แม่ ปิด fd ที่ติดมาแล้วจองใหม่เมื่อใช้
+        if self._lease_fd is not None:
+            os.close(self._lease_fd)
+            self._lease_fd = None
+        self.worker_id = self._worker_id
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _now(self):
+        return int(time.time() * 1000) - self.epoch_ms
+
+    def next_id(self):
+        with self._lock:
+            if self.worker_id is None:
+                self.worker_id, self._lease_fd = default_worker_id()
+            now = self._now()
+            if now > self._last_ms:
+                self._last_ms = now
+                self._sequence = 0
+            else:
+                # มิลลิวินาทีเดียวกันหรือนาฬิกาถอยหลัง: ใช้เวลาเดิมต่อ
+                self._sequence = (self._sequence + 1) & SEQUENCE_MASK
+                if self._sequence == 0:
+                    # ลำดับเต็ม: รอจนนาฬิกาผ่านมิลลิวินาทีนี้ไป (ไม่ยืมเวลาล่วงหน้า เวลาใน ID จึงไม่ล้ำเวลาจริง)
+                    while now <= self._last_ms:
+                        time.sleep(0.0001)
+                        now = self._now()
+                    self._last_ms = now
+            return (self._last_ms << (WORKER_ID_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+_generator = SnowflakeGenerator()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_generator.reset)
+
+def new_todo_id():
+    """สร้าง ID ใหม่ของ Todo (ตัวเลขในรูปข้อความ เพื่อคง JSON contract เดิม)"""
+    return str(_generator.next_id())
+
+def id_timestamp(todo_id):
+    """เวลา (มิลลิวินาที epoch ของ Unix) ที่ฝังอยู่ใน ID แบบ Snowflake"""
+    return (int(todo_id) >> (WORKER_ID_BITS + SEQUENCE_BITS)) + ID_EPOCH_MS
+
+def is_compact_id(value):
+    """ID เก็บเป็น INTEGER ได้โดยไม่เปลี่ยนค่าหรือไม่ (ตัวเลขล้วน ไม่มีเลข 0 นำหน้า ไม่เกิน 63 bit)"""
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return 0 <= value <= MAX_COMPACT_ID
+    if not isinstance(value, str) or not value.isascii() or not value.isdigit():
+        return False
+    return (value == '0' or value[0] != '0') and int(value) <= MAX_COMPACT_ID
+
+class TodoId(TypeDecorator):
+    """คอลัมน์ ID ที่ใช้ได้ทั้งแบบ VARCHAR เดิมและแบบ INTEGER PRIMARY KEY (หลัง migrate-todo-ids)
+
+    ฝั่ง Python เป็นข้อความเสมอ SQLite แปลงค่าตาม affinity ของคอลัมน์เองตอนบันทึกและเปรียบเทียบ
+    """
+    impl = String
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else str(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else str(value)
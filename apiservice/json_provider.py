@@ -0,0 +1,74 @@
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+
+# orjson เป็น dependency เสริม ถ้าไม่ได้ติดตั้งจะใช้ json ของ Python แทน
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(o):
+    # datetime / date ส่งเป็น ISO 8601 แบบเดียวกับ Todo.to_dict (ไม่ใช่รูปแบบ HTTP date ของ Flask)
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider ของแอป: ใช้ orjson เมื่อมี ไม่เช่นนั้นใช้ json ของ Python
+
+    ทั้งสองแบบให้ผลลัพธ์ที่มีความหมายเดียวกัน (key เรียงตามตัวอักษร, datetime เป็น ISO 8601,
+    ข้อความไทยเป็น UTF-8 ไม่ escape) ตรวจใน test_json_provider.py
+    """
+
+    default = staticmethod(_default)
+    ensure_ascii = False
+    mimetype = 'application/json; charset=utf-8'
+
+    @property
+    def backend(self):
+        return 'orjson' if orjson is not None else 'json'
+
+    def _orjson_option(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, indent=False):
+        """แปลงเป็น JSON แบบ UTF-8 bytes โดยไม่ผ่าน str (ใช้ใน response)"""
+        if orjson is not None:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_option(indent))
+        return self._stdlib_dumps(obj, indent).encode('utf-8')
+
+    def _stdlib_dumps(self, obj, indent=False):
+        return json.dumps(obj, default=self.default, ensure_ascii=self.ensure_ascii,
+                          sort_keys=self.sort_keys, indent=2 if indent else None,
+                          separators=None if indent else (',', ':'))
+
+    def dumps(self, obj, **kwargs):
+        # ตัวเลือกเฉพาะของ json.dumps (เช่นจาก filter tojson) ให้ json ของ Python จัดการ
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_option()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b'\n', content_type=self.mimetype)
@@ -0,0 +1,95 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from models import db, Todo, ArchivedTodo
+from sync import compact_tombstones
+from idempotency import purge_idempotency_keys, DEFAULT_TTL_SECONDS
+
+# ค่าเริ่มต้นของการเก็บถาวรและการลบข้อมูลเก่าเบื้องหลัง
+DEFAULT_ARCHIVE_RETENTION_DAYS = 30
+DEFAULT_PURGE_INTERVAL_SECONDS = 3600
+DEFAULT_PURGE_CHUNK_SIZE = 1000
+
+ARCHIVE_COLUMNS = ['id', 'title', 'description', 'is_completed', 'created_at', 'updated_at']
+
+def archive_completed():
+    """ย้ายงานที่เสร็จแล้วทั้งหมดไปตาราง archived_todo ด้วย INSERT ... SELECT และ DELETE
+
+    ทั้งสองคำสั่งอยู่ใน transaction เดียวกัน (SQLite ถือ write lock ตั้งแต่คำสั่งแรก
+    จึงไม่มีแถวใดเปลี่ยนสถานะระหว่างสองคำสั่ง) คืนค่า id ที่ถูกย้าย
+    """
+    table = Todo.__table__
+    archive = ArchivedTodo.__table__
+    completed = table.c.is_completed == True
+
+    select = db.select(
+        *[table.c[name] for name in ARCHIVE_COLUMNS],
+        db.literal(datetime.utcnow(), db.DateTime)
+    ).where(completed)
+    db.session.execute(archive.insert().from_select(ARCHIVE_COLUMNS + ['archived_at'], select))
+    ids = db.session.execute(
+        table.delete().where(completed).returning(table.c.id)
+    ).scalars().all()
+    db.session.commit()
+    return ids
+
+def purge_archived(retention_days, chunk_size, pause=0.05):
+    """ลบงานที่เก็บถาวรเกินระยะเวลาที่กำหนดทีละกลุ่ม
+
+    แต่ละกลุ่ม commit แยกกันและเว้นช่วงสั้น ๆ เพื่อไม่ให้ถือ write lock นาน
+    คืนค่าจำนวนแถวที่ลบ
+    """
+    archive = ArchivedTodo.__table__
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    total = 0
+    while True:
+        chunk = db.select(archive.c.seq).where(
+            archive.c.archived_at < cutoff
+        ).order_by(archive.c.seq).limit(chunk_size)
+        deleted = db.session.execute(archive.delete().where(archive.c.seq.in_(chunk))).rowcount
+        db.session.commit()
+        total += deleted
+        if deleted < chunk_size:
+            return total
+        time.sleep(pause)
+
+class BackgroundPurger:
+    """thread เบื้องหลังที่ลบข้อมูลเก่า (งานเก็บถาวร, tombstone และ Idempotency-Key ที่หมดอายุ) เป็นระยะ"""
+
+    def __init__(self, app):
+        self.app = app
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='background-purger', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self):
+        config = self.app.config
+        with self.app.app_context():
+            purged = purge_archived(
+                config.get('ARCHIVE_RETENTION_DAYS', DEFAULT_ARCHIVE_RETENTION_DAYS),
+                config.get('ARCHIVE_PURGE_CHUNK_SIZE', DEFAULT_PURGE_CHUNK_SIZE)
+            )
+            tombstones = compact_tombstones()
+            keys = purge_idempotency_keys(config.get('IDEMPOTENCY_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+        return purged, tombstones, keys
+
+    def _run(self):
+        interval = self.app.config.get('ARCHIVE_PURGE_INTERVAL_SECONDS', DEFAULT_PURGE_INTERVAL_SECONDS)
+        while not self._stop.wait(interval):
+            try:
+                purged, tombstones, keys = self.run_once()
+                if purged or any(tombstones.values()) or keys:
+                    self.app.logger.info('purged %d archived todos, tombstones %s, %d idempotency keys',
+                                         purged, tombstones, keys)
+            except Exception:
+                self.app.logger.exception('background purge failed')
@@ -1,27 +1,239 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+import secrets
+from ids import TodoId
 
 # เริ่มต้น SQLAlchemy
 db = SQLAlchemy()
 
+# คอลัมน์ของ Todo ตามลำดับที่ส่งออกใน JSON
+TODO_FIELDS = ('id', 'title', 'description', 'is_completed', 'created_at', 'updated_at')
+
 # โมเดล Todo
 class Todo(db.Model):
-    id = db.Column(db.String(50), primary_key=True)
+    id = db.Column(TodoId(50), primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, default='')
     is_completed = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'is_completed': self.is_completed,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    __table_args__ = (
+        # index สำหรับ keyset pagination เรียงตาม (created_at, id)
+        db.Index('ix_todo_created_at_id', 'created_at', 'id'),
+        # index สำหรับ delta sync ไล่ตาม (updated_at, id)
+        db.Index('ix_todo_updated_at_id', 'updated_at', 'id'),
+    )
+
+    def to_json(self, fields=None):
+        """dict สำหรับส่งผ่าน app.json โดยตรง (datetime ถูกแปลงเป็น ISO 8601 โดย JSON provider)"""
+        return {field: getattr(self, field) for field in fields or TODO_FIELDS}
+
+    def to_dict(self, fields=None):
+        """แปลงเป็น dict (fields = รายชื่อคอลัมน์ที่ต้องการ ถ้าไม่ระบุจะคืนทุกคอลัมน์)"""
+        data = self.to_json(fields)
+        for field, value in data.items():
+            if isinstance(value, datetime):
+                data[field] = value.isoformat()
+        return data
+
+    def __repr__(self):
+        return f'<Todo {self.id}: {self.title}>'
+
+# index สำหรับหน้า dashboard: งานที่ยังไม่เสร็จก่อน แล้วเรียงจากใหม่ไปเก่า
+db.Index('ix_todo_completed_created_at_id', Todo.is_completed, Todo.created_at.desc(), Todo.id.desc())
+# index สำหรับกรองตามสถานะแล้วเรียงตามเวลาที่แก้ไขล่าสุด
+db.Index('ix_todo_completed_updated_at_id', Todo.is_completed, Todo.updated_at.desc(), Todo.id.desc())
+
+# โมเดลบันทึกการลบ (tombstone) สำหรับ delta sync
+class TodoTombstone(db.Model):
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    todo_id = db.Column(db.String(50), nullable=False, index=True)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    # ใช้ AUTOINCREMENT เพื่อไม่ให้ seq ถูกนำกลับมาใช้ซ้ำหลังบีบอัดตาราง
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    def __repr__(self):
+        return f'<TodoTombstone {self.seq}: {self.todo_id}>'
+
+# โมเดลเก็บถาวรงานที่เสร็จแล้ว (ย้ายมาจากตาราง todo แล้วลบทิ้งภายหลังตามระยะเวลาที่กำหนด)
+class ArchivedTodo(db.Model):
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    id = db.Column(db.String(50), nullable=False, index=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, default='')
+    is_completed = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<ArchivedTodo {self.id}: {self.title}>'
+
+# คีย์ของ POST ที่ส่งพร้อม Idempotency-Key และ response ที่ตอบไป (ดู idempotency.py)
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_key'
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.Integer)
+    body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key}: {self.status}>'
+
+# ID เดิมที่ไม่ใช่ตัวเลขซึ่งถูกแทนด้วย ID ใหม่ตอนย้ายไปเก็บ id แบบ INTEGER (ดู id_layout.py)
+class TodoIdAlias(db.Model):
+    __tablename__ = 'todo_id_alias'
+    legacy_id = db.Column(db.String(50), primary_key=True)
+    todo_id = db.Column(TodoId(50), nullable=False, index=True)
 
     def __repr__(self):
-        return f'<Todo {self.id}: {self.title}>'
\ No newline at end of file
+        return f'<TodoIdAlias {self.legacy_id} -> {self.todo_id}>'
+
+# เวอร์ชันของข้อมูล (เพิ่มขึ้นทุกครั้งที่ตาราง todo ถูกเขียน) ใช้สร้าง ETag ได้ในการอ่านครั้งเดียว
+class DataVersion(db.Model):
+    __tablename__ = 'data_version'
+    id = db.Column(db.Integer, primary_key=True)
+    # ค่าสุ่มประจำฐานข้อมูล กันไม่ให้ ETag ซ้ำกันเมื่อฐานข้อมูลถูกสร้างใหม่
+    epoch = db.Column(db.String(16), nullable=False)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+
+# ตัวนับสถิติที่ถูกปรับใน transaction เดียวกับการเขียน (ผ่าน trigger) อ่านได้ในแถวเดียว
+class TodoCounter(db.Model):
+    __tablename__ = 'todo_counter'
+    id = db.Column(db.Integer, primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+
+# ตาราง full-text search (FTS5) ที่อ้างข้อมูลจากตาราง todo โดยตรง (external content)
+# ใช้ tokenizer แบบ trigram เพราะภาษาไทยไม่มีการเว้นวรรคระหว่างคำ จึงต้องค้นแบบ substring
+FTS_TABLE_DDL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS todo_fts USING fts5(
+        title, description,
+        content='todo', content_rowid='rowid',
+        tokenize='trigram'
+    )
+"""
+
+# Trigger ของ SQLite ที่ทำงานกับทุกเส้นทางที่แก้ไขตาราง todo (รวมถึงคำสั่งแบบ set-based)
+TRIGGERS = [
+    # บันทึก tombstone ทุกครั้งที่มีการลบ todo
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_tombstone_after_delete
+    AFTER DELETE ON todo
+    BEGIN
+        INSERT INTO todo_tombstone (todo_id, deleted_at)
+        VALUES (old.id, strftime('%Y-%m-%d %H:%M:%f000', 'now'));
+    END
+    """,
+    # เพิ่ม generation ทุกครั้งที่มีการเพิ่ม/แก้ไข/ลบ todo
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_version_after_insert
+    AFTER INSERT ON todo
+    BEGIN
+        UPDATE data_version SET generation = generation + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_version_after_update
+    AFTER UPDATE ON todo
+    BEGIN
+        UPDATE data_version SET generation = generation + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_version_after_delete
+    AFTER DELETE ON todo
+    BEGIN
+        UPDATE data_version SET generation = generation + 1 WHERE id = 1;
+    END
+    """,
+    # ปรับตัวนับสถิติ total / completed
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_counter_after_insert
+    AFTER INSERT ON todo
+    BEGIN
+        UPDATE todo_counter
+        SET total = total + 1, completed = completed + (new.is_completed IS 1)
+        WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_counter_after_delete
+    AFTER DELETE ON todo
+    BEGIN
+        UPDATE todo_counter
+        SET total = total - 1, completed = completed - (old.is_completed IS 1)
+        WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_counter_after_update
+    AFTER UPDATE OF is_completed ON todo
+    WHEN (new.is_completed IS 1) != (old.is_completed IS 1)
+    BEGIN
+        UPDATE todo_counter
+        SET completed = completed + (new.is_completed IS 1) - (old.is_completed IS 1)
+        WHERE id = 1;
+    END
+    """,
+    # ทำให้ todo_fts ตรงกับ title / description ของ todo เสมอ
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_fts_after_insert
+    AFTER INSERT ON todo
+    BEGIN
+        INSERT INTO todo_fts (rowid, title, description)
+        VALUES (new.rowid, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_fts_after_delete
+    AFTER DELETE ON todo
+    BEGIN
+        INSERT INTO todo_fts (todo_fts, rowid, title, description)
+        VALUES ('delete', old.rowid, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_fts_after_update
+    AFTER UPDATE OF title, description ON todo
+    BEGIN
+        INSERT INTO todo_fts (todo_fts, rowid, title, description)
+        VALUES ('delete', old.rowid, old.title, old.description);
+        INSERT INTO todo_fts (rowid, title, description)
+        VALUES (new.rowid, new.title, new.description);
+    END
+    """,
+]
+
+def init_db():
+    """สร้างตาราง index และ trigger ที่ยังไม่มี (รองรับฐานข้อมูลเดิมที่สร้างไว้ก่อนแล้ว)"""
+    db.create_all()
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+    fts_exists = db.session.execute(
+        db.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'todo_fts'")
+    ).first() is not None
+    db.session.execute(db.text(FTS_TABLE_DDL))
+    if not fts_exists:
+        # ฐานข้อมูลเดิม: สร้าง index การค้นหาจากข้อมูลที่มีอยู่
+        rebuild_search_index()
+    for ddl in TRIGGERS:
+        db.session.execute(db.text(ddl))
+    db.session.execute(
+        db.text("INSERT OR IGNORE INTO data_version (id, epoch, generation) VALUES (1, :epoch, 0)"),
+        {'epoch': secrets.token_hex(8)}
+    )
+    # ฐานข้อมูลเดิม: นับค่าเริ่มต้นของตัวนับจากข้อมูลที่มีอยู่ (trigger จะดูแลต่อจากนี้)
+    db.session.execute(db.text(
+        "INSERT OR IGNORE INTO todo_counter (id, total, completed) "
+        "SELECT 1, COUNT(*), COALESCE(SUM(is_completed IS 1), 0) FROM todo"
+    ))
+    db.session.commit()
+
+def rebuild_search_index():
+    """สร้าง index การค้นหา todo_fts ใหม่ทั้งหมดจากตาราง todo"""
+    db.session.execute(db.text("INSERT INTO todo_fts (todo_fts) VALUES ('rebuild')"))
@@ -0,0 +1,49 @@
+from datetime import datetime
+from sqlalchemy.dialects.sqlite import insert
+from models import db, Todo
+
+# งานเขียนของ todo หนึ่งรายการ ใช้กับ writes.run_write
+# ทุกฟังก์ชันคืนค่า dict ของ todo (หรือ None เมื่อไม่พบ/ซ้ำ) เพราะอาจทำงานใน thread อื่นจาก request
+
+def insert_todo(values):
+    """เพิ่ม todo คืน None ถ้า id ซ้ำ
+
+    ใช้ INSERT ... ON CONFLICT DO NOTHING RETURNING คำสั่งเดียว (ไม่มีช่วงว่างระหว่างตรวจ id กับบันทึก)
+    """
+    table = Todo.__table__
+    row = db.session.execute(
+        insert(table).values(**values)
+        .on_conflict_do_nothing(index_elements=[table.c.id])
+        .returning(*table.c)
+    ).first()
+    if row is None:
+        return None
+    return Todo(**row._mapping).to_dict()
+
+def update_todo_fields(todo_id, values):
+    """แก้ไขคอลัมน์ตาม values คืน None ถ้าไม่พบ"""
+    todo = db.session.get(Todo, todo_id)
+    if todo is None:
+        return None
+    for name, value in values.items():
+        setattr(todo, name, value)
+    todo.updated_at = datetime.utcnow()
+    db.session.flush()
+    return todo.to_dict()
+
+def toggle_todo_status(todo_id):
+    """สลับสถานะเสร็จ/ไม่เสร็จ คืน None ถ้าไม่พบ"""
+    todo = db.session.get(Todo, todo_id)
+    if todo is None:
+        return None
+    return update_todo_fields(todo_id, {'is_completed': not todo.is_completed})
+
+def delete_todo_by_id(todo_id):
+    """ลบ todo คืน dict ของรายการที่ถูกลบ หรือ None ถ้าไม่พบ"""
+    todo = db.session.get(Todo, todo_id)
+    if todo is None:
+        return None
+    data = todo.to_dict()
+    db.session.delete(todo)
+    db.session.flush()
+    return data
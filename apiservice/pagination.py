@@ -0,0 +1,216 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+from werkzeug.exceptions import BadRequest
+
+# จำนวนรายการต่อหน้าเริ่มต้น และจำนวนสูงสุดที่อนุญาต
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# คอลัมน์ที่ใช้เรียงรายการได้ (ทุกคอลัมน์มี index คู่กับ id และคู่กับ is_completed)
+SORT_FIELDS = ('created_at', 'updated_at')
+SORT_DIRECTIONS = ('asc', 'desc')
+
+def encode_cursor(value, todo_id, sort='created_at', direction='desc'):
+    """แปลงตำแหน่ง (ค่าของคอลัมน์ที่ใช้เรียง, id) ของรายการสุดท้ายเป็น cursor แบบ opaque"""
+    raw = json.dumps([value.isoformat(), todo_id, sort, direction], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, sort='created_at', direction='desc'):
+    """แปลง cursor กลับเป็น (ค่าของคอลัมน์ที่ใช้เรียง, id) และตรวจว่าตรงกับการเรียงที่ขอ"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        # cursor รุ่นแรกมีเฉพาะ [created_at, id]
+        value, todo_id, cursor_sort, cursor_direction = raw if len(raw) == 4 else raw + ['created_at', 'desc']
+        value = datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        raise BadRequest("cursor ไม่ถูกต้อง")
+    if (cursor_sort, cursor_direction) != (sort, direction):
+        raise BadRequest("cursor ไม่ตรงกับการเรียงลำดับที่ระบุ")
+    return value, str(todo_id)
+
+def parse_limit(value):
+    """ตรวจสอบค่า limit จาก query string"""
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise BadRequest("limit ต้องเป็นตัวเลข")
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise BadRequest(f"limit ต้องอยู่ระหว่าง 1 ถึง {MAX_PAGE_SIZE}")
+    return limit
+
+def _parse_bool(name, value):
+    if value.lower() in ('true', '1'):
+        return True
+    if value.lower() in ('false', '0'):
+        return False
+    raise BadRequest(f"{name} ต้องเป็น true หรือ false")
+
+def _parse_datetime(name, value):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise BadRequest(f"{name} ต้องอยู่ในรูปแบบ ISO 8601 เช่น 2024-01-31T08:00:00")
+
+def parse_list_params(args):
+    """อ่านเงื่อนไขกรองและการเรียงลำดับของรายการจาก query string
+
+    is_completed=true|false, created_after / created_before, updated_after / updated_before
+    (ช่วงเวลาแบบ after <= ค่า < before), sort=created_at|updated_at, order=asc|desc
+    """
+    params = {
+        'sort': args.get('sort', 'created_at'),
+        'direction': args.get('order', 'desc'),
+        'is_completed': None,
+        'ranges': []
+    }
+    if params['sort'] not in SORT_FIELDS:
+        raise BadRequest(f"sort ต้องเป็น {' หรือ '.join(SORT_FIELDS)}")
+    if params['direction'] not in SORT_DIRECTIONS:
+        raise BadRequest("order ต้องเป็น asc หรือ desc")
+
+    if args.get('is_completed') is not None:
+        params['is_completed'] = _parse_bool('is_completed', args['is_completed'])
+
+    for field in SORT_FIELDS:
+        prefix = field[:-3]
+        for bound in ('after', 'before'):
+            name = f'{prefix}_{bound}'
+            if args.get(name):
+                params['ranges'].append((field, bound, _parse_datetime(name, args[name])))
+    return params
+
+def _cursor_covers(bound, value, position, direction):
+    # (sort, id) < cursor ทำให้ sort <= ค่าของ cursor เสมอ (และกลับกันสำหรับ asc)
+    if direction == 'desc':
+        return bound == 'before' and position[0] < value
+    return bound == 'after' and position[0] >= value
+
+def apply_list_filters(query, model, params, cursor=None):
+    """ใส่เงื่อนไขกรองจาก parse_list_params ลงใน query
+
+    ถ้าส่ง cursor ของหน้าที่จะดึงมาด้วย ขอบของช่วงเวลาฝั่งเดียวกับ cursor ที่ cursor แคบกว่าอยู่แล้วจะไม่ถูกใส่
+    SQLite ค้นใน index ด้วยขอบเขตฝั่งละหนึ่งเงื่อนไข ถ้าเลือกขอบของช่วงเวลาจะไล่อ่านตั้งแต่ต้นช่วงทุกหน้า
+    """
+    position = decode_cursor(cursor, params['sort'], params['direction']) if cursor else None
+    if params['is_completed'] is not None:
+        query = query.filter(model.is_completed == params['is_completed'])
+    for field, bound, value in params['ranges']:
+        if position is not None and field == params['sort'] and \
+                _cursor_covers(bound, value, position, params['direction']):
+            continue
+        column = getattr(model, field)
+        query = query.filter(column >= value if bound == 'after' else column < value)
+    return query
+
+def keyset_query(query, model, limit, cursor=None, sort='created_at', direction='desc'):
+    """สร้าง query ของหนึ่งหน้า (เงื่อนไข cursor + ORDER BY + LIMIT) โดยยังไม่ execute"""
+    column = getattr(model, sort)
+    descending = direction == 'desc'
+    if cursor:
+        position = decode_cursor(cursor, sort, direction)
+        key = tuple_(column, model.id)
+        query = query.filter(key < position if descending else key > position)
+
+    if descending:
+        query = query.order_by(column.desc(), model.id.desc())
+    else:
+        query = query.order_by(column.asc(), model.id.asc())
+    return query.limit(limit)
+
+def paginate_keyset(query, model, limit, cursor=None, sort='created_at', direction='desc'):
+    """ดึงข้อมูลหนึ่งหน้าเรียงตาม (sort, id) (ค่าเริ่มต้น created_at จากใหม่ไปเก่า)
+
+    ใช้เงื่อนไข (sort, id) < cursor แทน OFFSET เพื่อให้ทุกหน้าใช้ index
+    ตัวเดียวกันและมีต้นทุนเท่ากันไม่ว่าจะอยู่ลึกแค่ไหน
+    คืนค่า (items, next_cursor) โดย next_cursor เป็น None เมื่อถึงหน้าสุดท้าย
+    """
+    # ดึงเกินมา 1 แถวเพื่อตรวจว่ายังมีหน้าถัดไปหรือไม่
+    rows = keyset_query(query, model, limit + 1, cursor, sort, direction).all()
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort), last.id, sort, direction)
+    return items, next_cursor
+
+def encode_dashboard_cursor(todo, offset):
+    """cursor ของหน้า dashboard: (is_completed, created_at, id) ของแถวสุดท้าย และลำดับที่แสดงไปแล้ว"""
+    raw = json.dumps([bool(todo.is_completed), todo.created_at.isoformat(), todo.id, offset],
+                     separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_dashboard_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        is_completed, created_at, todo_id, offset = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return bool(is_completed), datetime.fromisoformat(created_at), str(todo_id), int(offset)
+    except (ValueError, TypeError):
+        raise BadRequest("cursor ไม่ถูกต้อง")
+
+class DashboardPage:
+    """หน้าหนึ่งของ dashboard: งานที่ยังไม่เสร็จก่อน แล้วเรียง created_at จากใหม่ไปเก่า
+
+    แถวถูกดึงแบบ lazy ผ่าน rows() (ใช้ yield_per) จึง render ได้ทีละแถวขณะ stream
+    next_cursor จะพร้อมใช้หลังจากวนครบ rows() แล้วเท่านั้น
+    cursor ที่ไม่ถูกต้องแจ้ง BadRequest ตั้งแต่สร้าง
+    """
+
+    def __init__(self, model, limit, cursor=None, batch_size=100):
+        self.model = model
+        self.limit = limit
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self.next_cursor = None
+        self._position = decode_dashboard_cursor(cursor) if cursor else None
+        self.offset = self._position[3] if self._position else 0
+        self._prefetched = None
+
+    def _segments(self):
+        # แบ่งเป็นสองช่วงตาม is_completed เพื่อให้แต่ละช่วงเป็นการไล่ index
+        # (is_completed, created_at DESC, id DESC) ต่อเนื่องโดยไม่ต้องใช้ OR
+        if self._position is None:
+            yield False, None
+            yield True, None
+            return
+        is_completed, created_at, todo_id, _ = self._position
+        yield is_completed, (created_at, todo_id)
+        if not is_completed:
+            yield True, None
+
+    def prefetch(self):
+        """ดึงแถวแรกก่อนเริ่ม stream: query ที่ผิดพลาดจะเกิดที่นี่ (ยังตอบเป็นหน้า error ได้) ไม่ใช่กลางหน้า"""
+        rows = self._rows()
+        self._prefetched = (next(rows, None), rows)
+
+    def rows(self):
+        if self._prefetched is None:
+            yield from self._rows()
+            return
+        first, rows = self._prefetched
+        self._prefetched = None
+        if first is not None:
+            yield first
+            yield from rows
+
+    def _rows(self):
+        model = self.model
+        count = 0
+        last = None
+        for is_completed, after in self._segments():
+            query = model.query.filter(model.is_completed == is_completed)
+            if after:
+                query = query.filter(tuple_(model.created_at, model.id) < after)
+            query = query.order_by(model.created_at.desc(), model.id.desc())
+            # ดึงเกินมา 1 แถวเพื่อตรวจว่ายังมีหน้าถัดไปหรือไม่
+            for todo in query.limit(self.limit - count + 1).yield_per(self.batch_size):
+                if count == self.limit:
+                    self.next_cursor = encode_dashboard_cursor(last, self.offset + count)
+                    return
+                count += 1
+                last = todo
+                yield todo
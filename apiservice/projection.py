@@ -0,0 +1,32 @@
+from sqlalchemy.orm import load_only
+from werkzeug.exceptions import BadRequest
+from models import TODO_FIELDS
+
+def parse_fields(value):
+    """อ่าน ?fields=id,title,is_completed คืนรายชื่อคอลัมน์ตามลำดับมาตรฐาน (None = ทุกคอลัมน์)
+
+    id จะถูกส่งกลับเสมอ เพื่อให้ client ใช้อ้างอิงรายการได้
+    """
+    if value is None:
+        return None
+    requested = {field.strip() for field in value.split(',') if field.strip()}
+    if not requested:
+        raise BadRequest("fields ต้องระบุอย่างน้อยหนึ่งคอลัมน์")
+    unknown = requested - set(TODO_FIELDS)
+    if unknown:
+        raise BadRequest(f"ไม่รู้จัก fields: {', '.join(sorted(unknown))} (ใช้ได้: {', '.join(TODO_FIELDS)})")
+    requested.add('id')
+    return tuple(field for field in TODO_FIELDS if field in requested)
+
+def load_fields(model, fields, *extra):
+    """options สำหรับ SELECT เฉพาะคอลัมน์ที่ต้องส่งออก และคอลัมน์ที่ต้องใช้ภายใน (เช่น cursor, ETag)"""
+    if fields is None:
+        return []
+    names = [field for field in TODO_FIELDS if field in fields or field in extra]
+    return [load_only(*(getattr(model, name) for name in names))]
+
+def select_columns(table, fields, *extra):
+    """รายการคอลัมน์สำหรับ SQL ที่เขียนเอง (เช่น การค้นหา) ตามหลักเดียวกับ load_fields"""
+    if fields is None:
+        return f'{table}.*'
+    return ', '.join(f'{table}.{field}' for field in TODO_FIELDS if field in fields or field in extra)
@@ -0,0 +1,84 @@
+from datetime import datetime
+from werkzeug.datastructures import MultiDict
+from models import db, Todo
+from id_layout import todo_id_layout
+from pagination import (parse_list_params, apply_list_filters, keyset_query, encode_cursor,
+                        DEFAULT_PAGE_SIZE, SORT_FIELDS, SORT_DIRECTIONS)
+
+def explain_query_plan(query):
+    """คืนรายการขั้นตอนจาก EXPLAIN QUERY PLAN ของ query"""
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    params = tuple(
+        str(value) if isinstance(value, datetime) else value
+        for value in (compiled.params[name] for name in compiled.positiontup)
+    )
+    rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params)
+    return [row[3] for row in rows]
+
+def cursor_bound(sort, direction):
+    """ขอบเขตจาก cursor ที่ต้องปรากฏในการค้นหา index (SEARCH) ของหน้าที่ไม่ใช่หน้าแรก
+
+    layout integer: id เป็น rowid ซึ่ง SQLite ไม่ใช้ใน row value ตอนค้นใน index
+    จึงค้นด้วยคอลัมน์ที่เรียงเพียงคอลัมน์เดียว (เริ่มที่ตำแหน่งของ cursor เช่นกัน)
+    """
+    op = '<' if direction == 'desc' else '>'
+    if todo_id_layout() == 'integer':
+        return f'{sort}{op}?'
+    return f'({sort},id){op}(?,?)'
+
+def list_query_cases():
+    """query ของ GET /api/todos ในรูปแบบที่ใช้บ่อย สร้างผ่านโค้ดชุดเดียวกับ route
+
+    คืน (label, query, ขอบเขตของ cursor ที่ต้องใช้ค้นใน index หรือ None สำหรับหน้าแรก)
+    ช่วงเวลาใช้คอลัมน์เดียวกับที่เรียง (เช่น sort=updated_at คู่กับ updated_after)
+    ถ้ากรองช่วงเวลาคนละคอลัมน์กับที่เรียง SQLite อาจเลือกเรียงผลที่กรองแล้วเอง ซึ่งยอมรับได้
+    """
+    # cursor อยู่กลางช่วงเวลาที่กรอง (ช่วงที่กรองจึงกว้างกว่า cursor)
+    sample = datetime(2024, 1, 15)
+    for sort in SORT_FIELDS:
+        prefix = sort[:-3]
+        filters = [
+            {},
+            {'is_completed': 'false'},
+            {'is_completed': 'true'},
+            {f'{prefix}_after': '2024-01-01'},
+            {f'{prefix}_before': '2024-02-01'},
+            {'is_completed': 'false', f'{prefix}_after': '2024-01-01', f'{prefix}_before': '2024-02-01'},
+        ]
+        for direction in SORT_DIRECTIONS:
+            for extra in filters:
+                args = MultiDict({'sort': sort, 'order': direction, **extra})
+                params = parse_list_params(args)
+                for cursor in (None, encode_cursor(sample, '1', sort, direction)):
+                    query = keyset_query(apply_list_filters(Todo.query, Todo, params, cursor), Todo,
+                                         DEFAULT_PAGE_SIZE + 1, cursor, sort, direction)
+                    label = '&'.join(f'{key}={value}' for key, value in args.items())
+                    if cursor:
+                        yield label + '&cursor=...', query, cursor_bound(sort, direction)
+                    else:
+                        yield label, query, None
+
+def check_plan(plan, bound=None):
+    """query ผ่านเมื่อไม่มีการเรียงลำดับใน temp b-tree และไม่ไล่อ่านทั้งตารางโดยไม่ใช้ index
+
+    ถ้าระบุ bound (หน้าที่มี cursor) การค้นใน index ต้องใช้ขอบเขตนี้ด้วย
+    ไม่เช่นนั้นทุกหน้าจะไล่อ่านจากต้นช่วงจนถึงตำแหน่งของ cursor
+    """
+    for detail in plan:
+        if 'USE TEMP B-TREE' in detail:
+            return False
+        if detail.startswith('SCAN todo') and 'INDEX' not in detail:
+            return False
+    if bound is not None:
+        return any(detail.startswith('SEARCH todo') and bound in detail for detail in plan)
+    return True
+
+def run_plan_checks(echo=print):
+    """ตรวจทุก query ใน list_query_cases แสดงผลผ่าน echo คืนจำนวน query ที่ไม่ผ่าน"""
+    failed = 0
+    for label, query, bound in list_query_cases():
+        plan = explain_query_plan(query)
+        ok = check_plan(plan, bound)
+        failed += 0 if ok else 1
+        echo(f"{'✅' if ok else '❌'} {label}: {' | '.join(plan)}")
+    return failed
@@ -0,0 +1,90 @@
+from werkzeug.exceptions import BadRequest
+from models import db, Todo
+from projection import select_columns
+
+# trigram ค้นได้เฉพาะคำที่ยาวตั้งแต่ 3 ตัวอักษร คำที่สั้นกว่านี้ใช้ LIKE กรองแทน
+MIN_TRIGRAM_LENGTH = 3
+MAX_QUERY_LENGTH = 200
+MAX_SEARCH_OFFSET = 1000
+
+# น้ำหนักของคอลัมน์ใน bm25 (title สำคัญกว่า description)
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+def _like_pattern(term, prefix_only=False):
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'{escaped}%' if prefix_only else f'%{escaped}%'
+
+def _fts_phrase(term):
+    # ครอบด้วย " เพื่อให้ตัวอักษรพิเศษของ FTS5 ถูกมองเป็นข้อความธรรมดา
+    return '"' + term.replace('"', '""') + '"'
+
+def parse_search_query(q):
+    """แยกคำค้นเป็นคำที่ใช้ FTS ได้ และคำสั้นที่ต้องกรองด้วย LIKE"""
+    q = (q or '').strip()
+    if not q:
+        raise BadRequest("ต้องระบุคำค้นหา (q)")
+    if len(q) > MAX_QUERY_LENGTH:
+        raise BadRequest(f"คำค้นหายาวได้ไม่เกิน {MAX_QUERY_LENGTH} ตัวอักษร")
+    terms = q.split()
+    long_terms = [term for term in terms if len(term) >= MIN_TRIGRAM_LENGTH]
+    short_terms = [term for term in terms if len(term) < MIN_TRIGRAM_LENGTH]
+    return q, long_terms, short_terms
+
+def parse_offset(value):
+    if value is None:
+        return 0
+    try:
+        offset = int(value)
+    except ValueError:
+        raise BadRequest("offset ต้องเป็นตัวเลข")
+    if offset < 0 or offset > MAX_SEARCH_OFFSET:
+        raise BadRequest(f"offset ต้องอยู่ระหว่าง 0 ถึง {MAX_SEARCH_OFFSET}")
+    return offset
+
+def search_todos(q, limit, offset=0, fields=None):
+    """ค้นหา todo จาก title และ description เรียงตามความเกี่ยวข้อง
+
+    - ใช้ index todo_fts (trigram) จึงค้นเจอทั้งคำขึ้นต้นและคำที่อยู่กลางข้อความ
+      รวมถึงภาษาไทยที่ไม่มีการเว้นวรรค
+    - รายการที่ title ขึ้นต้นด้วยคำค้นจะอยู่ก่อน (เหมาะกับการค้นขณะพิมพ์)
+    - fields จำกัดคอลัมน์ที่ SELECT (ดู projection.parse_fields)
+    คืนค่า (items, next_offset) โดย next_offset เป็น None เมื่อไม่มีหน้าถัดไป
+    """
+    columns = select_columns('todo', fields)
+    q, long_terms, short_terms = parse_search_query(q)
+    params = {'prefix': _like_pattern(q, prefix_only=True), 'limit': limit + 1, 'offset': offset}
+
+    like_filters = []
+    for index, term in enumerate(short_terms):
+        params[f'like{index}'] = _like_pattern(term)
+        like_filters.append(
+            f"(todo.title LIKE :like{index} ESCAPE '\\' OR todo.description LIKE :like{index} ESCAPE '\\')"
+        )
+
+    if long_terms:
+        params['match'] = ' '.join(_fts_phrase(term) for term in long_terms)
+        where = ' AND '.join(['todo_fts MATCH :match'] + like_filters)
+        sql = f"""
+            SELECT {columns} FROM todo_fts JOIN todo ON todo.rowid = todo_fts.rowid
+            WHERE {where}
+            ORDER BY (todo.title LIKE :prefix ESCAPE '\\') DESC,
+                     bm25(todo_fts, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}),
+                     todo.created_at DESC
+            LIMIT :limit OFFSET :offset
+        """
+    else:
+        # คำค้นสั้นเกินกว่าจะใช้ trigram ได้ ต้องไล่ค้นด้วย LIKE
+        sql = f"""
+            SELECT {columns} FROM todo
+            WHERE {' AND '.join(like_filters)}
+            ORDER BY (todo.title LIKE :prefix ESCAPE '\\') DESC, todo.created_at DESC
+            LIMIT :limit OFFSET :offset
+        """
+
+    rows = db.session.execute(
+        db.select(Todo).from_statement(db.text(sql).bindparams(**params))
+    ).scalars().all()
+    items = rows[:limit]
+    next_offset = offset + limit if len(rows) > limit and offset + limit <= MAX_SEARCH_OFFSET else None
+    return items, next_offset
@@ -0,0 +1,338 @@
+# รันแอปแบบ production: worker process หลายตัวที่ fork ไว้ล่วงหน้า รับการเชื่อมต่อจาก socket เดียวกัน
+# kill -HUP เริ่ม worker ชุดใหม่ทีละตัว (ไม่มี downtime) รันด้วย: python serve.py --workers 4 --bind 0.0.0.0:5000
+import argparse
+import importlib
+import json
+import os
+import random
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+from werkzeug.serving import make_server
+from werkzeug.wsgi import ClosingIterator
+from ids import ASSIGNED_WORKER_IDS
+from events import broker
+# สร้างตัวนับ generation ของแคช todo ใน shared memory ก่อน fork: ทุก worker เห็นการล้างแคชของกันและกัน
+import todo_cache
+
+DEFAULT_BIND = '127.0.0.1:5000'
+DEFAULT_MAX_REQUESTS = 10000
+DEFAULT_MAX_REQUESTS_JITTER = 1000
+DEFAULT_GRACEFUL_TIMEOUT = 30
+DEFAULT_READY_TIMEOUT = 60
+DEFAULT_WARMUP_PATH = '/api/todos?limit=1'
+# worker ที่ไม่รับ event ภายในเวลานี้ (วินาที) ถูกตัดออกจาก EventHub และกลับไปใช้ event ภายใน process ของตัวเอง
+RELAY_SEND_TIMEOUT = 5
+
+def default_workers():
+    return max(2, os.cpu_count() or 1)
+
+def load_app(target):
+    """โหลดแอปจาก 'module:attribute' (ค่าเริ่มต้น app:app)"""
+    module_name, _, attribute = target.partition(':')
+    return getattr(importlib.import_module(module_name), attribute or 'app')
+
+def prepare_worker(app, warmup_path=DEFAULT_WARMUP_PATH):
+    """ทิ้ง connection ที่อาจติดมาจาก process แม่ แล้ว warmup ก่อนรับ request จริง
+
+    warmup เปิด connection ของ SQLite (พร้อม pragma) และเรียก route จริงหนึ่งครั้ง
+    request แรกของผู้ใช้จึงไม่ต้องจ่ายค่าเริ่มต้นเหล่านี้
+    """
+    db = app.extensions['sqlalchemy']
+    with app.app_context():
+        # close=False: ไม่ปิด connection ของ process แม่ เพียงไม่ใช้ร่วมกันอีก
+        db.engine.dispose(close=False)
+        db.session.execute(db.text('SELECT 1'))
+        db.session.remove()
+    if warmup_path:
+        response = app.test_client().get(warmup_path)
+        response.close()
+
+class RequestCounter:
+    """WSGI middleware นับ request ที่ค้างอยู่และสั่งหยุดรับงานเมื่อครบ max_requests"""
+
+    def __init__(self, app, max_requests, on_limit):
+        self.app = app
+        self.max_requests = max_requests
+        self.on_limit = on_limit
+        self.handled = 0
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.active += 1
+            self.handled += 1
+            reached = self.max_requests and self.handled == self.max_requests
+        if reached:
+            self.on_limit()
+        try:
+            result = self.app(environ, start_response)
+        except BaseException:
+            self._finished()
+            raise
+        # response แบบ stream นับว่าจบเมื่อ server ปิด iterator แล้วเท่านั้น
+        return ClosingIterator(result, self._finished)
+
+    def _finished(self):
+        with self._lock:
+            self.active -= 1
+
+    def wait_idle(self, timeout):
+        deadline = time.monotonic() + timeout
+        while self.active > 0 and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+class EventHub:
+    """process แม่: รับ event จาก worker กำหนด id ด้วย events.broker ของ process แม่ แล้วส่งต่อให้ทุก worker
+
+    broker ของ process แม่เก็บ history ไว้ worker ที่ fork ใหม่จึงได้ history และ id ล่าสุดไปด้วย
+    client ที่ต่อใหม่พร้อม Last-Event-ID จึงได้ event ที่พลาดไปจาก worker ใดก็ได้
+    """
+
+    def __init__(self):
+        # fork ขณะถือ lock นี้: process ลูกจะไม่ได้ broker ที่ lock ค้างอยู่จาก thread ของ hub
+        # และ event ที่เกิดก่อน fork อยู่ใน history ส่วนที่เกิดหลัง fork ถูกส่งเข้า socket ของ worker ใหม่
+        self.lock = threading.Lock()
+        # socket ฝั่ง process แม่ของแต่ละ worker -> ข้อมูลที่ยังไม่ครบบรรทัด
+        self._buffers = {}
+        self._thread = threading.Thread(target=self._run, name='event-hub', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def add_worker(self):
+        """สร้างช่องทางของ worker ใหม่ (เรียกขณะถือ self.lock) คืน socket ฝั่ง worker"""
+        parent_end, worker_end = socket.socketpair()
+        parent_end.settimeout(RELAY_SEND_TIMEOUT)
+        self._buffers[parent_end] = b''
+        return worker_end
+
+    def close_in_child(self):
+        for sock in self._buffers:
+            sock.close()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                sockets = list(self._buffers)
+            if not sockets:
+                time.sleep(0.2)
+                continue
+            readable, _, _ = select.select(sockets, [], [], 0.2)
+            for sock in readable:
+                try:
+                    chunk = sock.recv(65536)
+                except OSError:
+                    chunk = b''
+                with self.lock:
+                    if sock not in self._buffers:
+                        continue
+                    if not chunk:
+                        # worker ออกไปแล้ว
+                        self._drop(sock)
+                        continue
+                    lines = (self._buffers[sock] + chunk).split(b'\n')
+                    self._buffers[sock] = lines.pop()
+                    for line in lines:
+                        event_type, data = json.loads(line)
+                        self._broadcast(broker.assign(event_type, data))
+
+    def _broadcast(self, event):
+        line = json.dumps(event, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+        for sock in list(self._buffers):
+            try:
+                sock.sendall(line)
+            except OSError:
+                self._drop(sock)
+
+    def _drop(self, sock):
+        del self._buffers[sock]
+        sock.close()
+
+def run_worker(get_app, listener, index, options, ready_fd, relay):
+    """ทำงานใน process ลูก: โหลดแอป warmup รับ request จนถูกสั่งหยุด แล้วออกจาก process"""
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    status = 0
+    try:
+        # รับ event ตั้งแต่ก่อนโหลดแอป: event ที่ส่งมาระหว่าง warmup ไม่ค้างอยู่ใน socket
+        broker.attach_relay(relay)
+        app = get_app()
+        prepare_worker(app, options.warmup_path)
+
+        stopping = threading.Event()
+
+        def stop():
+            if not stopping.is_set():
+                stopping.set()
+                threading.Thread(target=server.shutdown, daemon=True).start()
+
+        limit = options.max_requests
+        if limit:
+            limit += random.randint(0, options.max_requests_jitter)
+        counter = RequestCounter(app, limit, stop)
+        host, port = listener.getsockname()[:2]
+        server = make_server(host, port, counter, threaded=True, fd=listener.fileno())
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop())
+
+        # worker ตัวแรกทำงานลบข้อมูลเก่าเบื้องหลัง (ครั้งเดียวต่อทั้งเซิร์ฟเวอร์)
+        if index == 0:
+            from maintenance import BackgroundPurger
+            BackgroundPurger(app).start()
+
+        os.write(ready_fd, b'1')
+        os.close(ready_fd)
+        server.serve_forever()
+        counter.wait_idle(options.graceful_timeout)
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        status = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(status)
+
+class Arbiter:
+    """process แม่: เปิด socket, fork worker, ดูแลให้มีครบจำนวน และจัดการ signal"""
+
+    def __init__(self, get_app, options):
+        self.get_app = get_app
+        self.options = options
+        self.workers = {}
+        self.retiring = set()
+        self.hub = EventHub()
+        self._reload = False
+        self._stop = False
+
+    def run(self):
+        host, _, port = self.options.bind.rpartition(':')
+        listener = socket.create_server((host or '0.0.0.0', int(port)), backlog=2048)
+        listener.set_inheritable(True)
+        self.listener = listener
+
+        self.hub.start()
+
+        signal.signal(signal.SIGHUP, lambda signum, frame: setattr(self, '_reload', True))
+        signal.signal(signal.SIGTERM, lambda signum, frame: setattr(self, '_stop', True))
+        signal.signal(signal.SIGINT, lambda signum, frame: setattr(self, '_stop', True))
+
+        print(f"🚀 {self.options.workers} workers ที่ http://{self.options.bind} (pid {os.getpid()})", flush=True)
+        for index in range(self.options.workers):
+            self.wait_ready(self.spawn(index))
+
+        while not self._stop:
+            self.reap()
+            if self._reload:
+                self._reload = False
+                self.rolling_restart()
+            time.sleep(0.2)
+        self.shutdown()
+
+    def free_worker_id(self):
+        # worker id ของ ID แบบ Snowflake (ids.py) ต้องไม่ซ้ำกับ worker ที่ยังทำงานอยู่ รวมถึงตัวเก่าระหว่าง rolling restart
+        in_use = {worker_id for _, worker_id, _ in self.workers.values()}
+        return next(worker_id for worker_id in range(ASSIGNED_WORKER_IDS) if worker_id not in in_use)
+
+    def spawn(self, index):
+        worker_id = self.free_worker_id()
+        read_fd, write_fd = os.pipe()
+        with self.hub.lock:
+            relay = self.hub.add_worker()
+            pid = os.fork()
+            if pid == 0:
+                os.close(read_fd)
+                self.hub.close_in_child()
+                for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+                    signal.signal(signum, signal.SIG_DFL)
+                os.environ['WORKER_ID'] = str(worker_id)
+                run_worker(self.get_app, self.listener, index, self.options, write_fd, relay)
+        relay.close()
+        os.close(write_fd)
+        self.workers[pid] = (index, worker_id, read_fd)
+        return pid
+
+    def wait_ready(self, pid):
+        """รอ worker แจ้งว่า warmup เสร็จ คืน False ถ้าไม่พร้อมภายในเวลาที่กำหนด"""
+        _, _, read_fd = self.workers[pid]
+        ready, _, _ = select.select([read_fd], [], [], DEFAULT_READY_TIMEOUT)
+        ok = bool(ready) and os.read(read_fd, 1) == b'1'
+        if not ok:
+            print(f'⚠️ worker {pid} เริ่มต้นไม่สำเร็จหรือไม่พร้อมภายใน {DEFAULT_READY_TIMEOUT} วินาที', file=sys.stderr, flush=True)
+        return ok
+
+    def reap(self):
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            index, _, read_fd = self.workers.pop(pid, (None, None, None))
+            if read_fd is not None:
+                os.close(read_fd)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+            elif index is not None and not self._stop:
+                # worker หยุดเอง (ครบ max-requests หรือผิดพลาด) เริ่มตัวใหม่แทน
+                if not self.wait_ready(self.spawn(index)):
+                    # โหลดแอปไม่สำเร็จ: หน่วงไว้ก่อนเพื่อไม่ให้ fork วนซ้ำไม่หยุด
+                    time.sleep(1)
+
+    def rolling_restart(self):
+        print('🔄 rolling restart', flush=True)
+        for pid, (index, _, _) in list(self.workers.items()):
+            if pid in self.retiring:
+                continue
+            if self.wait_ready(self.spawn(index)):
+                self.retiring.add(pid)
+                os.kill(pid, signal.SIGTERM)
+
+    def shutdown(self):
+        for pid in list(self.workers):
+            self.retiring.add(pid)
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.options.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in self.workers:
+            os.kill(pid, signal.SIGKILL)
+        self.listener.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='รัน Todo API ด้วยหลาย worker process')
+    parser.add_argument('--app', default='app:app', help='แอปที่จะรัน (module:attribute)')
+    parser.add_argument('--bind', default=os.environ.get('BIND', DEFAULT_BIND))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WORKERS', 0)) or default_workers())
+    parser.add_argument('--max-requests', type=int, default=DEFAULT_MAX_REQUESTS,
+                        help='จำนวน request ก่อนเปลี่ยน worker ใหม่ (0 = ไม่จำกัด)')
+    parser.add_argument('--max-requests-jitter', type=int, default=DEFAULT_MAX_REQUESTS_JITTER,
+                        help='สุ่มเพิ่มจาก max-requests เพื่อไม่ให้ทุก worker เปลี่ยนพร้อมกัน')
+    parser.add_argument('--graceful-timeout', type=int, default=DEFAULT_GRACEFUL_TIMEOUT)
+    parser.add_argument('--warmup-path', default=DEFAULT_WARMUP_PATH,
+                        help='path ที่เรียกหนึ่งครั้งก่อน worker เริ่มรับ request (ว่าง = ไม่ warmup)')
+    return parser.parse_args(argv)
+
+def serve(get_app, argv=None):
+    """เริ่ม process แม่ get_app ถูกเรียกใน worker แต่ละตัวหลัง fork"""
+    Arbiter(get_app, parse_args(argv)).run()
+
+if __name__ == '__main__':
+    from factory import prepare_database
+
+    options = parse_args()
+    app = load_app(options.app)
+    # สร้างตารางในฐานข้อมูลและเพิ่มข้อมูลตัวอย่างถ้ายังไม่มี (ครั้งเดียวใน process แม่ก่อน fork)
+    prepare_database(app)
+    with app.app_context():
+        app.extensions['sqlalchemy'].engine.dispose()
+    Arbiter(lambda: app, options).run()
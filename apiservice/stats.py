@@ -0,0 +1,42 @@
+from models import db, Todo, TodoCounter
+
+def _stats(total, completed):
+    return {
+        'total': total,
+        'completed': completed,
+        'pending': total - completed,
+        'completion_rate': round((completed / total * 100) if total > 0 else 0, 2)
+    }
+
+def read_stats():
+    """อ่านสถิติจากตัวนับที่ trigger ดูแล (อ่านแถวเดียว ไม่ต้อง COUNT ทั้งตาราง)"""
+    row = db.session.execute(
+        db.select(TodoCounter.total, TodoCounter.completed).where(TodoCounter.id == 1)
+    ).first()
+    if row is None:
+        # ยังไม่ได้เตรียมตัวนับ (ยังไม่ได้เรียก init_db) ใช้การนับแบบเดิมแทน
+        return count_stats()
+    return _stats(row.total, row.completed)
+
+def count_stats():
+    """นับสถิติจากตาราง todo โดยตรง (ใช้ตรวจสอบและสร้างตัวนับใหม่)"""
+    total = Todo.query.count()
+    completed = Todo.query.filter_by(is_completed=True).count()
+    return _stats(total, completed)
+
+def check_counters(repair=False):
+    """ตรวจว่าตัวนับตรงกับข้อมูลจริงหรือไม่ และสร้างใหม่ทั้งหมดเมื่อ repair=True"""
+    row = db.session.get(TodoCounter, 1)
+    actual = count_stats()
+    stored = _stats(row.total, row.completed) if row else None
+    consistent = stored == actual
+
+    if repair and not consistent:
+        if row is None:
+            row = TodoCounter(id=1)
+            db.session.add(row)
+        row.total = actual['total']
+        row.completed = actual['completed']
+        db.session.commit()
+
+    return {'stored': stored, 'actual': actual, 'consistent': consistent}
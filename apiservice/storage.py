@@ -0,0 +1,83 @@
+import sqlite3
+from sqlalchemy import event
+
+# ค่า PRAGMA ที่ตั้งให้ทุก connection ของ SQLite
+#   durable: WAL + synchronous=FULL ทุก commit ที่ตอบกลับแล้วจะไม่หายแม้ไฟดับ
+#   fast:    WAL + synchronous=NORMAL fsync เฉพาะตอน checkpoint (ไฟดับอาจเสีย commit ล่าสุด แต่ไฟล์ไม่เสีย)
+#            พร้อม cache และ mmap ที่ใหญ่ขึ้น
+STORAGE_PROFILES = {
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'temp_store': 'MEMORY',
+        'cache_size': -16000,
+        'mmap_size': 0,
+    },
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+    },
+}
+
+DEFAULT_STORAGE_PROFILE = 'durable'
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+DEFAULT_POOL_SIZE = 10
+DEFAULT_POOL_OVERFLOW = 20
+# RETURNING (insert / bulk / idempotency) ต้องใช้ 3.35 และ FTS5 แบบ trigram (search.py) ต้องใช้ 3.34
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+def check_sqlite_version(version_info=sqlite3.sqlite_version_info):
+    if version_info < MIN_SQLITE_VERSION:
+        required = '.'.join(map(str, MIN_SQLITE_VERSION))
+        found = '.'.join(map(str, version_info))
+        raise RuntimeError(f'ต้องใช้ SQLite {required} ขึ้นไป (พบ {found})')
+
+def storage_pragmas(profile, busy_timeout_ms=DEFAULT_BUSY_TIMEOUT_MS):
+    """รายการ PRAGMA ของ profile (รวม busy_timeout: รอ lock แทนการแจ้ง database is locked ทันที)"""
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(f"SQLITE_PROFILE ต้องเป็น {' หรือ '.join(STORAGE_PROFILES)}")
+    pragmas = dict(STORAGE_PROFILES[profile])
+    pragmas['busy_timeout'] = busy_timeout_ms
+    return pragmas
+
+def apply_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+def install_pragmas(engine, pragmas):
+    """ตั้ง PRAGMA ทุกครั้งที่ pool เปิด connection ใหม่"""
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+def init_storage(app, db):
+    """เริ่มต้น SQLAlchemy ด้วย profile ของ SQLite ตาม app.config['SQLITE_PROFILE']
+
+    ใช้แทน db.init_app(app) เพราะต้องกำหนดค่า pool ก่อนที่ engine จะถูกสร้าง
+    """
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite'):
+        check_sqlite_version()
+    pragmas = storage_pragmas(app.config.get('SQLITE_PROFILE', DEFAULT_STORAGE_PROFILE),
+                              app.config.get('SQLITE_BUSY_TIMEOUT_MS', DEFAULT_BUSY_TIMEOUT_MS))
+
+    # ฐานข้อมูลในหน่วยความจำใช้ pool แบบพิเศษของ SQLAlchemy จึงกำหนดเฉพาะฐานข้อมูลที่เป็นไฟล์
+    if uri.startswith('sqlite:///') and ':memory:' not in uri:
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.setdefault('pool_size', app.config.get('SQLITE_POOL_SIZE', DEFAULT_POOL_SIZE))
+        options.setdefault('max_overflow', app.config.get('SQLITE_POOL_OVERFLOW', DEFAULT_POOL_OVERFLOW))
+        connect_args = options.setdefault('connect_args', {})
+        # timeout ของ sqlite3 ใช้ตอนเปิด connection (ก่อนที่ busy_timeout จะถูกตั้ง)
+        connect_args.setdefault('timeout', pragmas['busy_timeout'] / 1000)
+        connect_args.setdefault('check_same_thread', False)
+
+    db.init_app(app)
+    with app.app_context():
+        install_pragmas(db.engine, pragmas)
@@ -0,0 +1,60 @@
+from flask import current_app, stream_with_context
+from werkzeug.exceptions import BadRequest
+from models import TODO_FIELDS
+
+STREAM_FORMATS = ('json', 'ndjson')
+DEFAULT_STREAM_BATCH_SIZE = 500
+
+def parse_stream_format(value):
+    """อ่าน ?stream=json|ndjson (None = ไม่ stream)"""
+    if value is None:
+        return None
+    if value not in STREAM_FORMATS:
+        raise BadRequest(f"stream ต้องเป็น {' หรือ '.join(STREAM_FORMATS)}")
+    return value
+
+def iter_rows(query, model, fields=None, batch_size=DEFAULT_STREAM_BATCH_SIZE):
+    """ไล่อ่านแถวทีละ batch ด้วย yield_per และคืน dict ของแต่ละแถว
+
+    SELECT เฉพาะคอลัมน์ (ไม่สร้าง ORM object) จึงไม่มีอะไรค้างใน session ระหว่าง stream
+    """
+    columns = [getattr(model, field) for field in fields or TODO_FIELDS]
+    for row in query.with_entities(*columns).yield_per(batch_size):
+        yield row._asdict()
+
+def _chunks(rows, batch_size, encode):
+    # รวมหลายแถวเป็น chunk เดียวเพื่อลดจำนวนครั้งที่เขียนลง socket
+    chunk = []
+    for row in rows:
+        chunk.append(encode(row))
+        if len(chunk) == batch_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def generate_json(rows, batch_size, message):
+    """เขียน JSON รูปแบบเดียวกับ response ปกติ ({"data": [...], ...}) ทีละส่วน"""
+    encode = current_app.json.dumps_bytes
+    yield b'{"data":['
+    first = True
+    for chunk in _chunks(rows, batch_size, encode):
+        yield (b'' if first else b',') + b','.join(chunk)
+        first = False
+    yield b'],' + encode({'message': message, 'next_cursor': None, 'success': True})[1:] + b'\n'
+
+def generate_ndjson(rows, batch_size):
+    """เขียน NDJSON หนึ่งบรรทัดต่อหนึ่งรายการ"""
+    encode = current_app.json.dumps_bytes
+    for chunk in _chunks(rows, batch_size, encode):
+        yield b'\n'.join(chunk) + b'\n'
+
+def stream_response(query, model, stream_format, fields=None, message=''):
+    """สร้าง response แบบ chunked ที่ใช้หน่วยความจำคงที่ไม่ว่าข้อมูลจะมีกี่แถว"""
+    batch_size = current_app.config.get('STREAM_BATCH_SIZE', DEFAULT_STREAM_BATCH_SIZE)
+    rows = iter_rows(query, model, fields, batch_size)
+    if stream_format == 'ndjson':
+        body, mimetype = generate_ndjson(rows, batch_size), 'application/x-ndjson; charset=utf-8'
+    else:
+        body, mimetype = generate_json(rows, batch_size, message), current_app.json.mimetype
+    return current_app.response_class(stream_with_context(body), content_type=mimetype)
@@ -0,0 +1,127 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import tuple_, func
+from werkzeug.exceptions import BadRequest
+from models import db, Todo, TodoTombstone
+
+# ค่าเริ่มต้นของนโยบายเก็บ tombstone และช่วงเวลารอให้ transaction ที่ค้างอยู่ commit
+DEFAULT_TOMBSTONE_RETENTION_DAYS = 30
+DEFAULT_SYNC_SETTLE_SECONDS = 2
+
+class SyncTokenExpired(Exception):
+    """token เก่าเกินระยะเวลาที่เก็บ tombstone ไว้ ต้อง sync ใหม่ทั้งหมด"""
+    pass
+
+def _retention():
+    return timedelta(days=current_app.config.get('TOMBSTONE_RETENTION_DAYS', DEFAULT_TOMBSTONE_RETENTION_DAYS))
+
+def encode_sync_token(state):
+    """แปลงสถานะการ sync เป็น token แบบ opaque"""
+    raw = json.dumps({
+        'u': [state['u'][0].isoformat(), state['u'][1]] if state['u'] else None,
+        'd': state['d'],
+        't': state['t'].isoformat()
+    }, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_sync_token(token):
+    """แปลง token กลับเป็นสถานะการ sync
+
+    u = (updated_at, id) ของ todo ล่าสุดที่ client ได้รับแล้ว
+    d = seq ของ tombstone ล่าสุดที่ client ได้รับแล้ว
+    t = เวลาที่ client sync ครบล่าสุด ใช้ตรวจกับระยะเวลาเก็บ tombstone
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        u = raw['u']
+        return {
+            'u': (datetime.fromisoformat(u[0]), str(u[1])) if u else None,
+            'd': int(raw['d']),
+            't': datetime.fromisoformat(raw['t'])
+        }
+    except (ValueError, TypeError, KeyError, IndexError):
+        raise BadRequest("sync token ไม่ถูกต้อง")
+
+def get_changes(token, limit):
+    """ดึงรายการ todo ที่ถูกสร้าง/แก้ไข และ id ที่ถูกลบ นับจาก token ที่ระบุ
+
+    client ควรนำรายการ deleted ไปลบก่อนแล้วจึงนำ upserted ไปบันทึกทับ
+    ถ้าไม่มี token จะเริ่ม sync ใหม่ทั้งหมด (ส่งเฉพาะ todo ที่มีอยู่ตอนนี้)
+    """
+    now = datetime.utcnow()
+    if token:
+        state = decode_sync_token(token)
+        if state['t'] < now - _retention():
+            raise SyncTokenExpired()
+    else:
+        max_seq = db.session.query(func.max(TodoTombstone.seq)).scalar() or 0
+        state = {'u': None, 'd': max_seq, 't': now}
+
+    # todo ที่ถูกสร้างหรือแก้ไข ไล่ตาม index (updated_at, id)
+    query = Todo.query
+    if state['u']:
+        query = query.filter(tuple_(Todo.updated_at, Todo.id) > state['u'])
+    todos = query.order_by(Todo.updated_at.asc(), Todo.id.asc()).limit(limit + 1).all()
+
+    # tombstone ที่เกิดหลัง seq ล่าสุด (ข้าม id ที่ถูกสร้างใหม่แล้ว เพราะจะมาทาง upserted แทน)
+    tombstones = TodoTombstone.query.filter(
+        TodoTombstone.seq > state['d'],
+        ~db.session.query(Todo.id).filter(Todo.id == TodoTombstone.todo_id).exists()
+    ).order_by(TodoTombstone.seq.asc()).limit(limit + 1).all()
+
+    todos_more = len(todos) > limit
+    tombstones_more = len(tombstones) > limit
+    todos = todos[:limit]
+    tombstones = tombstones[:limit]
+
+    # updated_at ถูกกำหนดก่อน commit จึงอาจมี transaction ที่ commit ช้ากว่าแถวที่ใหม่กว่า
+    # ไม่เลื่อนตำแหน่งผ่านแถวที่ยังอยู่ในช่วงรอ แถวเหล่านั้นจะถูกส่งซ้ำในรอบถัดไป (upsert ซ้ำได้)
+    settle = timedelta(seconds=current_app.config.get('SYNC_SETTLE_SECONDS', DEFAULT_SYNC_SETTLE_SECONDS))
+    horizon = now - settle
+    settled = [todo for todo in todos if todo.updated_at <= horizon]
+    if len(settled) < len(todos):
+        todos_more = False
+    has_more = todos_more or tombstones_more
+
+    next_state = {
+        'u': (settled[-1].updated_at, settled[-1].id) if settled else state['u'],
+        'd': tombstones[-1].seq if tombstones else state['d'],
+        # อัปเดตเวลา sync ครบเมื่อไม่มีหน้าถัดไปแล้วเท่านั้น
+        't': state['t'] if has_more else now
+    }
+
+    return {
+        'upserted': [todo.to_json() for todo in todos],
+        'deleted': [tombstone.todo_id for tombstone in tombstones],
+        'next_token': encode_sync_token(next_state),
+        'has_more': has_more
+    }
+
+def compact_tombstones(retention_days=None):
+    """บีบอัดตาราง tombstone ให้มีขนาดจำกัด
+
+    - ลบ tombstone ที่เก่าเกินระยะเวลาที่กำหนด (client ที่ token เก่ากว่านี้ต้อง sync ใหม่)
+    - ลบ tombstone ของ id ที่ถูกสร้างขึ้นใหม่แล้ว
+    - เก็บ tombstone ล่าสุดไว้เพียงรายการเดียวต่อหนึ่ง id
+    """
+    if retention_days is None:
+        cutoff = datetime.utcnow() - _retention()
+    else:
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+
+    expired = TodoTombstone.query.filter(TodoTombstone.deleted_at < cutoff).delete(synchronize_session=False)
+
+    recreated = TodoTombstone.query.filter(
+        db.session.query(Todo.id).filter(Todo.id == TodoTombstone.todo_id).exists()
+    ).delete(synchronize_session=False)
+
+    latest = db.session.query(func.max(TodoTombstone.seq)).group_by(TodoTombstone.todo_id)
+    duplicates = TodoTombstone.query.filter(
+        TodoTombstone.seq.not_in(latest.scalar_subquery())
+    ).delete(synchronize_session=False)
+
+    db.session.commit()
+    return {'expired': expired, 'recreated': recreated, 'duplicates': duplicates}
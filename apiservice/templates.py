@@ -147,10 +147,10 @@ HOME_TEMPLATE = """
         <div class="table-container fade-in">
             <h4 class="mb-3">
                 <i class="fas fa-table me-2"></i>รายการงาน
-                {% if todos %}({{ todos|length }} รายการ){% endif %}
+                {% if stats.total %}({{ stats.total }} รายการ){% endif %}
             </h4>
             
-            {% if todos %}
+            {% if stats.total > 0 %}
             <div class="table-responsive">
                 <table class="table table-hover">
                     <thead class="table-dark">
@@ -164,9 +164,9 @@ HOME_TEMPLATE = """
                         </tr>
                     </thead>
                     <tbody>
-                        {% for todo in todos %}
+                        {% for todo in page.rows() %}
                         <tr class="{{ 'completed-row' if todo.is_completed else '' }}">
-                            <td>{{ loop.index }}</td>
+                            <td>{{ page.offset + loop.index }}</td>
                             <td class="{{ 'completed-text' if todo.is_completed else '' }}">
                                 <strong>{{ todo.title }}</strong>
                             </td>
@@ -209,6 +209,26 @@ HOME_TEMPLATE = """
                     </tbody>
                 </table>
             </div>
+
+            <!-- Pagination -->
+            {% if page.cursor or page.next_cursor %}
+            <nav class="d-flex justify-content-between mt-3">
+                <div>
+                    {% if page.cursor %}
+                    <a href="/" class="btn btn-outline-secondary btn-sm btn-custom">
+                        <i class="fas fa-angle-double-left me-1"></i>หน้าแรก
+                    </a>
+                    {% endif %}
+                </div>
+                <div>
+                    {% if page.next_cursor %}
+                    <a href="/?cursor={{ page.next_cursor }}" class="btn btn-outline-primary btn-sm btn-custom">
+                        หน้าถัดไป<i class="fas fa-angle-right ms-1"></i>
+                    </a>
+                    {% endif %}
+                </div>
+            </nav>
+            {% endif %}
             {% else %}
             <div class="text-center py-5">
                 <i class="fas fa-inbox fa-4x text-muted mb-3"></i>
@@ -342,6 +362,25 @@ HOME_TEMPLATE = """
             }
         }
 
+        // รับการเปลี่ยนแปลงจาก client อื่นแบบ real-time แล้วโหลดหน้าใหม่ (ยกเว้นระหว่างเปิดฟอร์ม)
+        if (window.EventSource) {
+            let reloadTimer = null;
+            const scheduleReload = () => {
+                clearTimeout(reloadTimer);
+                reloadTimer = setTimeout(() => {
+                    if (document.querySelector('.modal.show')) {
+                        scheduleReload();
+                    } else {
+                        location.reload();
+                    }
+                }, 500);
+            };
+            const source = new EventSource('/api/todos/stream');
+            ['created', 'updated', 'deleted', 'resync'].forEach(type => {
+                source.addEventListener(type, scheduleReload);
+            });
+        }
+
         // Auto hide alerts after 5 seconds
         setTimeout(function() {
             const alerts = document.querySelectorAll('.alert');
@@ -409,7 +448,35 @@ API_INFO_TEMPLATE = """
                             
                             <div class="endpoint">
                                 <strong class="method-get">GET</strong> <code>/api/todos</code>
-                                <p class="mb-1">ดึงรายการ Todo ทั้งหมด</p>
+                                <p class="mb-1">ดึงรายการ Todo แบบแบ่งหน้า พร้อมกรองและเรียงลำดับ (ค่าเริ่มต้นเรียงจากใหม่ไปเก่า)</p>
+                                <small class="text-muted">Query: limit (ค่าเริ่มต้น 50, สูงสุด 500), cursor (ค่า next_cursor จากหน้าก่อน), all=true เพื่อดึงทั้งหมด</small><br>
+                                <small class="text-muted">กรอง: is_completed=true|false, created_after / created_before, updated_after / updated_before (ISO 8601) — เรียง: sort=created_at|updated_at, order=asc|desc (cursor ใช้ได้กับการเรียงแบบเดียวกันเท่านั้น)</small><br>
+                                <small class="text-muted">fields=id,title,is_completed เพื่อดึงเฉพาะคอลัมน์ที่ต้องการ (id ถูกส่งเสมอ ใช้ได้กับ /api/todos/{id} และ /api/todos/search ด้วย)</small><br>
+                                <small class="text-muted">stream=json ส่งทุกรายการที่ตรงเงื่อนไขแบบ chunked (รูปแบบเดียวกับ all=true) หรือ stream=ndjson หนึ่งบรรทัดต่อหนึ่งรายการ โดย server ใช้หน่วยความจำคงที่</small>
+                            </div>
+
+                            <div class="endpoint">
+                                <strong class="method-get">GET</strong> <code>/api/todos/search</code>
+                                <p class="mb-1">ค้นหา Todo จากชื่อและรายละเอียด เรียงตามความเกี่ยวข้อง (รองรับภาษาไทยและการค้นขณะพิมพ์)</p>
+                                <small class="text-muted">Query: q (คำค้น), limit, offset (ค่า next_offset จากหน้าก่อน)</small>
+                            </div>
+
+                            <div class="endpoint">
+                                <strong class="method-get">GET</strong> <code>/api/todos/export</code>
+                                <p class="mb-1">ส่งออกทุกรายการเป็น NDJSON (หนึ่งบรรทัดต่อหนึ่งรายการ) สำหรับสำรองข้อมูล</p>
+                                <small class="text-muted">Query: summary=true (ต่อท้ายด้วยบรรทัด _summary: จำนวนแถว เวลา และ rows/s การนำเข้าข้ามบรรทัดนี้)</small>
+                            </div>
+
+                            <div class="endpoint">
+                                <strong class="method-post">POST</strong> <code>/api/todos/import</code>
+                                <p class="mb-1">นำเข้า NDJSON: รายการที่มี id อยู่แล้วจะถูกแก้ไข ที่ยังไม่มีจะถูกเพิ่ม บันทึกทีละ batch</p>
+                                <small class="text-muted">Content-Type: application/x-ndjson — ตอบกลับจำนวนที่นำเข้า, บรรทัดที่ไม่ผ่าน และ rows_per_second (updated_at เป็นเวลาที่นำเข้า)</small>
+                            </div>
+
+                            <div class="endpoint">
+                                <strong class="method-get">GET</strong> <code>/api/todos/changes</code>
+                                <p class="mb-1">ดึงเฉพาะ Todo ที่ถูกสร้าง/แก้ไข/ลบ ตั้งแต่ครั้งล่าสุด (delta sync)</p>
+                                <small class="text-muted">Query: since (ค่า next_token จากครั้งก่อน, เว้นว่างเพื่อเริ่มใหม่), limit — ตอบ 410 เมื่อ token หมดอายุ</small>
                             </div>
 
                             <div class="endpoint">
@@ -423,6 +490,12 @@ API_INFO_TEMPLATE = """
                                 <small class="text-muted">Body: {"title": "string", "description": "string", "is_completed": boolean}</small>
                             </div>
 
+                            <div class="endpoint">
+                                <strong class="method-post">POST</strong> <code>/api/todos/batch</code>
+                                <p class="mb-1">เพิ่ม Todo หลายรายการใน transaction เดียว (สูงสุด 5000 รายการ)</p>
+                                <small class="text-muted">Body: {"todos": [{"title": "string", ...}], "mode": "atomic" | "partial"} — ตอบผลแยกรายการใน data.results</small>
+                            </div>
+
                             <div class="endpoint">
                                 <strong class="method-put">PUT</strong> <code>/api/todos/{id}</code>
                                 <p class="mb-1">แก้ไข Todo</p>
@@ -439,6 +512,18 @@ API_INFO_TEMPLATE = """
                                 <p class="mb-1">ลบ Todo</p>
                             </div>
 
+                            <div class="endpoint">
+                                <strong class="method-patch">PATCH</strong> <code>/api/todos/bulk</code>
+                                <p class="mb-1">เปลี่ยนสถานะหลายรายการในคำสั่งเดียว</p>
+                                <small class="text-muted">Body: {"ids": ["..."]} หรือ {"filter": {"is_completed": boolean}} พร้อม {"action": "toggle"} หรือ {"action": "set", "set": {"is_completed": boolean}}</small>
+                            </div>
+
+                            <div class="endpoint">
+                                <strong class="method-delete">DELETE</strong> <code>/api/todos/bulk</code>
+                                <p class="mb-1">ลบหลายรายการในคำสั่งเดียว</p>
+                                <small class="text-muted">Body: {"ids": ["..."]} หรือ {"filter": {"is_completed": boolean}} — ตอบ id ที่ถูกลบใน data.ids</small>
+                            </div>
+
                             <div class="endpoint">
                                 <strong class="method-get">GET</strong> <code>/api/todos/stats</code>
                                 <p class="mb-1">ดึงสถิติ Todo</p>
@@ -447,6 +532,7 @@ API_INFO_TEMPLATE = """
                             <div class="endpoint">
                                 <strong class="method-delete">DELETE</strong> <code>/api/todos/completed</code>
                                 <p class="mb-1">ลบงานที่เสร็จแล้วทั้งหมด</p>
+                                <small class="text-muted">งานที่ลบจะถูกเก็บถาวรไว้ในตาราง archived_todo ตามระยะเวลาที่ตั้งค่าไว้ ก่อนถูกลบทิ้งโดยอัตโนมัติ</small>
                             </div>
                         </div>
 
@@ -459,6 +545,21 @@ API_INFO_TEMPLATE = """
 }</code></pre>
                         </div>
 
+                        <div class="mb-4">
+                            <h5>Real-time Events</h5>
+                            <div class="endpoint">
+                                <strong class="method-get">GET</strong> <code>/api/todos/stream</code>
+                                <p class="mb-1">รับ event <code>created</code>, <code>updated</code>, <code>deleted</code> แบบ Server-Sent Events</p>
+                                <small class="text-muted">ส่ง header <code>Last-Event-ID</code> เพื่อรับ event ที่พลาดไป ถ้าได้รับ event <code>resync</code> ให้ดึงข้อมูลใหม่ผ่าน <code>/api/todos/changes</code></small>
+                            </div>
+                        </div>
+
+                        <div class="mb-4">
+                            <h5>Conditional Requests</h5>
+                            <p class="mb-1"><code>GET /api/todos</code>, <code>GET /api/todos/{id}</code> และ <code>GET /api/todos/stats</code> ส่ง header <code>ETag</code> กลับมา</p>
+                            <small class="text-muted">ส่งค่าเดิมกลับใน header <code>If-None-Match</code> ถ้าข้อมูลไม่เปลี่ยนจะได้ 304 Not Modified โดยไม่มี body</small>
+                        </div>
+
                         <div class="mb-4">
                             <h5>Web Interface</h5>
                             <div class="endpoint">
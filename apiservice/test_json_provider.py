@@ -0,0 +1,74 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from flask.json.provider import DefaultJSONProvider
+from factory import create_app
+from models import Todo
+import json_provider
+from json_provider import FastJSONProvider
+
+# ผลลัพธ์ของ FastJSONProvider (orjson และ json ของ Python) ต้องมีความหมายเดียวกับรูปแบบเดิม (to_dict + jsonify)
+
+SAMPLES = [
+    {'id': '1', 'title': 'ซื้อของ', 'description': 'นม ไข่ ขนมปัง', 'is_completed': False,
+     'created_at': datetime(2024, 1, 31, 8, 0, 0, 123456), 'updated_at': datetime(2024, 1, 31, 8, 0, 0)},
+    {'id': '2', 'title': 'quote " backslash \\ <tag> & emoji 🎉', 'description': '', 'is_completed': True,
+     'created_at': datetime(2024, 2, 29, 23, 59, 59, 1), 'updated_at': datetime(2024, 3, 1)},
+    {'id': '3', 'title': 'ไม่มีวันที่', 'description': None, 'is_completed': None,
+     'created_at': None, 'updated_at': None},
+]
+
+FIELD_SETS = [None, ('id', 'title', 'is_completed'), ('id', 'created_at')]
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'json.db'}")
+    return create_app('api')
+
+@pytest.fixture
+def todos():
+    base = datetime(2024, 1, 1)
+    return [Todo(**sample) for sample in SAMPLES] + [
+        Todo(id=str(1700000000000 + i), title=f'งานที่ {i}', description='รายละเอียด ' * 5,
+             is_completed=i % 3 == 0, created_at=base + timedelta(seconds=i, microseconds=i),
+             updated_at=base + timedelta(seconds=i))
+        for i in range(50)
+    ]
+
+@pytest.fixture(params=['orjson', 'json'])
+def provider(request, app, monkeypatch):
+    if request.param == 'orjson' and json_provider.orjson is None:
+        pytest.skip('ไม่ได้ติดตั้ง orjson')
+    if request.param == 'json':
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    return FastJSONProvider(app)
+
+def legacy_body(app, todos, fields=None):
+    return DefaultJSONProvider(app).dumps({'data': [todo.to_dict(fields) for todo in todos]})
+
+def fast_body(provider, todos, fields=None):
+    return provider.dumps_bytes({'data': [todo.to_json(fields) for todo in todos]})
+
+@pytest.mark.parametrize('fields', FIELD_SETS)
+def test_matches_legacy_output(app, provider, todos, fields):
+    assert json.loads(fast_body(provider, todos, fields)) == json.loads(legacy_body(app, todos, fields))
+
+@pytest.mark.parametrize('fields', FIELD_SETS)
+def test_keys_sorted_like_legacy(provider, todos, fields):
+    # key ต้องเรียงตามตัวอักษรเหมือนเดิม เพื่อให้ ETag/การ cache ฝั่ง client ไม่เปลี่ยน
+    for item in json.loads(fast_body(provider, todos, fields))['data']:
+        assert list(item) == sorted(item)
+
+@pytest.mark.parametrize('fields', FIELD_SETS)
+def test_backends_produce_same_bytes(app, todos, fields, monkeypatch):
+    if json_provider.orjson is None:
+        pytest.skip('ไม่ได้ติดตั้ง orjson')
+    fast = fast_body(FastJSONProvider(app), todos, fields)
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    assert fast_body(FastJSONProvider(app), todos, fields) == fast
+
+def test_response_is_utf8_json(app, provider, todos):
+    with app.app_context():
+        response = provider.response({'data': [todo.to_json() for todo in todos[:2]]})
+    assert response.mimetype == 'application/json'
+    assert 'ซื้อของ'.encode('utf-8') in response.get_data()
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+import pytest
+from werkzeug.datastructures import MultiDict
+from factory import create_app
+from models import db, Todo, init_db
+from id_layout import migrate_todo_ids
+from pagination import parse_list_params, apply_list_filters, paginate_keyset
+from query_plans import list_query_cases, explain_query_plan, check_plan
+
+# ตรวจ EXPLAIN QUERY PLAN ของ GET /api/todos บนฐานข้อมูลชั่วคราว ทั้ง id แบบ string (เดิม) และแบบ INTEGER
+
+@pytest.fixture(params=['string', 'integer'])
+def app(request, tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'plans.db'}")
+    app = create_app('api')
+    with app.app_context():
+        init_db()
+        if request.param == 'integer':
+            migrate_todo_ids()
+        yield app
+        db.session.remove()
+
+def test_list_queries_use_index(app):
+    failed = []
+    for label, query, bound in list_query_cases():
+        plan = explain_query_plan(query)
+        if not check_plan(plan, bound):
+            failed.append(f"{label}: {' | '.join(plan)}")
+    assert not failed, '\n'.join(failed)
+
+def test_check_plan_rejects_seek_on_range_filter_only(app):
+    # เช่น created_after=...&cursor=... ที่ค้น index ด้วย created_at>? แล้วกรอง cursor ทีละแถว
+    plan = ['SEARCH todo USING INDEX ix_todo_created_at_id (created_at>?)']
+    assert not check_plan(plan, '(created_at,id)>(?,?)')
+    assert not check_plan(['SCAN todo'])
+    assert not check_plan(['SEARCH todo USING INDEX ix_todo_created_at_id (created_at>?)',
+                           'USE TEMP B-TREE FOR ORDER BY'])
+
+@pytest.mark.parametrize('direction', ['asc', 'desc'])
+def test_pages_with_range_filter_match_full_list(app, direction):
+    # ขอบของช่วงเวลาที่ cursor ครอบคลุมอยู่แล้วถูกข้าม ผลรวมทุกหน้าต้องเท่ากับการดึงครั้งเดียว
+    start = datetime(2024, 1, 1)
+    for i in range(40):
+        created = start + timedelta(hours=i // 3)
+        db.session.add(Todo(id=str(i + 1), title=f'งาน {i}', created_at=created, updated_at=created))
+    db.session.commit()
+
+    args = MultiDict({'order': direction, 'created_after': '2024-01-01T02:00:00',
+                      'created_before': '2024-01-01T10:00:00'})
+    params = parse_list_params(args)
+    expected, _ = paginate_keyset(apply_list_filters(Todo.query, Todo, params), Todo, 100,
+                                  sort='created_at', direction=direction)
+
+    pages, cursor = [], None
+    while True:
+        items, cursor = paginate_keyset(apply_list_filters(Todo.query, Todo, params, cursor), Todo, 4,
+                                        cursor, 'created_at', direction)
+        pages.extend(items)
+        if cursor is None:
+            break
+    assert expected and [todo.id for todo in pages] == [todo.id for todo in expected]
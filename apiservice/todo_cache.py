@@ -0,0 +1,120 @@
+# แคช LRU ของ todo รายการเดียว (GET /api/todos/<id>) ล้างตาม event ของ events.broker
+# ตัวนับ generation อยู่ใน shared memory ที่สร้างก่อน fork การเขียนใน worker หนึ่งจึงล้างแคชของทุก worker
+import multiprocessing
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from flask import current_app
+
+DEFAULT_CACHE_SIZE = 10000
+# จำนวนช่องของตัวนับ generation (id ที่ hash ลงช่องเดียวกันจะถูกล้างพร้อมกัน) ช่อง 0 ใช้ล้างทั้งแคช
+GENERATION_SLOTS = 4096
+
+_generations = multiprocessing.Array('Q', GENERATION_SLOTS + 1)
+
+def _slot(todo_id):
+    return 1 + zlib.crc32(str(todo_id).encode('utf-8')) % GENERATION_SLOTS
+
+class TodoCache:
+    """LRU ของ todo ตาม id พร้อมตัวนับ hit / miss / eviction"""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, generations=_generations):
+        self.max_entries = max_entries
+        self._generations = generations
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def generation(self, todo_id):
+        values = self._generations.get_obj()
+        return values[0], values[_slot(todo_id)]
+
+    def get(self, todo_id):
+        with self._lock:
+            entry = self._entries.get(todo_id)
+            if entry is not None:
+                if entry[0] == self.generation(todo_id):
+                    self._entries.move_to_end(todo_id)
+                    self.hits += 1
+                    return entry[1]
+                # ถูกแก้ไขหลังจากเก็บไว้ (อาจโดย worker อื่น)
+                del self._entries[todo_id]
+            self.misses += 1
+            return None
+
+    def load(self, todo_id, loader):
+        """คืน todo จากแคช หรือเรียก loader(todo_id) แล้วเก็บผลไว้ (ไม่เก็บผลที่เป็น None)"""
+        value = self.get(todo_id)
+        if value is not None:
+            return value
+        # อ่าน generation ก่อนอ่านฐานข้อมูล: ถ้ามีการเขียนระหว่างนั้น ค่าที่เก็บจะไม่ตรงกับ generation ใหม่
+        generation = self.generation(todo_id)
+        value = loader(todo_id)
+        if value is not None and self.max_entries > 0:
+            with self._lock:
+                self._entries[todo_id] = (generation, value)
+                self._entries.move_to_end(todo_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, todo_id=None):
+        """ทำให้ todo (หรือทั้งแคชถ้าไม่ระบุ id) ใช้ไม่ได้ในทุก process"""
+        slot = 0 if todo_id is None else _slot(todo_id)
+        with self._generations.get_lock():
+            self._generations[slot] += 1
+        with self._lock:
+            if todo_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(todo_id, None)
+            self.invalidations += 1
+
+    def on_event(self, event_type, data):
+        """listener ของ events.broker (เรียกหลัง commit แล้ว)"""
+        todo_id = data.get('id') if isinstance(data, dict) else None
+        if event_type in ('created', 'updated', 'deleted') and todo_id is not None:
+            self.invalidate(todo_id)
+        else:
+            # resync (เช่นหลังนำเข้า): ไม่รู้ว่ารายการใดเปลี่ยน ล้างทั้งหมด
+            self.invalidate()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'pid': os.getpid(),
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0
+            }
+
+def load_todo(todo_id):
+    from models import db, Todo
+    todo = db.session.get(Todo, todo_id)
+    return todo.to_json() if todo else None
+
+def cached_todo(todo_id):
+    """todo ทุกคอลัมน์ (dict แบบ Todo.to_json) หรือ None ถ้าไม่พบ"""
+    from id_layout import canonical_todo_id
+    # id ที่ต่างกันแต่เป็นแถวเดียวกัน ('01' กับ '1' ใน layout integer) ต้องใช้คีย์และช่อง generation เดียวกัน
+    return current_app.extensions['todo_cache'].load(canonical_todo_id(todo_id), load_todo)
+
+def cache_stats():
+    return current_app.extensions['todo_cache'].stats()
+
+def init_todo_cache(app):
+    from events import broker
+    cache = TodoCache(app.config.get('TODO_CACHE_SIZE', DEFAULT_CACHE_SIZE))
+    broker.add_listener(cache.on_event)
+    app.extensions['todo_cache'] = cache
+    return cache
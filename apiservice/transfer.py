@@ -0,0 +1,157 @@
+import io
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import bindparam, func
+from sqlalchemy.dialects.sqlite import insert
+from werkzeug.exceptions import BadRequest
+from models import db, Todo, TODO_FIELDS
+from id_layout import client_todo_id
+from streaming import iter_rows, generate_ndjson
+
+DEFAULT_EXPORT_BATCH_SIZE = 1000
+DEFAULT_IMPORT_BATCH_SIZE = 1000
+READ_BUFFER_SIZE = 64 * 1024
+# จำนวนข้อผิดพลาดสูงสุดที่รายงานกลับ (นับจำนวนทั้งหมดเสมอ)
+MAX_REPORTED_ERRORS = 100
+# key ของบรรทัดสรุปท้ายไฟล์ส่งออก (?summary=true) การนำเข้าข้ามบรรทัดนี้
+SUMMARY_KEY = '_summary'
+
+def export_ndjson(summary=False):
+    """สร้าง generator ของ NDJSON ทุกรายการ เรียงตาม (created_at, id) จากเก่าไปใหม่
+
+    อ่านผ่าน server-side cursor (stream_results + yield_per) แล้วบันทึกจำนวนแถวและ rows/s ลง log เมื่อจบ
+    summary=True ต่อท้ายด้วยบรรทัด {"_summary": {...}} ให้ผู้เรียกเห็นจำนวนแถวและ rows/s ด้วย
+    """
+    batch_size = current_app.config.get('EXPORT_BATCH_SIZE', DEFAULT_EXPORT_BATCH_SIZE)
+    query = Todo.query.order_by(Todo.created_at.asc(), Todo.id.asc()) \
+        .execution_options(stream_results=True)
+    logger = current_app.logger
+    stats = {}
+
+    def counted(rows):
+        count = 0
+        start = time.perf_counter()
+        for row in rows:
+            count += 1
+            yield row
+        elapsed = time.perf_counter() - start
+        logger.info('exported %d todos in %.2fs (%.0f rows/s)', count, elapsed, count / elapsed if elapsed else 0)
+        stats.update({
+            'exported': count,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(count / elapsed) if elapsed else count
+        })
+
+    body = generate_ndjson(counted(iter_rows(query, Todo, TODO_FIELDS, batch_size)), batch_size)
+    if not summary:
+        return body
+    return _with_summary(body, stats)
+
+def _with_summary(body, stats):
+    yield from body
+    yield current_app.json.dumps_bytes({SUMMARY_KEY: stats}) + b'\n'
+
+def _parse_timestamp(item, name):
+    value = item.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise BadRequest(f"{name} ต้องอยู่ในรูปแบบ ISO 8601")
+
+def _parse_line(line, validate):
+    try:
+        item = current_app.json.loads(line)
+    except ValueError:
+        raise BadRequest("ไม่ใช่ JSON ที่ถูกต้อง")
+    if not isinstance(item, dict):
+        raise BadRequest("รายการต้องเป็น object")
+    if SUMMARY_KEY in item:
+        return None
+    if not isinstance(item.get('title', ''), str):
+        raise BadRequest("ชื่องานต้องเป็นข้อความ")
+    validate(item)
+    if not isinstance(item.get('description') or '', str):
+        raise BadRequest("รายละเอียดต้องเป็นข้อความ")
+    if not isinstance(item.get('is_completed', False), bool):
+        raise BadRequest("is_completed ต้องเป็น true หรือ false")
+    return {
+        'id': client_todo_id(item.get('id')),
+        'title': item['title'].strip(),
+        'description': (item.get('description') or '').strip(),
+        'is_completed': item.get('is_completed', False),
+        # ไม่ระบุ created_at: รายการใหม่ใช้เวลาที่นำเข้า รายการเดิมคงค่าเดิมไว้ (ดู _upsert)
+        'given_created_at': _parse_timestamp(item, 'created_at')
+    }
+
+def _upsert(rows):
+    # INSERT ... ON CONFLICT(id) DO UPDATE แบบ executemany (trigger ของ counter / version / FTS ทำงานตามปกติ)
+    # นับการ import เป็นการแก้ไข เพื่อให้ client ที่ใช้ delta sync / ETag เห็นการเปลี่ยนแปลง
+    # เวลาใหม่ทุก batch: batch ที่ commit ทีหลังต้องไม่มี updated_at ย้อนไปก่อนจุดที่ delta sync อ่านผ่านไปแล้ว
+    now = datetime.utcnow()
+    table = Todo.__table__
+    given_created_at = bindparam('given_created_at')
+    statement = insert(table).values(created_at=func.coalesce(given_created_at, now), updated_at=now)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={
+            'title': statement.excluded.title,
+            'description': statement.excluded.description,
+            'is_completed': statement.excluded.is_completed,
+            'created_at': func.coalesce(given_created_at, table.c.created_at),
+            'updated_at': statement.excluded.updated_at
+        }
+    )
+    db.session.execute(statement, rows)
+    db.session.commit()
+
+def import_ndjson(stream, validate):
+    """นำเข้า NDJSON จาก stream ทีละบรรทัด บันทึกแบบ upsert ตาม id ทีละ batch (หนึ่ง transaction ต่อ batch)
+
+    บรรทัดที่ไม่ผ่านการตรวจสอบจะถูกข้ามและรายงานพร้อมหมายเลขบรรทัด
+    batch ที่ commit แล้วจะไม่ถูกย้อนกลับแม้ batch หลังจากนั้นจะล้มเหลว
+    """
+    batch_size = current_app.config.get('IMPORT_BATCH_SIZE', DEFAULT_IMPORT_BATCH_SIZE)
+    start = time.perf_counter()
+    imported = failed = batches = 0
+    errors = []
+    rows = []
+
+    # request.stream อ่านทีละ byte เมื่อวนทีละบรรทัด จึงต้องครอบด้วย buffer
+    for number, line in enumerate(io.BufferedReader(stream, READ_BUFFER_SIZE), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = _parse_line(line, validate)
+        except BadRequest as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'line': number, 'message': e.description})
+            continue
+        if row is None:
+            continue
+        rows.append(row)
+
+        if len(rows) == batch_size:
+            _upsert(rows)
+            imported += len(rows)
+            batches += 1
+            rows = []
+
+    if rows:
+        _upsert(rows)
+        imported += len(rows)
+        batches += 1
+
+    elapsed = time.perf_counter() - start
+    current_app.logger.info('imported %d todos in %.2fs (%d batches, %d failed)', imported, elapsed, batches, failed)
+    return {
+        'imported': imported,
+        'failed': failed,
+        'errors': errors,
+        'batches': batches,
+        'elapsed_seconds': round(elapsed, 3),
+        'rows_per_second': round(imported / elapsed) if elapsed else imported
+    }
@@ -1,34 +1,83 @@
-from flask import render_template_string, request, redirect, url_for, flash
+from flask import render_template, stream_template, request, redirect, url_for, flash, get_flashed_messages, make_response
+from jinja2 import DictLoader, FileSystemBytecodeCache
+from werkzeug.exceptions import BadRequest
 from datetime import datetime
+import functools
+import hashlib
+import os
 from models import db, Todo
+from ids import new_todo_id
 from templates import HOME_TEMPLATE, API_INFO_TEMPLATE
+from events import publish_todo_event, publish_todo_events
+from maintenance import archive_completed
+from stats import read_stats
+from pagination import DashboardPage
+from writes import run_write
+from mutations import insert_todo, update_todo_fields, toggle_todo_status, delete_todo_by_id
+from caching import not_modified, with_etag
+from todo_cache import cached_todo
+
+# ชื่อ template ที่ลงทะเบียนไว้ใน loader (compile ครั้งเดียวแล้วใช้ซ้ำจาก cache ของ Jinja)
+WEB_TEMPLATES = {
+    'home.html': HOME_TEMPLATE,
+    'api_info.html': API_INFO_TEMPLATE,
+}
+
+# จำนวน host สูงสุดที่เก็บหน้า API docs ที่ render แล้วไว้
+API_INFO_CACHE_SIZE = 64
+
+def configure_templates(app):
+    """ลงทะเบียน template ผ่าน loader และ compile ล่วงหน้าตอนเริ่มต้น
+
+    ถ้ากำหนด TEMPLATE_BYTECODE_CACHE_DIR จะเก็บ bytecode ที่ compile แล้วไว้บนดิสก์
+    ทำให้ process ถัดไปไม่ต้อง parse template ใหม่
+    """
+    app.jinja_loader = DictLoader(WEB_TEMPLATES)
+
+    cache_dir = app.config.get('TEMPLATE_BYTECODE_CACHE_DIR')
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+    for name in WEB_TEMPLATES:
+        app.jinja_env.get_template(name)
 
 def register_web_routes(app):
     """ลงทะเบียน Web Routes ทั้งหมด"""
+    configure_templates(app)
+
+    # หน้า API docs ขึ้นกับ request.url_root เท่านั้น จึงเก็บผลที่ render แล้วแยกตาม host
+    # (lru_cache ปลอดภัยเมื่อหลาย thread เรียกพร้อมกัน)
+    @functools.lru_cache(maxsize=API_INFO_CACHE_SIZE)
+    def render_api_info(url_root):
+        html = render_template('api_info.html')
+        return html, hashlib.sha1(html.encode('utf-8')).hexdigest()
     
     @app.route('/')
     def web_home():
         """หน้าหลักแสดงรายการ Todo ในรูปแบบตาราง"""
         try:
-            todos = Todo.query.order_by(Todo.is_completed.asc(), Todo.created_at.desc()).all()
-            
-            # คำนวณสถิติ
-            total = len(todos)
-            completed = sum(1 for todo in todos if todo.is_completed)
-            pending = total - completed
-            completion_rate = (completed / total * 100) if total > 0 else 0
-            
-            stats = {
-                'total': total,
-                'completed': completed,
-                'pending': pending,
-                'completion_rate': completion_rate
-            }
-            
-            return render_template_string(HOME_TEMPLATE, todos=todos, stats=stats)
+            page_size = app.config.get('WEB_PAGE_SIZE', 50)
+            try:
+                page = DashboardPage(Todo, page_size, request.args.get('cursor'))
+            except BadRequest:
+                # cursor เสียหรือถูกแก้ไข: แสดงหน้าแรกแทนหน้าว่าง
+                flash('ลิงก์หน้าไม่ถูกต้อง แสดงหน้าแรกแทน', 'error')
+                page = DashboardPage(Todo, page_size)
+            # query แรกทำงานก่อนเริ่ม stream: ถ้าผิดพลาดยังตอบเป็นหน้า error ได้ทั้งหน้า
+            page.prefetch()
+            
+            # สถิติจากตัวนับ (ไม่ต้องนับจากรายการทั้งหมด)
+            stats = read_stats()
+            
+            # อ่าน flash message ก่อนเริ่ม stream เพื่อให้ session ถูกบันทึกพร้อม header
+            get_flashed_messages(with_categories=True)
+            
+            # ส่งส่วนหัวและสถิติออกไปก่อน แล้วค่อย render แถวของตารางทีละแถว
+            return stream_template('home.html', page=page, stats=stats)
         except Exception as e:
             flash(f'เกิดข้อผิดพลาด: {str(e)}', 'error')
-            return render_template_string(HOME_TEMPLATE, todos=[], stats={'total': 0, 'completed': 0, 'pending': 0, 'completion_rate': 0})
+            return render_template('home.html', page=None, stats={'total': 0, 'completed': 0, 'pending': 0, 'completion_rate': 0})
 
     @app.route('/web/add', methods=['POST'])
     def web_add_todo():
@@ -41,15 +90,13 @@ def register_web_routes(app):
                 flash('กรุณากรอกชื่องาน', 'error')
                 return redirect(url_for('web_home'))
             
-            new_todo = Todo(
-                id=str(int(datetime.now().timestamp() * 1000)),
-                title=title,
-                description=description,
-                is_completed=False
-            )
-            
-            db.session.add(new_todo)
-            db.session.commit()
+            new_todo = run_write(insert_todo, {
+                'id': new_todo_id(),
+                'title': title,
+                'description': description,
+                'is_completed': False
+            })
+            publish_todo_event('created', new_todo)
             
             flash(f'เพิ่มงาน "{title}" สำเร็จ', 'success')
             
@@ -63,8 +110,7 @@ def register_web_routes(app):
     def web_edit_todo(todo_id):
         """แก้ไข Todo ผ่าน Web Form"""
         try:
-            todo = Todo.query.get(todo_id)
-            if not todo:
+            if cached_todo(todo_id) is None:
                 flash('ไม่พบงานที่ระบุ', 'error')
                 return redirect(url_for('web_home'))
             
@@ -75,11 +121,11 @@ def register_web_routes(app):
                 flash('กรุณากรอกชื่องาน', 'error')
                 return redirect(url_for('web_home'))
             
-            todo.title = title
-            todo.description = description
-            todo.updated_at = datetime.utcnow()
-            
-            db.session.commit()
+            todo = run_write(update_todo_fields, todo_id, {'title': title, 'description': description})
+            if todo is None:
+                flash('ไม่พบงานที่ระบุ', 'error')
+                return redirect(url_for('web_home'))
+            publish_todo_event('updated', todo)
             
             flash(f'แก้ไขงาน "{title}" สำเร็จ', 'success')
             
@@ -93,18 +139,15 @@ def register_web_routes(app):
     def web_toggle_todo(todo_id):
         """เปลี่ยนสถานะ Todo ผ่าน Web"""
         try:
-            todo = Todo.query.get(todo_id)
+            todo = run_write(toggle_todo_status, todo_id)
             if not todo:
                 flash('ไม่พบงานที่ระบุ', 'error')
                 return redirect(url_for('web_home'))
             
-            todo.is_completed = not todo.is_completed
-            todo.updated_at = datetime.utcnow()
-            
-            db.session.commit()
+            publish_todo_event('updated', todo)
             
-            status_text = 'เสร็จแล้ว' if todo.is_completed else 'ยังไม่เสร็จ'
-            flash(f'เปลี่ยนสถานะงาน "{todo.title}" เป็น "{status_text}"', 'success')
+            status_text = 'เสร็จแล้ว' if todo['is_completed'] else 'ยังไม่เสร็จ'
+            flash(f'เปลี่ยนสถานะงาน "{todo["title"]}" เป็น "{status_text}"', 'success')
             
         except Exception as e:
             db.session.rollback()
@@ -116,16 +159,14 @@ def register_web_routes(app):
     def web_delete_todo(todo_id):
         """ลบ Todo ผ่าน Web"""
         try:
-            todo = Todo.query.get(todo_id)
+            todo = run_write(delete_todo_by_id, todo_id)
             if not todo:
                 flash('ไม่พบงานที่ระบุ', 'error')
                 return redirect(url_for('web_home'))
             
-            title = todo.title
-            db.session.delete(todo)
-            db.session.commit()
+            publish_todo_event('deleted', {'id': todo_id})
             
-            flash(f'ลบงาน "{title}" สำเร็จ', 'success')
+            flash(f'ลบงาน "{todo["title"]}" สำเร็จ', 'success')
             
         except Exception as e:
             db.session.rollback()
@@ -137,17 +178,14 @@ def register_web_routes(app):
     def web_delete_completed():
         """ลบงานที่เสร็จแล้วทั้งหมดผ่าน Web"""
         try:
-            completed_todos = Todo.query.filter_by(is_completed=True).all()
-            count = len(completed_todos)
+            deleted_ids = archive_completed()
+            count = len(deleted_ids)
             
             if count == 0:
                 flash('ไม่มีงานที่เสร็จแล้วให้ลบ', 'error')
                 return redirect(url_for('web_home'))
             
-            for todo in completed_todos:
-                db.session.delete(todo)
-            
-            db.session.commit()
+            publish_todo_events('deleted', ({'id': deleted_id} for deleted_id in deleted_ids))
             
             flash(f'ลบงานที่เสร็จแล้ว {count} รายการสำเร็จ', 'success')
             
@@ -160,4 +198,6 @@ def register_web_routes(app):
     @app.route('/api-docs')
     def api_info():
         """หน้าข้อมูล API Documentation"""
-        return render_template_string(API_INFO_TEMPLATE)
\ No newline at end of file
+        html, etag = render_api_info(request.url_root)
+        # ETag ทำให้ browser ใช้หน้าที่เก็บไว้ได้ และให้ใช้ body ที่บีบอัดแล้วซ้ำได้
+        return not_modified(etag) or with_etag(make_response(html), etag)
\ No newline at end of file
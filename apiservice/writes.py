@@ -0,0 +1,163 @@
+import os
+import queue
+import threading
+import time
+from flask import current_app
+from models import db
+
+DEFAULT_BATCH_MAX_SIZE = 64
+DEFAULT_BATCH_MAX_WAIT_MS = 2
+DEFAULT_WRITE_TIMEOUT_SECONDS = 30
+
+class WriteTimeout(Exception):
+    """งานเขียนไม่เสร็จภายในเวลาที่รอ (งานที่ยังไม่เริ่มจะถูกยกเลิก งานที่เริ่มไปแล้วอาจถูกบันทึกภายหลัง)"""
+    pass
+
+class WriteJob:
+    """งานเขียนหนึ่งรายการที่ request รอผลอยู่"""
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+        self.result = None
+        self.error = None
+        # True เมื่อผลของงานถูก commit แล้ว
+        self.committed = False
+        # request เลิกรอแล้ว (หมดเวลา) ไม่ต้องเริ่มงานนี้
+        self.abandoned = False
+        self.done = threading.Event()
+
+class WriteCoordinator:
+    """รวมงานเขียนจากหลาย request ให้ thread เดียวบันทึกเป็น batch (group commit)
+
+    แต่ละงานทำงานใน SAVEPOINT ของตัวเอง งานที่ล้มเหลวจะย้อนกลับเฉพาะส่วนของตัวเอง
+    แล้วทั้ง batch จะ commit ครั้งเดียว (fsync ครั้งเดียว) ก่อนแจ้งผลให้แต่ละ request
+    """
+
+    def __init__(self, app, max_batch_size=DEFAULT_BATCH_MAX_SIZE, max_wait=DEFAULT_BATCH_MAX_WAIT_MS / 1000,
+                 timeout=DEFAULT_WRITE_TIMEOUT_SECONDS):
+        self.app = app
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, func, *args):
+        """ส่งงานเข้าคิวแล้วรอจน batch ที่มีงานนี้ commit แล้ว คืนผลของ func หรือ raise error ของ func"""
+        self._ensure_started()
+        job = WriteJob(func, args)
+        self._queue.put(job)
+        if not job.done.wait(self.timeout):
+            job.abandoned = True
+            raise WriteTimeout()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _ensure_started(self):
+        # เริ่ม thread เมื่อมีงานแรก (และเริ่มใหม่ใน process ลูกหลัง fork)
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                # คิวใหม่เฉพาะหลัง fork (งานในคิวเป็นของ process แม่) ถ้า thread เดิมหยุดไป งานที่ค้างในคิวยังต้องถูกทำ
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='write-coordinator', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                batch = self._collect()
+                try:
+                    self._apply(batch)
+                except Exception as e:
+                    self.app.logger.exception('write batch failed')
+                    # ไม่รู้ผลของงานที่ยังไม่ได้ commit: แจ้งเป็น error ไม่ใช่ผลว่าง (ซึ่ง request จะตีความเป็น 404 / ID ซ้ำ)
+                    for job in batch:
+                        if job.error is None and not job.committed:
+                            job.error = e
+                finally:
+                    for job in batch:
+                        job.done.set()
+
+    def _collect(self):
+        # รองานแรกไม่จำกัดเวลา จากนั้นรับงานที่ตามมาจนครบขนาดหรือหมดเวลารอ
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _apply(self, batch):
+        try:
+            _begin_write()
+            for job in batch:
+                if job.abandoned:
+                    job.error = WriteTimeout()
+                    continue
+                try:
+                    with db.session.begin_nested():
+                        job.result = job.func(*job.args)
+                except Exception as e:
+                    job.error = e
+            db.session.commit()
+            for job in batch:
+                job.committed = job.error is None
+        except Exception:
+            # commit ทั้ง batch ไม่สำเร็จ: บันทึกทีละงานเพื่อให้ error กระทบเฉพาะ request ที่เป็นต้นเหตุ
+            db.session.rollback()
+            for job in batch:
+                if job.abandoned:
+                    continue
+                job.result, job.error = None, None
+                try:
+                    job.result = run_inline(job.func, *job.args)
+                    job.committed = True
+                except Exception as e:
+                    job.error = e
+        finally:
+            db.session.remove()
+
+def _begin_write():
+    # SQLite: จอง write lock ตั้งแต่ต้น batch (และทำให้ SAVEPOINT อยู่ภายใน transaction เดียวกัน)
+    connection = db.session.connection()
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+def run_inline(func, *args):
+    """รัน func แล้ว commit ใน transaction ของ thread ปัจจุบัน"""
+    try:
+        result = func(*args)
+        db.session.commit()
+        return result
+    except Exception:
+        db.session.rollback()
+        raise
+
+def run_write(func, *args):
+    """รันงานเขียนผ่าน coordinator ของแอป (ถ้าปิดไว้จะรันและ commit ใน request ทันที)
+
+    func ทำงานใน session ของ thread ที่บันทึก จึงต้องคืนค่าเป็นข้อมูลธรรมดา (เช่น dict) ไม่ใช่ ORM object
+    """
+    coordinator = current_app.extensions.get('write_coordinator')
+    if coordinator is None:
+        return run_inline(func, *args)
+    return coordinator.submit(func, *args)
+
+def init_writes(app):
+    """เปิดใช้ group commit ตาม app.config['WRITE_COORDINATOR']"""
+    if app.config.get('WRITE_COORDINATOR', False):
+        app.extensions['write_coordinator'] = WriteCoordinator(
+            app,
+            app.config.get('WRITE_BATCH_MAX_SIZE', DEFAULT_BATCH_MAX_SIZE),
+            app.config.get('WRITE_BATCH_MAX_WAIT_MS', DEFAULT_BATCH_MAX_WAIT_MS) / 1000,
+            app.config.get('WRITE_TIMEOUT_SECONDS', DEFAULT_WRITE_TIMEOUT_SECONDS)
+        )
@@ -62,6 +62,9 @@ class Todo {
   }
 }
 
+// sync token หมดอายุ ต้องดึงข้อมูลใหม่ทั้งหมด
+class SyncTokenExpiredException implements Exception {}
+
 class ApiService {
   // เปลี่ยน URL นี้ตามที่ Flask Server ของคุณรัน
   static const String baseUrl = 'http://192.168.1.35:5000/api';
@@ -74,24 +77,30 @@ class ApiService {
     'Content-Type': 'application/json',
   };
 
-  // ดึงรายการ Todo ทั้งหมด
-  static Future<List<Todo>> getTodos() async {
+  // ดึงเฉพาะรายการที่เปลี่ยนแปลงตั้งแต่ sync token (delta sync)
+  static Future<Map<String, dynamic>> getChanges(String? since) async {
     try {
+      final query = {'limit': '200', if (since != null) 'since': since};
       final response = await http.get(
-        Uri.parse('$baseUrl/todos'),
+        Uri.parse('$baseUrl/todos/changes').replace(queryParameters: query),
         headers: headers,
       );
 
+      if (response.statusCode == 410) {
+        throw SyncTokenExpiredException();
+      }
+
       if (response.statusCode == 200) {
         final Map<String, dynamic> data = json.decode(response.body);
         if (data['success'] == true && data['data'] != null) {
-          final List<dynamic> todosJson = data['data'];
-          return todosJson.map((json) => Todo.fromJson(json)).toList();
+          return data['data'];
         }
       }
-      throw Exception('ไม่สามารถดึงข้อมูลได้');
+      throw Exception('ไม่สามารถดึงข้อมูลการเปลี่ยนแปลงได้');
+    } on SyncTokenExpiredException {
+      rethrow;
     } catch (e) {
-      print('Error fetching todos: $e');
+      print('Error fetching changes: $e');
       throw Exception('เกิดข้อผิดพลาดในการเชื่อมต่อ: $e');
     }
   }
@@ -214,6 +223,7 @@ class TodoListScreen extends StatefulWidget {
 
 class _TodoListScreenState extends State<TodoListScreen> {
   List<Todo> todos = [];
+  String? _syncToken;
   bool isLoading = false;
   bool isOnline = false;
   String? errorMessage;
@@ -236,7 +246,7 @@ class _TodoListScreenState extends State<TodoListScreen> {
     });
 
     try {
-      final fetchedTodos = await ApiService.getTodos();
+      final fetchedTodos = await _syncTodos();
       final fetchedStats = await ApiService.getStats();
       
       setState(() {
@@ -256,6 +266,39 @@ class _TodoListScreenState extends State<TodoListScreen> {
     }
   }
 
+  // ดึงเฉพาะรายการที่เปลี่ยนแปลงมารวมกับรายการเดิม (ถ้า token หมดอายุจะเริ่มใหม่ทั้งหมด)
+  Future<List<Todo>> _syncTodos() async {
+    try {
+      final Map<String, Todo> byId = {
+        if (_syncToken != null)
+          for (final todo in todos) todo.id: todo,
+      };
+      String? token = _syncToken;
+      bool hasMore;
+
+      do {
+        final changes = await ApiService.getChanges(token);
+        for (final id in changes['deleted']) {
+          byId.remove(id.toString());
+        }
+        for (final json in changes['upserted']) {
+          final todo = Todo.fromJson(json);
+          byId[todo.id] = todo;
+        }
+        token = changes['next_token'];
+        hasMore = changes['has_more'] == true;
+      } while (hasMore);
+
+      _syncToken = token;
+      final merged = byId.values.toList();
+      merged.sort((a, b) => (b.createdAt ?? DateTime(0)).compareTo(a.createdAt ?? DateTime(0)));
+      return merged;
+    } on SyncTokenExpiredException {
+      _syncToken = null;
+      return _syncTodos();
+    }
+  }
+
   // แสดง SnackBar แจ้งข้อผิดพลาด
   void _showErrorSnackBar(String message) {
     ScaffoldMessenger.of(context).showSnackBar(